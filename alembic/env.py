@@ -35,6 +35,8 @@ DATABASE = os.getenv("DB_DATABASE")
 
 if os.getenv("USE_TEST_DB"):
     DATABASE = f"{DATABASE}_test"
+elif os.getenv("USE_BENCHMARK_DB"):
+    DATABASE = f"{DATABASE}_benchmark"
 
 DNS_URL = f"postgresql://{USER}:{PASSWORD}@{HOST}/{DATABASE}"
 
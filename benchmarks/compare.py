@@ -0,0 +1,76 @@
+"""
+Compares two result files of `benchmarks.suite`, e.g. of the main branch and of a change.
+
+Results are matched by their benchmark, method and case. The median latency of each of them is printed
+with the relative change, changes beyond `--threshold` are marked and make the command fail.
+
+Usage:
+    python -m benchmarks.compare base.json head.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import sys
+
+KEY_FIELDS = ("benchmark", "controller", "method", "case")
+
+
+def load_results(path: str) -> tuple[dict, dict[tuple, dict]]:
+    with open(path) as f:
+        report = json.load(f)
+    return report["metadata"], {
+        tuple(result.get(field) for field in KEY_FIELDS): result
+        for result in report["results"]
+    }
+
+
+def compare(base_path: str, head_path: str, threshold: float) -> bool:
+    base_metadata, base = load_results(base_path)
+    head_metadata, head = load_results(head_path)
+    if base_metadata["events_count"] != head_metadata["events_count"]:
+        print(
+            f"Warning: different datasets, {base_metadata['events_count']} and "
+            f"{head_metadata['events_count']} events",
+            file=sys.stderr,
+        )
+
+    print(f"base: {base_metadata['commit']}\nhead: {head_metadata['commit']}\n")
+    print(f"{'benchmark':<75} {'base ms':>10} {'head ms':>10} {'change':>8}")
+    regressed = False
+    for key, head_result in head.items():
+        name = " / ".join(str(field) for field in key if field)
+        if not (base_result := base.get(key)):
+            print(f"{name:<75} {'-':>10} {head_result['median_ms']:>10.2f}")
+            continue
+
+        change = head_result["median_ms"] / base_result["median_ms"] - 1
+        marker = ""
+        if change > threshold:
+            marker, regressed = " slower", True
+        elif change < -threshold:
+            marker = " faster"
+        print(
+            f"{name:<75} {base_result['median_ms']:>10.2f} "
+            f"{head_result['median_ms']:>10.2f} {change:>+8.1%}{marker}"
+        )
+    return not regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Relative change of the median considered significant",
+    )
+    args = parser.parse_args()
+
+    if not compare(args.base, args.head, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Synthetic dataset generator, seeds the benchmark database with realistic GitHub events.
+
+- Repositories and actors are drawn from Zipfian distributions, a few of them produce most of the events.
+- Timestamps follow a daily cycle with weekend dips, per-minute noise and short bursts decaying over minutes.
+- Event types and actions are mixed roughly like on the public GitHub timeline.
+
+The same `--rows`, `--seed` and `--days` always generate the same events, only shifted in time: timestamps
+end at the time of seeding, so the metrics over recent windows (last hour, last day) find data.
+
+Events are stored through `DatabaseController.insert_data_bulk`, the same path the poller uses, so the
+actor sketches are maintained too. The throughput of the seeding is reported as the result.
+
+`--create-database` only creates the benchmark database when it's missing, its tables are created by the
+migrations (`USE_BENCHMARK_DB=1 alembic upgrade head`) before seeding.
+
+Usage:
+    python -m benchmarks.dataset --create-database
+    python -m benchmarks.dataset --rows 100k [--seed 0] [--days 7] [--truncate] [--output seed.json]
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import sys
+import time
+from collections.abc import Iterator
+from datetime import datetime, timezone
+
+import asyncpg
+import numpy as np
+from sqlalchemy import func, select, text
+
+from events_poller.controllers.database import DatabaseController
+from events_poller.database.engine import Database
+from events_poller.database.models import Events
+from events_poller.models.enum import EventTypeEnum
+from events_poller.models.models import EventModel
+from events_poller.settings import DatabaseConfig
+
+DATASET_SIZES = {"100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+EVENT_TYPES_MIX = {
+    EventTypeEnum.WATCH_EVENT: 0.6,
+    EventTypeEnum.PR_EVENT: 0.25,
+    EventTypeEnum.ISSUES_EVENT: 0.15,
+}
+ACTIONS_MIX = {
+    EventTypeEnum.WATCH_EVENT: {"started": 1.0},
+    EventTypeEnum.PR_EVENT: {
+        "opened": 0.4,
+        "closed": 0.45,
+        "reopened": 0.05,
+        "edited": 0.1,
+    },
+    EventTypeEnum.ISSUES_EVENT: {
+        "opened": 0.5,
+        "closed": 0.4,
+        "reopened": 0.05,
+        "labeled": 0.05,
+    },
+}
+# Events of the benchmark dataset don't collide with ids of real GitHub events
+EVENT_ID_START = 10**15
+
+
+def parse_rows(rows: str) -> int:
+    return DATASET_SIZES.get(rows.lower()) or int(rows)
+
+
+def benchmark_database_config() -> DatabaseConfig:
+    # A dedicated database, like the `_test` one, so seeding never touches polled data
+    db_config = DatabaseConfig()
+    db_config.database = db_config.database + "_benchmark"
+    return db_config
+
+
+async def create_database(db_config: DatabaseConfig) -> bool:
+    # Through the `postgres` maintenance database, returns False when the database already exists
+    connection = await asyncpg.connect(
+        host=db_config.host,
+        port=db_config.port,
+        user=db_config.user,
+        password=db_config.password,
+        database="postgres",
+    )
+    try:
+        if await connection.fetchval(
+            "SELECT 1 FROM pg_database WHERE datname = $1", db_config.database
+        ):
+            return False
+        # Identifiers can't be bound as parameters
+        database = db_config.database.replace('"', '""')
+        await connection.execute(f'CREATE DATABASE "{database}"')
+        return True
+    finally:
+        await connection.close()
+
+
+def repository_name(rank: int, owner: str = "org") -> str:
+    # Rank 0 is the repository with the most events
+    return f"{owner}-{rank % 1000}/repo-{rank}"
+
+
+def _zipf_cdf(size: int, exponent: float) -> np.ndarray:
+    weights = 1 / np.arange(1, size + 1) ** exponent
+    return np.cumsum(weights) / weights.sum()
+
+
+def _minute_intensity(rng: np.random.Generator, minutes_count: int) -> np.ndarray:
+    # Relative event rate per minute of the generated time range. The cycles are relative to the start
+    # of the range, not to the wall clock, so the dataset only shifts in time between seedings.
+    minutes = np.arange(minutes_count)
+    hour_of_day = (minutes / 60) % 24
+    day_of_week = (minutes // 1440) % 7
+
+    intensity = 1 + 0.6 * np.sin(2 * np.pi * (hour_of_day - 9) / 24)
+    intensity *= np.where(day_of_week >= 5, 0.7, 1.0)
+    intensity *= rng.lognormal(0, 0.3, minutes_count)
+
+    # About six bursts a day, peaking at up to tens of times the usual rate and decaying over ~10 minutes
+    decay = np.exp(-np.arange(60) / 10)
+    for burst_start in rng.integers(0, minutes_count, max(1, minutes_count // 240)):
+        burst = intensity.mean() * rng.lognormal(2, 0.7) * decay
+        burst_end = min(burst_start + len(decay), minutes_count)
+        intensity[burst_start:burst_end] += burst[: burst_end - burst_start]
+
+    return intensity / intensity.sum()
+
+
+def generate_events(
+    rows: int,
+    seed: int = 0,
+    days: int = 7,
+    end: datetime | None = None,
+    batch_size: int = 1000,
+    owner: str = "org",
+    event_id_start: int = EVENT_ID_START,
+) -> Iterator[list[EventModel]]:
+    """Yields `rows` events in batches of `batch_size`, ordered by `created_at` like the GitHub timeline."""
+    rng = np.random.default_rng(seed)
+    end = end or datetime.now(timezone.utc)
+    minutes_count = days * 1440
+
+    # Seconds since the start of the time range of all the events, sorted
+    events_per_minute = rng.multinomial(rows, _minute_intensity(rng, minutes_count))
+    seconds = np.repeat(np.arange(minutes_count), events_per_minute) * 60.0
+    seconds += rng.random(rows) * 60
+    seconds.sort()
+    start_timestamp = end.timestamp() - minutes_count * 60
+
+    repositories_cdf = _zipf_cdf(max(100, rows // 50), 1.1)
+    actors_cdf = _zipf_cdf(max(100, rows // 10), 1.3)
+    event_types = list(EVENT_TYPES_MIX)
+    event_types_p = list(EVENT_TYPES_MIX.values())
+    actions_cdf = {
+        event_type: (list(actions), np.cumsum(list(actions.values())).tolist())
+        for event_type, actions in ACTIONS_MIX.items()
+    }
+
+    for batch_start in range(0, rows, batch_size):
+        batch_seconds = seconds[batch_start : batch_start + batch_size].tolist()
+        size = len(batch_seconds)
+        repositories = np.searchsorted(repositories_cdf, rng.random(size)).tolist()
+        actors = np.searchsorted(actors_cdf, rng.random(size)).tolist()
+        types = rng.choice(len(event_types), size, p=event_types_p).tolist()
+        actions_u = rng.random(size).tolist()
+
+        batch = []
+        for i in range(size):
+            event_type = event_types[types[i]]
+            actions, cdf = actions_cdf[event_type]
+            batch.append(
+                EventModel(
+                    event_id=event_id_start + batch_start + i,
+                    event_type=event_type,
+                    actor_id=actors[i] + 1,
+                    repository_id=repositories[i] + 1,
+                    repository_name=repository_name(repositories[i], owner),
+                    created_at=datetime.fromtimestamp(
+                        start_timestamp + batch_seconds[i], tz=timezone.utc
+                    ),
+                    action=actions[
+                        min(bisect.bisect(cdf, actions_u[i]), len(actions) - 1)
+                    ],
+                )
+            )
+        yield batch
+
+
+async def seed_database(
+    database: Database,
+    rows: int,
+    seed: int = 0,
+    days: int = 7,
+    batch_size: int = 1000,
+    truncate: bool = False,
+) -> dict:
+    async with database.get_session(commit=truncate) as session:
+        if truncate:
+            await session.execute(text("TRUNCATE events, actor_sketches"))
+        elif await session.scalar(select(func.count()).select_from(Events)):
+            raise SystemExit(
+                "The benchmark database isn't empty, run with --truncate to replace its data"
+            )
+
+    controller = DatabaseController(database)
+    inserted_count = 0
+    generating = 0.0
+    started = time.perf_counter()
+    batches = generate_events(rows, seed, days, batch_size=batch_size)
+    while True:
+        generating_started = time.perf_counter()
+        if not (batch := next(batches, None)):
+            break
+        generating += time.perf_counter() - generating_started
+        inserted_count += await controller.insert_data_bulk(batch)
+
+    inserting = time.perf_counter() - started - generating
+    return {
+        "benchmark": "seed",
+        "rows": rows,
+        "seed": seed,
+        "days": days,
+        "batch_size": batch_size,
+        "inserted_rows": inserted_count,
+        "generate_s": generating,
+        "insert_s": inserting,
+        "insert_rows_per_s": inserted_count / inserting if inserting else None,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--rows", type=parse_rows, default="100k", help="100k, 1m, 10m or a number"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--truncate", action="store_true", help="Delete existing events first"
+    )
+    parser.add_argument("--output", help="Write the result as JSON to a file")
+    parser.add_argument(
+        "--create-database",
+        action="store_true",
+        help="Create the benchmark database when it's missing, then exit",
+    )
+    args = parser.parse_args()
+
+    db_config = benchmark_database_config()
+    if args.create_database:
+        created = await create_database(db_config)
+        print(
+            f"Database {db_config.database} {'created' if created else 'already exists'}"
+        )
+        return
+
+    database = Database(db_config)
+    try:
+        result = await seed_database(
+            database, args.rows, args.seed, args.days, args.batch_size, args.truncate
+        )
+    finally:
+        await database.close_connection()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    json.dump(result, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
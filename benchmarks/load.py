@@ -0,0 +1,377 @@
+"""
+Load test of the API with a mix of dashboard requests at a target rate.
+
+Requests are sent open-loop: arrivals are scheduled at `--rps` on average (Poisson), independently of the
+responses, and latency is measured from the scheduled time. So a saturated server shows up as growing
+latency instead of a silently lower request rate. At most `--max-in-flight` requests are pending, later
+arrivals are dropped and counted as errors.
+
+Reported are the throughput, p50/p95/p99 latency overall and per request, the error rate and the event loop
+lag of the API (`event_loop_lag_seconds` scraped from `/metrics` before and after the run) and of the load
+generator itself, to tell whether the generator kept up.
+
+Only local instances are load tested. With `--serve`, an API process is started against the benchmark
+database seeded by `benchmarks.dataset` and stopped afterwards.
+
+Usage:
+    python -m benchmarks.load [--url http://localhost:8000] [--serve] [--mix dashboard] [--rps 50]
+        [--duration 30] [--output load.json]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+import httpx
+import numpy as np
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.dataset import benchmark_database_config, repository_name
+from benchmarks.suite import git_commit
+from events_poller.models.enum import EventTypeEnum, HistogramBucketEnum
+from events_poller.settings import DatabaseConfig
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+@dataclass(frozen=True)
+class LoadRequest:
+    path: str
+    params: dict
+    weight: float = 1
+
+    @property
+    def name(self) -> str:
+        return self.path + (
+            "?" + "&".join(f"{k}={v}" for k, v in self.params.items())
+            if self.params
+            else ""
+        )
+
+
+@dataclass
+class Sample:
+    request: LoadRequest
+    latency: float
+    status_code: int | None = None
+    error: str | None = None
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None or self.status_code >= 400
+
+
+def request_mixes(top_repository: str) -> dict[str, list[LoadRequest]]:
+    # Weights roughly follow a dashboard refreshing its panels, `top_repository` has the most events
+    metrics = [
+        LoadRequest("/metrics/events-total-count", {"offset": 3600}, 5),
+        LoadRequest(
+            "/metrics/event-avg-time", {"event_type": EventTypeEnum.PR_EVENT}, 3
+        ),
+        LoadRequest(
+            "/metrics/event-time-distribution",
+            {"event_type": EventTypeEnum.PR_EVENT, "approximate": "true"},
+            1,
+        ),
+        LoadRequest(
+            "/metrics/events-histogram", {"bucket": HistogramBucketEnum.HOUR}, 2
+        ),
+        LoadRequest(
+            "/metrics/top-repositories", {"event_type": EventTypeEnum.WATCH_EVENT}, 2
+        ),
+        LoadRequest(
+            "/metrics/multiple-events-repos",
+            {"event_type": EventTypeEnum.WATCH_EVENT},
+            1,
+        ),
+        LoadRequest("/metrics/unique-actors", {"repository_name": top_repository}, 1),
+    ]
+    visualization = [
+        LoadRequest("/visualization/event-avg-time", {}, 1),
+        LoadRequest("/visualization/event-avg-time/figure", {}, 1),
+        LoadRequest("/visualization/events-total-count", {"offset": 3600}, 1),
+    ]
+    return {
+        "dashboard": metrics + visualization,
+        "metrics": metrics,
+        "visualization": visualization,
+    }
+
+
+def load_mix(mix: str) -> list[LoadRequest]:
+    # A name of a predefined mix or a JSON file with a list of {"path": ..., "params": {...}, "weight": ...}
+    if mix in (mixes := request_mixes(repository_name(0))):
+        return mixes[mix]
+    with open(mix) as f:
+        return [LoadRequest(**request) for request in json.load(f)]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, (50, 95, 99))
+    return {
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": max(latencies) * 1000,
+    }
+
+
+def histogram_quantile(buckets: list[tuple[float, float]], quantile: float) -> float:
+    # Linear interpolation within the bucket, like PromQL's `histogram_quantile`
+    total = buckets[-1][1]
+    rank = quantile * total
+    lower_bound, lower_count = 0.0, 0.0
+    for upper_bound, count in buckets:
+        if count >= rank:
+            if upper_bound == float("inf"):
+                return lower_bound
+            return lower_bound + (upper_bound - lower_bound) * (
+                (rank - lower_count) / (count - lower_count)
+                if count > lower_count
+                else 0
+            )
+        lower_bound, lower_count = upper_bound, count
+    return lower_bound
+
+
+async def scrape_event_loop_lag(client: httpx.AsyncClient) -> dict[float, float] | None:
+    # Cumulative bucket counts of the API's `event_loop_lag_seconds`, None when it isn't exposed
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    if response.status_code != httpx.codes.OK:
+        return None
+    for family in text_string_to_metric_families(response.text):
+        if family.name == "event_loop_lag_seconds":
+            return {
+                float(sample.labels["le"]): sample.value
+                for sample in family.samples
+                if sample.name.endswith("_bucket")
+            }
+    return None
+
+
+def event_loop_lag_summary(
+    before: dict[float, float] | None, after: dict[float, float] | None
+) -> dict | None:
+    if not before or not after:
+        return None
+    buckets = sorted((le, after[le] - before.get(le, 0)) for le in after)
+    samples_count = buckets[-1][1]
+    if not samples_count:
+        return None
+    return {
+        "samples": int(samples_count),
+        **{
+            f"p{round(q * 100)}_ms": histogram_quantile(buckets, q) * 1000
+            for q in (0.5, 0.95, 0.99)
+        },
+    }
+
+
+async def monitor_own_lag(lags: list[float], interval: float = 0.05) -> None:
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        lags.append(max(time.monotonic() - started - interval, 0))
+
+
+async def send(
+    client: httpx.AsyncClient, request: LoadRequest, scheduled_at: float
+) -> Sample:
+    try:
+        response = await client.get(request.path, params=request.params)
+        await response.aread()
+    except httpx.HTTPError as e:
+        return Sample(request, time.monotonic() - scheduled_at, error=type(e).__name__)
+    return Sample(
+        request, time.monotonic() - scheduled_at, status_code=response.status_code
+    )
+
+
+async def generate_load(
+    client: httpx.AsyncClient,
+    requests: list[LoadRequest],
+    rps: float,
+    duration: float,
+    max_in_flight: int,
+    seed: int = 0,
+) -> list[Sample]:
+    rng = np.random.default_rng(seed)
+    weights = np.array([r.weight for r in requests], dtype=np.float64)
+    weights /= weights.sum()
+
+    samples: list[Sample] = []
+    tasks: list[asyncio.Task[Sample]] = []
+    pending: set[asyncio.Task[Sample]] = set()
+    started = scheduled_at = time.monotonic()
+    while (scheduled_at := scheduled_at + rng.exponential(1 / rps)) < (
+        started + duration
+    ):
+        await asyncio.sleep(max(scheduled_at - time.monotonic(), 0))
+        request = requests[rng.choice(len(requests), p=weights)]
+        if len(pending) >= max_in_flight:
+            samples.append(Sample(request, 0.0, error="dropped"))
+            continue
+        task = asyncio.create_task(send(client, request, scheduled_at))
+        tasks.append(task)
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    return samples + list(await asyncio.gather(*tasks))
+
+
+def report(samples: list[Sample], elapsed: float) -> dict:
+    by_request: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_request[sample.request.name].append(sample)
+
+    def summary(samples: list[Sample]) -> dict:
+        completed = [s for s in samples if s.error is None]
+        errors_count = sum(s.failed for s in samples)
+        return {
+            "requests": len(samples),
+            "errors": errors_count,
+            "error_rate": errors_count / len(samples) if samples else 0.0,
+            "status_codes": dict(
+                sorted(
+                    (str(code), sum(s.status_code == code for s in completed))
+                    for code in {s.status_code for s in completed}
+                )
+            ),
+            **latency_summary([s.latency for s in completed]),
+        }
+
+    return {
+        "throughput_rps": sum(not s.failed for s in samples) / elapsed,
+        **summary(samples),
+        "per_request": {name: summary(s) for name, s in sorted(by_request.items())},
+    }
+
+
+def check_local(url: str) -> None:
+    if urlsplit(url).hostname not in LOCAL_HOSTS:
+        raise SystemExit(f"Only local instances are load tested, got {url}")
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/openapi.json")).status_code == httpx.codes.OK:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise SystemExit("The API didn't start in time")
+
+
+def serve(url: str) -> subprocess.Popen:
+    # The API against the benchmark database of the local Postgres
+    if DatabaseConfig().host not in LOCAL_HOSTS:
+        raise SystemExit("Only a local Postgres is load tested, check DB_HOST")
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "events_poller.api.app:app",
+            "--host",
+            urlsplit(url).hostname,
+            "--port",
+            str(urlsplit(url).port or 80),
+            "--log-level",
+            "warning",
+        ],
+        env={**os.environ, "DB_DATABASE": benchmark_database_config().database},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument(
+        "--serve", action="store_true", help="Start the API on the benchmark database"
+    )
+    parser.add_argument(
+        "--mix",
+        default="dashboard",
+        help="dashboard, metrics, visualization or a JSON file with the requests",
+    )
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON to a file")
+    args = parser.parse_args()
+
+    check_local(args.url)
+    # Logging every request would load the generator more than the requests themselves
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    requests = load_mix(args.mix)
+    server = serve(args.url) if args.serve else None
+    own_lags: list[float] = []
+    try:
+        async with httpx.AsyncClient(
+            base_url=args.url,
+            timeout=60,
+            limits=httpx.Limits(max_connections=args.max_in_flight),
+        ) as client:
+            await wait_until_ready(client)
+            lag_before = await scrape_event_loop_lag(client)
+
+            monitor = asyncio.create_task(monitor_own_lag(own_lags))
+            started = time.monotonic()
+            samples = await generate_load(
+                client,
+                requests,
+                args.rps,
+                args.duration,
+                args.max_in_flight,
+                args.seed,
+            )
+            elapsed = time.monotonic() - started
+            monitor.cancel()
+
+            lag_after = await scrape_event_loop_lag(client)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    result = {
+        "metadata": {
+            "commit": git_commit(),
+            "url": args.url,
+            "mix": args.mix,
+            "target_rps": args.rps,
+            "duration_s": elapsed,
+            "max_in_flight": args.max_in_flight,
+        },
+        **report(samples, elapsed),
+        "event_loop_lag": {
+            "api": event_loop_lag_summary(lag_before, lag_after),
+            "load_generator": latency_summary(own_lags),
+        },
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    json.dump(result, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
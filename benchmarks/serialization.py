@@ -0,0 +1,165 @@
+"""
+Serialization and compression benchmark of the biggest API responses.
+
+Compares the stdlib `json` rendering of FastAPI's JSONResponse with ORJSONResponse (the API default),
+both fed by the same pydantic serialization FastAPI runs for `response_model`, and the cost and ratio
+of gzip and brotli compression of the rendered bodies.
+
+Usage:
+    python -m benchmarks.serialization [--repeat 20] [--output results.json]
+"""
+
+import argparse
+import gzip
+import json
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import brotli
+import numpy as np
+import plotly.graph_objects as go
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from events_poller.models.enum import EventTypeEnum, HistogramBucketEnum
+from events_poller.models.models import (
+    EventsHistogramBucketModel,
+    EventsHistogramResponse,
+    GroupedEventsCountModel,
+    RepositoriesWithMultipleEventsResponse,
+)
+
+
+def repositories_response(repositories_count: int) -> BaseModel:
+    return RepositoriesWithMultipleEventsResponse(
+        event_type=EventTypeEnum.WATCH_EVENT,
+        repositories={
+            f"organization-{i % 5000}/repository-{i}": 3 + i % 97
+            for i in range(repositories_count)
+        },
+    )
+
+
+def histogram_response(buckets_count: int) -> BaseModel:
+    created_since = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    return EventsHistogramResponse(
+        bucket=HistogramBucketEnum.MINUTE,
+        created_since=created_since,
+        created_until=created_since + timedelta(minutes=buckets_count),
+        buckets=[
+            EventsHistogramBucketModel(
+                bucket_start=created_since + timedelta(minutes=i),
+                events_count=GroupedEventsCountModel(
+                    pr_event=i % 7, watch_event=i % 11, issue_event=i % 3, total=i % 21
+                ),
+            )
+            for i in range(buckets_count)
+        ],
+    )
+
+
+def avg_time_graph_html(points_count: int) -> bytes:
+    rng = np.random.default_rng(0)
+    fig = go.Figure()
+    for event_type in EventTypeEnum:
+        fig.add_trace(
+            go.Scatter(
+                x=np.arange(points_count),
+                y=rng.exponential(30, points_count),
+                mode="markers",
+                name=event_type,
+            )
+        )
+    return fig.to_html(full_html=False, include_plotlyjs="cdn").encode()
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    # Median wall time in milliseconds
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def benchmark_serialization(name: str, response: BaseModel, repeat: int) -> list[dict]:
+    # The same steps FastAPI runs for an endpoint with `response_model`: validate + serialize, then render
+    adapter = TypeAdapter(type(response))
+    content = adapter.dump_python(response, mode="json")
+    serialize_ms = measure(lambda: adapter.dump_python(response, mode="json"), repeat)
+    results = []
+    for response_class in (JSONResponse, ORJSONResponse):
+        body = response_class(content).body
+        results.append(
+            {
+                "benchmark": "serialization",
+                "payload": name,
+                "response_class": response_class.__name__,
+                "serialize_ms": serialize_ms,
+                "render_ms": measure(
+                    lambda: response_class(content),  # noqa: B023
+                    repeat,
+                ),
+                "size_bytes": len(body),
+            }
+        )
+    return results
+
+
+def benchmark_compression(name: str, body: bytes, repeat: int) -> list[dict]:
+    compressors: dict[str, Callable[[bytes], bytes]] = {
+        "gzip-6": lambda b: gzip.compress(b, compresslevel=6),
+        "gzip-9": lambda b: gzip.compress(b, compresslevel=9),
+        "br-4": lambda b: brotli.compress(b, quality=4),
+        "br-6": lambda b: brotli.compress(b, quality=6),
+    }
+    return [
+        {
+            "benchmark": "compression",
+            "payload": name,
+            "encoding": encoding,
+            "compress_ms": measure(lambda: compress(body), repeat),  # noqa: B023
+            "size_bytes": len(body),
+            "compressed_bytes": len(compress(body)),
+        }
+        for encoding, compress in compressors.items()
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to a file")
+    args = parser.parse_args()
+
+    payloads = {
+        "multiple-events-repos (1000 repositories)": repositories_response(1000),
+        "multiple-events-repos (100k repositories)": repositories_response(100_000),
+        "events-histogram (10000 buckets)": histogram_response(10_000),
+    }
+    results = []
+    for name, response in payloads.items():
+        results += benchmark_serialization(name, response, args.repeat)
+        body = ORJSONResponse(
+            TypeAdapter(type(response)).dump_python(response, mode="json")
+        ).body
+        results += benchmark_compression(name, body, args.repeat)
+    results += benchmark_compression(
+        "avg-time graph HTML (3 x 10000 points)",
+        avg_time_graph_html(10_000),
+        args.repeat,
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    json.dump(results, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
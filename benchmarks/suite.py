@@ -0,0 +1,590 @@
+"""
+Benchmark suite of the ingest path and of every DatabaseController and MetricsController query method.
+
+Runs against the seeded benchmark database (see `benchmarks.dataset`) and measures:
+- `GitHubApiPoller._parse_response` throughput on GitHub-like response pages,
+- latency of the query methods of `DatabaseController` and of `MetricsController` (without the cache),
+- `insert_data_bulk` throughput of new and of already stored events. The inserted events belong to
+  `benchmark-*` repositories and are deleted afterwards, so the dataset stays the same.
+
+Results are printed as JSON together with the commit, the dataset size and the Postgres version, so runs
+on different commits can be compared with `benchmarks.compare`.
+
+Usage:
+    python -m benchmarks.suite [--repeat 10] [--only parse,query,insert] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import httpx
+import numpy as np
+import orjson
+from sqlalchemy import delete, func, select, text
+
+from benchmarks.dataset import (
+    benchmark_database_config,
+    generate_events,
+    repository_name,
+)
+from events_poller.controllers.database import DatabaseController
+from events_poller.controllers.metrics import MetricsController
+from events_poller.database.engine import Database
+from events_poller.database.models import ActorSketches, Events
+from events_poller.models.enum import (
+    EventTypeEnum,
+    HistogramBucketEnum,
+    MetricTypeEnum,
+)
+from events_poller.models.models import (
+    EventAvgTimeMetricRequest,
+    EventAvgTimeVisualizeRequest,
+    EventsHistogramRequest,
+    EventTimeDistributionRequest,
+    FreshnessRequest,
+    MetricsBatchRequest,
+    RepositoriesWithMultipleEventsRequest,
+    TopRepositoriesRequest,
+    TotalEventsMetricRequest,
+    UniqueActorsRequest,
+)
+from events_poller.poller.poller import GitHubApiPoller
+from events_poller.settings import GitHubApiConfig
+
+# Repositories of the events inserted by the insert benchmark, deleted afterwards
+INSERT_BENCHMARK_OWNER = "benchmark"
+
+
+def git_commit() -> str | None:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+def timings_summary(timings: list[float]) -> dict:
+    # Milliseconds
+    timings_ms = np.array(timings) * 1000
+    return {
+        "repeat": len(timings),
+        "median_ms": float(np.median(timings_ms)),
+        "p95_ms": float(np.percentile(timings_ms, 95)),
+        "min_ms": float(timings_ms.min()),
+        "mean_ms": float(timings_ms.mean()),
+        "stdev_ms": statistics.stdev(timings_ms) if len(timings) > 1 else 0.0,
+    }
+
+
+async def measure_async(func: Callable[[], Awaitable[Any]], repeat: int) -> dict:
+    # One warm-up call prepares the statements and fills the buffer cache
+    await func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    return timings_summary(timings)
+
+
+async def consume(stream: AsyncIterator[Any]) -> int:
+    count = 0
+    async for _ in stream:
+        count += 1
+    return count
+
+
+def github_response_page(events: list[dict]) -> httpx.Response:
+    return httpx.Response(httpx.codes.OK, content=orjson.dumps(events))
+
+
+def github_events(pages_count: int, page_size: int = 100) -> list[list[dict]]:
+    # GitHub-like pages with about half of the events of unsupported types, which are skipped by the parser
+    rng = np.random.default_rng(0)
+    pages = []
+    events = (
+        event
+        for batch in generate_events(pages_count * page_size, days=1, batch_size=100)
+        for event in batch
+    )
+    for _ in range(pages_count):
+        page = []
+        for event in (next(events) for _ in range(page_size)):
+            supported = rng.random() < 0.5
+            page.append(
+                {
+                    "id": str(event.event_id),
+                    "type": event.event_type if supported else "PushEvent",
+                    "actor": {
+                        "id": event.actor_id,
+                        "login": f"actor-{event.actor_id}",
+                        "url": f"https://api.github.com/users/actor-{event.actor_id}",
+                    },
+                    "repo": {
+                        "id": event.repository_id,
+                        "name": event.repository_name,
+                        "url": f"https://api.github.com/repos/{event.repository_name}",
+                    },
+                    "payload": (
+                        {"action": event.action}
+                        if supported
+                        else {"push_id": event.event_id, "ref": "refs/heads/main"}
+                    ),
+                    "public": True,
+                    "created_at": event.created_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                }
+            )
+        pages.append(page)
+    return pages
+
+
+def benchmark_parse_response(repeat: int, pages_count: int = 100) -> list[dict]:
+    poller = GitHubApiPoller(GitHubApiConfig(), asyncio.Queue())
+    responses = [github_response_page(page) for page in github_events(pages_count)]
+    parsed_count = sum(len(poller._parse_response(r)) for r in responses)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for response in responses:
+            poller._parse_response(response)
+        timings.append(time.perf_counter() - started)
+
+    summary = timings_summary(timings)
+    return [
+        {
+            "benchmark": "parse_response",
+            "case": f"{pages_count} pages of 100 events",
+            "parsed_events": parsed_count,
+            "events_per_s": pages_count * 100 / (summary["median_ms"] / 1000),
+            **summary,
+        }
+    ]
+
+
+def query_cases(
+    db_controller: DatabaseController,
+    metrics_controller: MetricsController,
+    top_repository: str,
+    now: datetime,
+) -> list[tuple[str, str, str, Callable[[], Awaitable[Any]]]]:
+    # (controller, method, case, call)
+    day_ago = now - timedelta(days=1)
+    week_ago = now - timedelta(days=7)
+    pr_event = EventTypeEnum.PR_EVENT
+    watch_event = EventTypeEnum.WATCH_EVENT
+    db = "DatabaseController"
+    metrics = "MetricsController"
+    return [
+        (
+            db,
+            "get_events_by_type",
+            "top repository",
+            lambda: db_controller.get_events_by_type(
+                pr_event, repository_name=top_repository
+            ),
+        ),
+        (
+            db,
+            "stream_events_created_at",
+            "all",
+            lambda: consume(db_controller.stream_events_created_at(pr_event)),
+        ),
+        (
+            db,
+            "stream_events_created_at_by_type",
+            "all types",
+            lambda: consume(
+                db_controller.stream_events_created_at_by_type(list(EventTypeEnum))
+            ),
+        ),
+        (
+            db,
+            "get_events_page",
+            "first 1000",
+            lambda: db_controller.get_events_page(limit=1000),
+        ),
+        (
+            db,
+            "get_events_page",
+            "1000 after a day ago",
+            lambda: db_controller.get_events_page(limit=1000, after=(day_ago, 0)),
+        ),
+        (
+            db,
+            "get_events_time_range",
+            "all",
+            lambda: db_controller.get_events_time_range(pr_event),
+        ),
+        (
+            db,
+            "get_events_time_range",
+            "top repository",
+            lambda: db_controller.get_events_time_range(
+                pr_event, repository_name=top_repository
+            ),
+        ),
+        (
+            db,
+            "get_events_grouped_by_type",
+            "last hour",
+            lambda: db_controller.get_events_grouped_by_type(offset=3600),
+        ),
+        (
+            db,
+            "get_events_grouped_by_type",
+            "last day",
+            lambda: db_controller.get_events_grouped_by_type(offset=86400),
+        ),
+        (
+            db,
+            "get_events_summary",
+            "last hour",
+            lambda: db_controller.get_events_summary(now - timedelta(hours=1)),
+        ),
+        (
+            db,
+            "get_events_histogram",
+            "hours of the last day",
+            lambda: db_controller.get_events_histogram(
+                HistogramBucketEnum.HOUR, day_ago, now
+            ),
+        ),
+        (
+            db,
+            "get_events_histogram",
+            "minutes of the last week",
+            lambda: db_controller.get_events_histogram(
+                HistogramBucketEnum.MINUTE, week_ago, now
+            ),
+        ),
+        (
+            db,
+            "get_time_gaps_distribution",
+            "all",
+            lambda: db_controller.get_time_gaps_distribution(pr_event),
+        ),
+        (
+            db,
+            "get_time_gaps_sketch",
+            "all",
+            lambda: db_controller.get_time_gaps_sketch(pr_event),
+        ),
+        (
+            db,
+            "get_ingest_lag",
+            "last hour",
+            lambda: db_controller.get_ingest_lag(window=3600),
+        ),
+        (
+            db,
+            "get_latest_inserted_at",
+            "all",
+            db_controller.get_latest_inserted_at,
+        ),
+        (
+            db,
+            "get_top_repositories",
+            "last hour",
+            lambda: db_controller.get_top_repositories(watch_event, offset=3600, k=10),
+        ),
+        (
+            db,
+            "get_top_repositories",
+            "last day",
+            lambda: db_controller.get_top_repositories(watch_event, offset=86400, k=10),
+        ),
+        (
+            db,
+            "get_actor_sketches",
+            "top repository, 7 days",
+            lambda: db_controller.get_actor_sketches(top_repository, week_ago),
+        ),
+        (
+            db,
+            "get_unique_actors_count",
+            "top repository, 7 days",
+            lambda: db_controller.get_unique_actors_count(top_repository, week_ago),
+        ),
+        (
+            db,
+            "get_repositories_grouped_by_event_type",
+            "first 100",
+            lambda: db_controller.get_repositories_grouped_by_event_type(
+                watch_event, minimal_events_count=2, limit=100
+            ),
+        ),
+        (
+            db,
+            "get_repositories_grouped_by_event_type",
+            "first 100 of the last hour",
+            lambda: db_controller.get_repositories_grouped_by_event_type(
+                watch_event,
+                minimal_events_count=2,
+                limit=100,
+                created_since=datetime.now(timezone.utc) - timedelta(hours=1),
+            ),
+        ),
+        (metrics, "get_watermark", "no cache", metrics_controller.get_watermark),
+        (
+            metrics,
+            "get_freshness",
+            "last hour",
+            lambda: metrics_controller.get_freshness(FreshnessRequest()),
+        ),
+        (
+            metrics,
+            "calculate_event_avg_time",
+            "all",
+            lambda: metrics_controller.calculate_event_avg_time(
+                EventAvgTimeMetricRequest()
+            ),
+        ),
+        (
+            metrics,
+            "calculate_event_time_distribution",
+            "exact",
+            lambda: metrics_controller.calculate_event_time_distribution(
+                EventTimeDistributionRequest()
+            ),
+        ),
+        (
+            metrics,
+            "calculate_event_time_distribution",
+            "approximate",
+            lambda: metrics_controller.calculate_event_time_distribution(
+                EventTimeDistributionRequest(approximate=True)
+            ),
+        ),
+        (
+            metrics,
+            "get_time_diff_per_event_type",
+            "all types",
+            lambda: metrics_controller.get_time_diff_per_event_type(
+                EventAvgTimeVisualizeRequest()
+            ),
+        ),
+        (
+            metrics,
+            "get_events_total_count",
+            "last hour",
+            lambda: metrics_controller.get_events_total_count(
+                TotalEventsMetricRequest(offset=3600)
+            ),
+        ),
+        (
+            metrics,
+            "get_repositories_with_multiple_events",
+            "first page",
+            lambda: metrics_controller.get_repositories_with_multiple_events(
+                RepositoriesWithMultipleEventsRequest(event_type=watch_event)
+            ),
+        ),
+        (
+            metrics,
+            "get_events_histogram",
+            "hours of the last day",
+            lambda: metrics_controller.get_events_histogram(EventsHistogramRequest()),
+        ),
+        (
+            metrics,
+            "get_top_repositories",
+            "exact, last hour",
+            lambda: metrics_controller.get_top_repositories(
+                TopRepositoriesRequest(event_type=watch_event, exact=True)
+            ),
+        ),
+        (
+            metrics,
+            "get_unique_actors",
+            "sketches, top repository",
+            lambda: metrics_controller.get_unique_actors(
+                UniqueActorsRequest(repository_name=top_repository)
+            ),
+        ),
+        (
+            metrics,
+            "get_unique_actors",
+            "exact, top repository",
+            lambda: metrics_controller.get_unique_actors(
+                UniqueActorsRequest(repository_name=top_repository, exact=True)
+            ),
+        ),
+        (
+            metrics,
+            "execute_batch",
+            "dashboard of 4 metrics",
+            lambda: metrics_controller.execute_batch(
+                MetricsBatchRequest.model_validate(
+                    {
+                        "requests": [
+                            {"metric": MetricTypeEnum.EVENT_AVG_TIME, "params": {}},
+                            {
+                                "metric": MetricTypeEnum.EVENTS_TOTAL_COUNT,
+                                "params": {"offset": 3600},
+                            },
+                            {"metric": MetricTypeEnum.EVENTS_HISTOGRAM, "params": {}},
+                            {
+                                "metric": MetricTypeEnum.UNIQUE_ACTORS,
+                                "params": {"repository_name": top_repository},
+                            },
+                        ]
+                    }
+                )
+            ),
+        ),
+    ]
+
+
+async def benchmark_queries(
+    db_controller: DatabaseController,
+    metrics_controller: MetricsController,
+    repeat: int,
+) -> list[dict]:
+    results = []
+    for controller, method, case, call in query_cases(
+        db_controller,
+        metrics_controller,
+        repository_name(0),
+        datetime.now(timezone.utc),
+    ):
+        results.append(
+            {
+                "benchmark": "query",
+                "controller": controller,
+                "method": method,
+                "case": case,
+                **await measure_async(call, repeat),
+            }
+        )
+    return results
+
+
+async def benchmark_insert(
+    database: Database,
+    db_controller: DatabaseController,
+    batches_count: int = 50,
+    batch_size: int = 1000,
+) -> list[dict]:
+    batches = list(
+        generate_events(
+            batches_count * batch_size,
+            seed=1,
+            days=1,
+            batch_size=batch_size,
+            owner=INSERT_BENCHMARK_OWNER,
+            event_id_start=2 * 10**15,
+        )
+    )
+
+    results = []
+    try:
+        # New events first, then the same events again, all skipped as already stored
+        for case in ("new events", "duplicate events"):
+            timings = []
+            for batch in batches:
+                started = time.perf_counter()
+                await db_controller.insert_data_bulk(batch)
+                timings.append(time.perf_counter() - started)
+            summary = timings_summary(timings)
+            results.append(
+                {
+                    "benchmark": "insert",
+                    "controller": "DatabaseController",
+                    "method": "insert_data_bulk",
+                    "case": f"{case}, batches of {batch_size}",
+                    "rows_per_s": batches_count * batch_size / sum(timings),
+                    **summary,
+                }
+            )
+    finally:
+        async with database.get_session(commit=True) as session:
+            await session.execute(
+                delete(Events).where(
+                    Events.repository_name.startswith(f"{INSERT_BENCHMARK_OWNER}-")
+                )
+            )
+            await session.execute(
+                delete(ActorSketches).where(
+                    ActorSketches.repository_name.startswith(
+                        f"{INSERT_BENCHMARK_OWNER}-"
+                    )
+                )
+            )
+    return results
+
+
+async def metadata(database: Database, repeat: int) -> dict:
+    async with database.get_session() as session:
+        events_count = await session.scalar(select(func.count()).select_from(Events))
+        postgres_version = await session.scalar(text("SHOW server_version"))
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "postgres": postgres_version,
+        "events_count": events_count,
+        "repeat": repeat,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument(
+        "--only",
+        type=lambda only: set(only.split(",")),
+        default={"parse", "query", "insert"},
+        help="Comma separated benchmarks to run: parse, query, insert",
+    )
+    parser.add_argument("--output", help="Write results as JSON to a file")
+    args = parser.parse_args()
+
+    database = Database(benchmark_database_config())
+    db_controller = DatabaseController(database)
+    # Neither the cache nor the live metrics, every call computes the metric
+    metrics_controller = MetricsController(db_controller)
+    try:
+        report = {"metadata": await metadata(database, args.repeat), "results": []}
+        if not report["metadata"]["events_count"]:
+            raise SystemExit(
+                "The benchmark database is empty, seed it with `python -m benchmarks.dataset` first"
+            )
+
+        if "parse" in args.only:
+            report["results"] += benchmark_parse_response(args.repeat)
+        if "query" in args.only:
+            report["results"] += await benchmark_queries(
+                db_controller, metrics_controller, args.repeat
+            )
+        # Last, the inserted events would move the watermark and the recent windows of the queries
+        if "insert" in args.only:
+            report["results"] += await benchmark_insert(database, db_controller)
+    finally:
+        await database.close_connection()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,28 +1,119 @@
+import asyncio
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse, RedirectResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from fastapi.responses import (
+    JSONResponse,
+    ORJSONResponse,
+    RedirectResponse,
+    Response,
+)
 
-from events_poller.api.endpoints import metrics, visualization
+from events_poller.api.compression import CompressionMiddleware
+from events_poller.api.endpoints import events, metrics, status, visualization
+from events_poller.api.http_cache import NotModifiedError
+from events_poller.api.profiling import ProfilingMiddleware
+from events_poller.controllers.cache import MetricsCache
 from events_poller.controllers.database import DatabaseController
-from events_poller.controllers.metrics import CalculationFailedError, MetricsController
+from events_poller.controllers.live import LiveMetrics
+from events_poller.controllers.streams import MetricsStreams
+from events_poller.controllers.visualize import VisualizeController
+from events_poller.controllers.export import (
+    ExportController,
+    ExportFormatNotAcceptableError,
+)
+from events_poller.controllers.metrics import (
+    CalculationFailedError,
+    InvalidCursorError,
+    InvalidTimeRangeError,
+    MetricsController,
+)
 from events_poller.database.engine import Database, DatabaseError
-from events_poller.settings import DatabaseConfig
+from events_poller.models.enum import ExportFormatEnum
+from events_poller.profiling import start_profiling_tasks
+from events_poller.prometheus import DatabasePoolCollector, monitor_event_loop_lag
+from events_poller.settings import (
+    ApiDatabasePoolConfig,
+    CacheConfig,
+    CompressionConfig,
+    DatabaseConfig,
+    ExportConfig,
+    LiveMetricsConfig,
+    MetricsBatchConfig,
+    MetricsStreamConfig,
+    ProfilingConfig,
+    PrometheusConfig,
+    VisualizationConfig,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Create one DB object for the whole app's lifespan
     # Close all the connections after shutdown
-    db = Database(DatabaseConfig())
+    db = Database(DatabaseConfig(pool_config=ApiDatabasePoolConfig()))
     db_controller = DatabaseController(db)
-    metrics_controller = MetricsController(db_controller)
 
+    cache_config = CacheConfig()
+    metrics_cache = (
+        MetricsCache(cache_config, db_controller.get_latest_inserted_at)
+        if cache_config.enabled
+        else None
+    )
+    live_metrics_config = LiveMetricsConfig()
+    live_metrics = (
+        LiveMetrics(db, db_controller, live_metrics_config)
+        if live_metrics_config.enabled
+        else None
+    )
+    metrics_controller = MetricsController(
+        db_controller,
+        metrics_cache,
+        live_metrics,
+        batch_concurrency=MetricsBatchConfig().concurrency,
+    )
+
+    app.state.database = db
+    app.state.metrics_cache = metrics_cache
     app.state.metrics_controller = metrics_controller
+    app.state.metrics_streams = MetricsStreams(
+        metrics_controller, MetricsStreamConfig()
+    )
+    app.state.export_controller = ExportController(db_controller, ExportConfig())
+    visualize_controller = VisualizeController(
+        metrics_controller, VisualizationConfig()
+    )
+    app.state.visualize_controller = visualize_controller
+
+    database_pool_collector = DatabasePoolCollector(db)
+    REGISTRY.register(database_pool_collector)
+
+    await db_controller.warm_up()
+    background_tasks = [asyncio.create_task(app.state.metrics_streams.run())]
+    if live_metrics:
+        background_tasks.append(asyncio.create_task(live_metrics.run()))
+    if metrics_cache and cache_config.refresh_interval > 0:
+        background_tasks.append(asyncio.create_task(metrics_cache.refresh_ahead()))
+    prometheus_config = PrometheusConfig()
+    if prometheus_config.enabled:
+        background_tasks.append(
+            asyncio.create_task(
+                monitor_event_loop_lag(prometheus_config.event_loop_lag_interval)
+            )
+        )
+
+    background_tasks += start_profiling_tasks(ProfilingConfig())
 
     try:
         yield
     finally:
+        for task in background_tasks:
+            task.cancel()
+        # Let the tasks finish their cleanup before the connections they use are closed
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        visualize_controller.close()
+        REGISTRY.unregister(database_pool_collector)
         await db.close_connection()
 
 
@@ -30,8 +121,17 @@ app = FastAPI(
     title="GitHub event poller API",
     description="API serving various metrics related to GitHub events with an option to visualize them.",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+compression_config = CompressionConfig()
+if compression_config.enabled:
+    app.add_middleware(CompressionMiddleware, compression_config=compression_config)
+
+profiling_config = ProfilingConfig()
+if profiling_config.request_profiling:
+    app.add_middleware(ProfilingMiddleware, profiling_config=profiling_config)
+
 
 @app.exception_handler(CalculationFailedError)
 async def calculation_failed_exception_handler(
@@ -48,6 +148,41 @@ async def calculation_failed_exception_handler(
     )
 
 
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_exception_handler(
+    request: Request, exc: InvalidCursorError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=400,
+        content={
+            "cursor": request.query_params.get("cursor"),
+            "error": "Invalid pagination cursor.",
+        },
+    )
+
+
+@app.exception_handler(InvalidTimeRangeError)
+async def invalid_time_range_exception_handler(
+    request: Request, exc: InvalidTimeRangeError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=400,
+        content={
+            "created_since": request.query_params.get("created_since"),
+            "created_until": request.query_params.get("created_until"),
+            "bucket": request.query_params.get("bucket"),
+            "error": "Invalid time range for the requested bucket size.",
+        },
+    )
+
+
+@app.exception_handler(NotModifiedError)
+async def not_modified_exception_handler(
+    request: Request, exc: NotModifiedError
+) -> Response:
+    return Response(status_code=304, headers=exc.headers)
+
+
 @app.exception_handler(DatabaseError)
 async def database_connection_exception_handler(
     request: Request, exc: DatabaseError
@@ -60,13 +195,35 @@ async def database_connection_exception_handler(
     )
 
 
+@app.exception_handler(ExportFormatNotAcceptableError)
+async def export_format_not_acceptable_exception_handler(
+    request: Request, exc: ExportFormatNotAcceptableError
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=406,
+        content={
+            "accept": request.headers.get("accept"),
+            "error": f"Supported export formats are: {', '.join(ExportFormatEnum)}.",
+        },
+    )
+
+
 # go to docs, when user doesn't specify exact path
 @app.get("/", include_in_schema=False)
 async def root(request: Request) -> RedirectResponse:
     return RedirectResponse(url=request.app.docs_url, status_code=308)
 
 
+if PrometheusConfig().enabled:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics() -> Response:
+        return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
 app.include_router(metrics.router, tags=["metrics"], prefix="/metrics")
 app.include_router(
     visualization.router, tags=["visualization"], prefix="/visualization"
 )
+app.include_router(events.router, tags=["events"], prefix="/events")
+app.include_router(status.router, tags=["status"], prefix="/status")
@@ -0,0 +1,79 @@
+import brotli
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from events_poller.settings import CompressionConfig
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # Streamed chunks are flushed, so clients receive them without waiting for the rest of the response
+        compressed = self._compressor.process(body)
+        if more_body:
+            return compressed + self._compressor.flush()
+        return compressed + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least `minimum_size` bytes with brotli or gzip, as negotiated by `Accept-Encoding`.
+
+    Brotli is preferred, when the client accepts both encodings with the same weight. Streaming responses
+    are compressed chunk by chunk, server-sent events are never compressed.
+    """
+
+    def __init__(self, app: ASGIApp, compression_config: CompressionConfig) -> None:
+        self.app = app
+        self._config = compression_config
+
+    @staticmethod
+    def _negotiate(accept_encoding: str) -> str | None:
+        weights = {}
+        for encoding in accept_encoding.split(","):
+            name, *params = [p.strip() for p in encoding.split(";")]
+            weight = 1.0
+            for param in params:
+                key, _, value = param.partition("=")
+                if key.strip() == "q":
+                    try:
+                        weight = float(value)
+                    except ValueError:
+                        weight = 0.0
+            weights[name.lower()] = weight
+
+        wildcard = weights.get("*", 0.0)
+        candidates = [
+            (weights.get(encoding, wildcard), -preference, encoding)
+            for preference, encoding in enumerate(("br", "gzip"))
+        ]
+        weight, _, encoding = max(candidates)
+        return encoding if weight > 0 else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        responder: ASGIApp
+        match self._negotiate(Headers(scope=scope).get("accept-encoding", "")):
+            case "br":
+                responder = BrotliResponder(
+                    self.app, self._config.minimum_size, self._config.brotli_quality
+                )
+            case "gzip":
+                responder = GZipResponder(
+                    self.app,
+                    self._config.minimum_size,
+                    compresslevel=self._config.gzip_level,
+                )
+            case _:
+                responder = IdentityResponder(self.app, self._config.minimum_size)
+
+        await responder(scope, receive, send)
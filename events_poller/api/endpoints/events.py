@@ -0,0 +1,21 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+
+from events_poller.controllers.export import ExportControllerDependency
+from events_poller.models.models import EventsExportRequest
+
+
+router = APIRouter()
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_events(
+    params: Annotated[EventsExportRequest, Depends()],
+    controller: ExportControllerDependency,
+    accept: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    export_format = controller.negotiate_format(accept)
+    return StreamingResponse(
+        controller.export(params, export_format), media_type=export_format
+    )
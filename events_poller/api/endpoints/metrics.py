@@ -1,22 +1,71 @@
+from collections.abc import Awaitable, Callable
 from typing import Annotated
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter, ValidationError
 
+from events_poller.api.http_cache import ConditionalResponse
+from events_poller.controllers.cache import served_value_age, served_value_watermark
 from events_poller.controllers.metrics import MetricsControllerDependency
+from events_poller.controllers.streams import MetricsStreamsDependency
+from events_poller.models.enum import MetricTypeEnum
 from events_poller.models.models import (
     EventAvgTimeMetricRequest,
     EventAvgTimeMetricResponse,
+    EventTimeDistributionRequest,
+    EventTimeDistributionResponse,
+    EventsHistogramRequest,
+    EventsHistogramResponse,
+    MetricsBatchItem,
+    MetricsBatchRequest,
+    MetricsBatchResponse,
     RepositoriesWithMultipleEventsRequest,
     RepositoriesWithMultipleEventsResponse,
+    TopRepositoriesRequest,
+    TopRepositoriesResponse,
     TotalEventsMetricRequest,
     TotalEventsMetricResponse,
+    UniqueActorsRequest,
+    UniqueActorsResponse,
 )
 
 
-router = APIRouter()
+class MetricsRoute(APIRoute):
+    # Attach the `Age` header to responses served from a cached snapshot of the metric. A snapshot computed at
+    # an older watermark (refreshed ahead or stale) is sent without the validators of the current watermark,
+    # a conditional request would otherwise keep the client on the older value.
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        route_handler = super().get_route_handler()
 
+        async def metrics_route_handler(request: Request) -> Response:
+            served_value_age.set(None)
+            response = await route_handler(request)
+            if (age := served_value_age.get()) is not None:
+                response.headers["Age"] = str(int(age))
+                if served_value_watermark.get() != getattr(
+                    request.state, "validators_watermark", None
+                ):
+                    del response.headers["ETag"]
+                    del response.headers["Last-Modified"]
+            return response
 
-@router.get("/event-avg-time", response_model=EventAvgTimeMetricResponse)
+        return metrics_route_handler
+
+
+router = APIRouter(route_class=MetricsRoute)
+
+metrics_batch_item_adapter: TypeAdapter[MetricsBatchItem] = TypeAdapter(
+    MetricsBatchItem
+)
+
+
+@router.get(
+    "/event-avg-time",
+    response_model=EventAvgTimeMetricResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=5))],
+)
 async def get_event_avg_time(
     params: Annotated[EventAvgTimeMetricRequest, Depends()],
     controller: MetricsControllerDependency,
@@ -24,7 +73,23 @@ async def get_event_avg_time(
     return await controller.calculate_event_avg_time(params)
 
 
-@router.get("/events-total-count", response_model=TotalEventsMetricResponse)
+@router.get(
+    "/event-time-distribution",
+    response_model=EventTimeDistributionResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=5))],
+)
+async def get_event_time_distribution(
+    params: Annotated[EventTimeDistributionRequest, Depends()],
+    controller: MetricsControllerDependency,
+) -> EventTimeDistributionResponse:
+    return await controller.calculate_event_time_distribution(params)
+
+
+@router.get(
+    "/events-total-count",
+    response_model=TotalEventsMetricResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=5, relative_to_now=True))],
+)
 async def get_events_total_count(
     params: Annotated[TotalEventsMetricRequest, Depends()],
     controller: MetricsControllerDependency,
@@ -33,10 +98,88 @@ async def get_events_total_count(
 
 
 @router.get(
-    "/multiple-events-repos", response_model=RepositoriesWithMultipleEventsResponse
+    "/multiple-events-repos",
+    response_model=RepositoriesWithMultipleEventsResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=5, relative_to_now=True))],
 )
 async def get_repositories_with_multiple_events(
     params: Annotated[RepositoriesWithMultipleEventsRequest, Depends()],
     controller: MetricsControllerDependency,
 ) -> RepositoriesWithMultipleEventsResponse:
     return await controller.get_repositories_with_multiple_events(params)
+
+
+@router.get(
+    "/top-repositories",
+    response_model=TopRepositoriesResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=5, relative_to_now=True))],
+)
+async def get_top_repositories(
+    params: Annotated[TopRepositoriesRequest, Depends()],
+    controller: MetricsControllerDependency,
+) -> TopRepositoriesResponse:
+    return await controller.get_top_repositories(params)
+
+
+@router.get(
+    "/unique-actors",
+    response_model=UniqueActorsResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=60, relative_to_now=True))],
+)
+async def get_unique_actors(
+    params: Annotated[UniqueActorsRequest, Depends()],
+    controller: MetricsControllerDependency,
+) -> UniqueActorsResponse:
+    return await controller.get_unique_actors(params)
+
+
+@router.get(
+    "/events-histogram",
+    response_model=EventsHistogramResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=30, relative_to_now=True))],
+)
+async def get_events_histogram(
+    params: Annotated[EventsHistogramRequest, Depends()],
+    controller: MetricsControllerDependency,
+) -> EventsHistogramResponse:
+    return await controller.get_events_histogram(params)
+
+
+@router.post("/batch", response_model=MetricsBatchResponse)
+async def execute_metrics_batch(
+    params: MetricsBatchRequest,
+    controller: MetricsControllerDependency,
+) -> MetricsBatchResponse:
+    return await controller.execute_batch(params)
+
+
+@router.get("/stream/{metric}", response_class=StreamingResponse)
+async def stream_metric(
+    metric: MetricTypeEnum,
+    request: Request,
+    streams: MetricsStreamsDependency,
+) -> StreamingResponse:
+    """
+    Server-sent events stream of a metric, pushed whenever its value changes.
+
+    Query parameters are the parameters of the corresponding `/metrics/{metric}` endpoint.
+    """
+    try:
+        item = metrics_batch_item_adapter.validate_python(
+            {"metric": metric, "params": dict(request.query_params)}
+        )
+    except ValidationError as e:
+        # Report the errors as errors of the query parameters
+        raise RequestValidationError(
+            [
+                {**error, "loc": ("query", *error["loc"][2:])}
+                for error in e.errors(include_url=False)
+            ]
+        ) from e
+
+    return StreamingResponse(
+        streams.subscribe(item),
+        media_type="text/event-stream",
+        # Keep reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,47 @@
+from typing import Annotated
+from fastapi import APIRouter, Depends, Request
+
+from events_poller.controllers.cache import MetricsCache
+from events_poller.controllers.metrics import MetricsControllerDependency
+from events_poller.database.engine import Database
+from events_poller.models.models import (
+    CacheStatsModel,
+    FreshnessRequest,
+    FreshnessResponse,
+    PoolStatusModel,
+)
+
+
+router = APIRouter()
+
+
+def get_database(request: Request) -> Database:
+    return request.app.state.database
+
+
+DatabaseDependency = Annotated[Database, Depends(get_database)]
+
+
+def get_metrics_cache(request: Request) -> MetricsCache | None:
+    return request.app.state.metrics_cache
+
+
+MetricsCacheDependency = Annotated[MetricsCache | None, Depends(get_metrics_cache)]
+
+
+@router.get("/database-pool", response_model=PoolStatusModel)
+async def get_database_pool_status(database: DatabaseDependency) -> PoolStatusModel:
+    return database.pool_status()
+
+
+@router.get("/cache", response_model=CacheStatsModel | None)
+async def get_cache_stats(cache: MetricsCacheDependency) -> CacheStatsModel | None:
+    return cache.stats() if cache else None
+
+
+@router.get("/freshness", response_model=FreshnessResponse)
+async def get_freshness(
+    params: Annotated[FreshnessRequest, Depends()],
+    controller: MetricsControllerDependency,
+) -> FreshnessResponse:
+    return await controller.get_freshness(params)
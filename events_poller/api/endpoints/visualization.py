@@ -1,33 +1,78 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from fastapi.responses import HTMLResponse
 
+from events_poller.api.endpoints.metrics import MetricsRoute
+from events_poller.api.http_cache import ConditionalResponse
 from events_poller.controllers.visualize import VisualizeControllerDependency
-from events_poller.models.enum import GraphTypeEnum
+from events_poller.models.enum import FigureFormatEnum, GraphTypeEnum
 from events_poller.models.models import (
     EventAvgTimeVisualizeRequest,
     TotalEventsMetricRequest,
 )
 
 
-router = APIRouter()
+# Figures are cached too, and so carry the `Age` header and lose outdated validators the same way
+router = APIRouter(route_class=MetricsRoute)
 
 
-@router.get("/event-avg-time", response_class=HTMLResponse)
+@router.get(
+    "/event-avg-time",
+    response_class=HTMLResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=30))],
+)
 async def get_event_avg_time(
     params: Annotated[EventAvgTimeVisualizeRequest, Depends()],
     controller: VisualizeControllerDependency,
-) -> HTMLResponse:
-    fig = await controller.get_graph(params=params, graph_type=GraphTypeEnum.AVG_TIME)
-    return HTMLResponse(fig.to_html(full_html=True, include_plotlyjs="cdn"))
+) -> str:
+    return await controller.render(
+        params, GraphTypeEnum.AVG_TIME, FigureFormatEnum.HTML
+    )
+
+
+@router.get(
+    "/event-avg-time/figure",
+    response_class=Response,
+    responses={200: {"content": {"application/json": {}}}},
+    dependencies=[Depends(ConditionalResponse(max_age=30))],
+)
+async def get_event_avg_time_figure(
+    params: Annotated[EventAvgTimeVisualizeRequest, Depends()],
+    controller: VisualizeControllerDependency,
+) -> Response:
+    # Plotly figure JSON, to be rendered client-side with `Plotly.newPlot`
+    figure = await controller.render(
+        params, GraphTypeEnum.AVG_TIME, FigureFormatEnum.JSON
+    )
+    return Response(figure, media_type="application/json")
 
 
-@router.get("/events-total-count", response_class=HTMLResponse)
+@router.get(
+    "/events-total-count",
+    response_class=HTMLResponse,
+    dependencies=[Depends(ConditionalResponse(max_age=30, relative_to_now=True))],
+)
 async def get_events_total_count(
     params: Annotated[TotalEventsMetricRequest, Depends()],
     controller: VisualizeControllerDependency,
-) -> HTMLResponse:
-    fig = await controller.get_graph(
-        params=params, graph_type=GraphTypeEnum.TOTAL_COUNT
+) -> str:
+    return await controller.render(
+        params, GraphTypeEnum.TOTAL_COUNT, FigureFormatEnum.HTML
+    )
+
+
+@router.get(
+    "/events-total-count/figure",
+    response_class=Response,
+    responses={200: {"content": {"application/json": {}}}},
+    dependencies=[Depends(ConditionalResponse(max_age=30, relative_to_now=True))],
+)
+async def get_events_total_count_figure(
+    params: Annotated[TotalEventsMetricRequest, Depends()],
+    controller: VisualizeControllerDependency,
+) -> Response:
+    # Plotly figure JSON, to be rendered client-side with `Plotly.newPlot`
+    figure = await controller.render(
+        params, GraphTypeEnum.TOTAL_COUNT, FigureFormatEnum.JSON
     )
-    return HTMLResponse(fig.to_html(full_html=True, include_plotlyjs="cdn"))
+    return Response(figure, media_type="application/json")
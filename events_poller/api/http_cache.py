@@ -0,0 +1,97 @@
+import hashlib
+import time
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+from events_poller.controllers.metrics import MetricsControllerDependency
+
+
+class NotModifiedError(Exception):
+    def __init__(self, headers: dict[str, str]) -> None:
+        super().__init__()
+        self.headers = headers
+
+
+class ConditionalResponse:
+    """
+    Dependency adding HTTP cache validators to GET endpoints and answering conditional requests with 304.
+
+    The `ETag` is derived from the path, the query parameters and the data watermark (latest `inserted_at`),
+    so it's known before the response is computed. A request whose `If-None-Match` (or `If-Modified-Since`)
+    still matches raises `NotModifiedError` before the endpoint runs.
+
+    Responses of endpoints counting events relative to the current time (`relative_to_now`) change even
+    when no event is inserted. Their `ETag` also includes the current `max_age` long time window and they
+    carry no `Last-Modified`.
+
+    The watermark is kept in `request.state.validators_watermark`, so the validators can be dropped from a
+    response served from a snapshot computed at an older watermark.
+
+    The `ETag` is weak, as the same representation may be sent with different content encodings.
+    """
+
+    def __init__(self, max_age: int, relative_to_now: bool = False) -> None:
+        self._max_age = max_age
+        self._relative_to_now = relative_to_now
+
+    @staticmethod
+    def _matches(if_none_match: str, etag: str) -> bool:
+        # Weak comparison, the `W/` prefix is ignored
+        if if_none_match.strip() == "*":
+            return True
+        return any(
+            candidate.strip().removeprefix("W/") == etag.removeprefix("W/")
+            for candidate in if_none_match.split(",")
+        )
+
+    @staticmethod
+    def _not_modified_since(if_modified_since: str, last_modified: str) -> bool:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(
+                if_modified_since
+            )
+        except (TypeError, ValueError):
+            return False
+
+    async def __call__(
+        self,
+        request: Request,
+        response: Response,
+        metrics_controller: MetricsControllerDependency,
+    ) -> None:
+        watermark = await metrics_controller.get_watermark()
+        request.state.validators_watermark = watermark
+
+        validator = [
+            request.url.path,
+            str(sorted(request.query_params.multi_items())),
+            watermark.isoformat() if watermark else "",
+        ]
+        if self._relative_to_now:
+            validator.append(str(int(time.time() // self._max_age)))
+        digest = hashlib.blake2b("\n".join(validator).encode(), digest_size=16)
+
+        headers = {
+            "ETag": f'W/"{digest.hexdigest()}"',
+            "Cache-Control": f"public, max-age={self._max_age}",
+        }
+        if watermark and not self._relative_to_now:
+            headers["Last-Modified"] = format_datetime(
+                watermark.astimezone(timezone.utc), usegmt=True
+            )
+
+        # `If-Modified-Since` is only evaluated without `If-None-Match` (RFC 9110, 13.1.3)
+        if if_none_match := request.headers.get("if-none-match"):
+            not_modified = self._matches(if_none_match, headers["ETag"])
+        elif (if_modified_since := request.headers.get("if-modified-since")) and (
+            last_modified := headers.get("Last-Modified")
+        ):
+            not_modified = self._not_modified_since(if_modified_since, last_modified)
+        else:
+            not_modified = False
+
+        if not_modified:
+            raise NotModifiedError(headers)
+        response.headers.update(headers)
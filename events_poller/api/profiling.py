@@ -0,0 +1,66 @@
+import asyncio
+import cProfile
+import io
+import pstats
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from events_poller.settings import ProfilingConfig
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request with cProfile when it has `profile=1` in the query or the `X-Profile: 1` header.
+
+    The endpoint runs as usual, but its response is replaced by the plain text cProfile report. The original
+    status code is sent in the `X-Profiled-Status` header. Profiled requests run one at a time, as only one
+    profiler can be active. Code of other requests running concurrently on the event loop shows up in the
+    report too, profile on an otherwise idle instance.
+
+    The middleware is only installed when `PROFILING_REQUEST_PROFILING` is enabled.
+    """
+
+    def __init__(self, app: ASGIApp, profiling_config: ProfilingConfig) -> None:
+        self.app = app
+        self._config = profiling_config
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _requested(scope: Scope) -> bool:
+        query = parse_qs(scope.get("query_string", b"").decode())
+        return (
+            query.get("profile", [""])[-1] in ("1", "true")
+            or Headers(scope=scope).get("x-profile") == "1"
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+
+        async def discard_response(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        async with self._lock:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, discard_response)
+            finally:
+                profiler.disable()
+
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats(
+            self._config.request_profile_sort
+        ).print_stats(self._config.request_profile_limit)
+        response = PlainTextResponse(
+            report.getvalue(), headers={"X-Profiled-Status": str(status_code)}
+        )
+        await response(scope, receive, send)
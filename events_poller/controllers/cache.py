@@ -0,0 +1,265 @@
+import asyncio
+import functools
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+from events_poller.logger import logger
+from events_poller.models.models import CacheStatsModel
+from events_poller.settings import CacheConfig
+
+
+# Age in seconds of the cached value served to the current request, None when nothing was served from the cache
+served_value_age: ContextVar[float | None] = ContextVar(
+    "served_value_age", default=None
+)
+# Set by callers which need a value of the current watermark, e.g. stream producers pushing updates when it
+# moves. Refreshed-ahead snapshots and stale entries aren't served to them.
+current_values_only: ContextVar[bool] = ContextVar("current_values_only", default=False)
+# Data watermark the cached value served to the current request was computed at
+served_value_watermark: ContextVar[datetime | None] = ContextVar(
+    "served_value_watermark", default=None
+)
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    watermark: datetime | None
+    stored_at: float
+
+
+class MetricsCache:
+    """
+    In-process cache of computed metrics.
+
+    - Entries expire after `ttl` seconds and the least recently used ones are evicted above `max_entries`.
+    - Entries are invalidated as soon as the data watermark (latest `inserted_at`) moves. The watermark
+      is re-read at most once per `watermark_interval` seconds, so checking it stays cheap.
+    - Concurrent misses of the same key share one computation (single-flight). While it runs,
+      other callers are served the invalidated entry, if it isn't older than `max_stale` seconds.
+    - Refresh-ahead: `refresh_ahead` periodically recomputes the most requested entries in the background.
+      Those are served from the latest snapshot until it's older than `refresh_max_age`, so hot requests
+      never wait for a computation. Callers setting `current_values_only` get neither those snapshots nor
+      stale entries.
+
+    Methods:
+        - get_watermark: Returns the current data watermark.
+        - get_or_compute: Returns the cached value of a key or computes it.
+        - refresh_ahead: Long-running task recomputing the most requested entries.
+        - stats: Returns cache statistics.
+    """
+
+    def __init__(
+        self,
+        cache_config: CacheConfig,
+        get_watermark: Callable[[], Awaitable[datetime | None]],
+    ) -> None:
+        self._config = cache_config
+        self._get_watermark = get_watermark
+
+        self._entries: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+        self._in_flight: dict[Hashable, asyncio.Task[_CacheEntry]] = {}
+
+        # Request counts (halved on every refresh) and computations of recently requested keys
+        self._requests: Counter[Hashable] = Counter()
+        self._computations: dict[Hashable, Callable[[], Awaitable[Any]]] = {}
+        self._refreshed: set[Hashable] = set()
+
+        self._watermark: datetime | None = None
+        self._watermark_checked_at = float("-inf")
+        self._watermark_lock = asyncio.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._stale_served = 0
+        self._invalidations = 0
+        self._evictions = 0
+        self._refreshes = 0
+        self._refresh_failures = 0
+
+    async def get_watermark(self) -> datetime | None:
+        # Latest `inserted_at` of stored events, re-read from the database at most once per interval
+        async with self._watermark_lock:
+            if (
+                time.monotonic() - self._watermark_checked_at
+                >= self._config.watermark_interval
+            ):
+                watermark = await self._get_watermark()
+                if watermark != self._watermark:
+                    logger.info(
+                        "metrics_cache.watermark_changed",
+                        watermark=watermark,
+                        previous_watermark=self._watermark,
+                    )
+                self._watermark = watermark
+                self._watermark_checked_at = time.monotonic()
+            return self._watermark
+
+    def _is_valid(self, entry: _CacheEntry, watermark: datetime | None) -> bool:
+        return (
+            entry.watermark == watermark
+            and time.monotonic() - entry.stored_at < self._config.ttl
+        )
+
+    def _is_refreshed(self, key: Hashable, entry: _CacheEntry) -> bool:
+        return (
+            key in self._refreshed
+            and time.monotonic() - entry.stored_at <= self._config.refresh_max_age
+        )
+
+    def _serve(self, entry: _CacheEntry) -> Any:
+        served_value_age.set(time.monotonic() - entry.stored_at)
+        served_value_watermark.set(entry.watermark)
+        return entry.value
+
+    def _store(
+        self, key: Hashable, value: Any, watermark: datetime | None
+    ) -> _CacheEntry:
+        entry = self._entries[key] = _CacheEntry(
+            value=value,
+            watermark=watermark,
+            stored_at=time.monotonic(),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._config.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+        return entry
+
+    async def _compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        watermark: datetime | None,
+    ) -> _CacheEntry:
+        try:
+            return self._store(key, await compute(), watermark)
+        finally:
+            del self._in_flight[key]
+
+    async def get_or_compute(
+        self, key: Hashable, compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        if self._config.refresh_interval > 0:
+            # Only decayed by the refreshes, so tracked only when they run
+            self._requests[key] += 1
+            self._computations[key] = compute
+
+        watermark = await self.get_watermark()
+
+        entry = self._entries.get(key)
+        current_only = current_values_only.get()
+        if entry and (
+            self._is_valid(entry, watermark)
+            or (not current_only and self._is_refreshed(key, entry))
+        ):
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return self._serve(entry)
+
+        self._misses += 1
+        if entry:
+            self._invalidations += 1
+
+        if task := self._in_flight.get(key):
+            if (
+                entry
+                and not current_only
+                and time.monotonic() - entry.stored_at <= self._config.max_stale
+            ):
+                self._stale_served += 1
+                return self._serve(entry)
+        else:
+            task = asyncio.create_task(self._compute(key, compute, watermark))
+            self._in_flight[key] = task
+
+        # Shielded, so a cancelled request doesn't cancel the computation shared with other requests
+        entry = await asyncio.shield(task)
+        served_value_age.set(0.0)
+        served_value_watermark.set(entry.watermark)
+        return entry.value
+
+    async def _refresh(self) -> None:
+        # Pick the most requested keys and decay the counts, so the selection follows current traffic
+        hot_keys = [
+            key for key, _ in self._requests.most_common(self._config.refresh_keys)
+        ]
+        # Taken before the decay, which drops keys requested only once
+        computations = {key: self._computations[key] for key in hot_keys}
+        for key in list(self._requests):
+            self._requests[key] //= 2
+            if not self._requests[key]:
+                del self._requests[key]
+                self._computations.pop(key, None)
+
+        watermark = await self.get_watermark()
+        tasks = []
+        for key in hot_keys:
+            if not (task := self._in_flight.get(key)):
+                task = asyncio.create_task(
+                    self._compute(key, computations[key], watermark)
+                )
+                self._in_flight[key] = task
+            tasks.append(task)
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for key, result in zip(hot_keys, results):
+            if isinstance(result, Exception):
+                self._refresh_failures += 1
+                logger.warning(
+                    "metrics_cache.refresh.failed", key=key, error=str(result)
+                )
+            else:
+                self._refreshes += 1
+
+        # Snapshots of keys which failed to refresh are still served, until they exceed `refresh_max_age`
+        self._refreshed = set(hot_keys)
+
+    async def refresh_ahead(self) -> None:
+        while True:
+            await asyncio.sleep(self._config.refresh_interval)
+            try:
+                await self._refresh()
+            except Exception as e:
+                logger.exception("metrics_cache.refresh.error", error=str(e))
+
+    def stats(self) -> CacheStatsModel:
+        requests = self._hits + self._misses
+        return CacheStatsModel(
+            entries=len(self._entries),
+            in_flight=len(self._in_flight),
+            hits=self._hits,
+            misses=self._misses,
+            hit_rate=self._hits / requests if requests else 0.0,
+            stale_served=self._stale_served,
+            invalidations=self._invalidations,
+            evictions=self._evictions,
+            refreshed_entries=len(self._refreshed),
+            refreshes=self._refreshes,
+            refresh_failures=self._refresh_failures,
+            watermark=self._watermark,
+        )
+
+
+def cached_metric[R](
+    method: Callable[[Any, BaseModel], Awaitable[R]],
+) -> Callable[[Any, BaseModel], Awaitable[R]]:
+    # Serve a controller method from `self._cache`, keyed by the method and its normalised request model
+    @functools.wraps(method)
+    async def wrapper(self: Any, params: BaseModel) -> R:
+        if not self._cache:
+            return await method(self, params)
+
+        return await self._cache.get_or_compute(
+            (method.__name__, params.model_dump_json()),
+            lambda: method(self, params),
+        )
+
+    return wrapper
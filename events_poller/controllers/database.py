@@ -1,12 +1,35 @@
-from collections.abc import Sequence
+import itertools
+import json
+import math
+from collections.abc import AsyncIterator, Sequence
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy.sql.expression import func, select
-from sqlalchemy.dialects.postgresql import insert
+import numpy as np
+from sqlalchemy import JSON, DateTime, Float, String
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import (
+    ColumnElement,
+    Select,
+    Subquery,
+    case,
+    cast,
+    func,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, INTERVAL, array, insert
 from events_poller.database.engine import Database
-from events_poller.database.models import Events
+from events_poller.controllers.sketches import HyperLogLog
+from events_poller.database.models import ActorSketches, Events
 from events_poller.logger import logger
-from events_poller.models.enum import EventTypeEnum
+from events_poller.models.enum import (
+    EventTypeEnum,
+    HistogramBucketEnum,
+    SortOrderEnum,
+)
 from events_poller.models.models import EventModel
 
 
@@ -21,50 +44,221 @@ class DatabaseController:
     Methods:
         - insert_data: Insert a single event into the database.
         - insert_data_bulk: Insert multiple events in one operation.
+          Actors of inserted events are added to per-day HyperLogLog sketches.
+          When `notify_channel` is set, summaries of inserted events are published via Postgres NOTIFY.
+        - insert_new_events: Insert multiple events and return ids of those which weren't stored yet.
         - get_events_by_type: Retrieve events of a specific type with optional filters.
-        - get_events_grouped_by_type: Return a count of events grouped by event type.
-        - get_oldest_event: Retrieve the oldest event from the past X seconds.
-        - get_repositories_grouped_by_event_type: Return repositories with a given event type
-          occurring more than a threshold number of times.
+        - stream_events_created_at: Stream creation times of events of a specific type in sorted chunks.
+        - stream_events_created_at_by_type: Stream creation times of events of multiple types in one query.
+        - get_events_page: Retrieve one keyset-paginated page of events with optional filters.
+        - get_events_time_range: Return the oldest and newest event time and the events count
+          of a specific type with optional filters.
+        - get_events_grouped_by_type: Return a count and the oldest event time of events grouped by event type.
+        - get_events_summary: Return event counts aggregated per second, type, repository and action.
+        - get_events_histogram: Return zero-filled event counts per time bucket and event type.
+        - get_time_gaps_distribution: Return exact statistics and quantiles of times between adjacent events.
+        - get_time_gaps_sketch: Return times between adjacent events aggregated into logarithmic buckets.
+        - get_latest_inserted_at: Return the insertion time of the most recently stored event.
+        - get_ingest_lag: Return quantiles of the delay between creation on GitHub and insertion of recent events.
+        - get_actor_sketches: Return serialized HyperLogLog sketches of actors of a repository since a day.
+        - get_unique_actors_count: Return the exact number of distinct actors of a repository.
+        - get_top_repositories: Return `k` repositories with the most events of a given type within an offset.
+        - get_repositories_grouped_by_event_type: Return a keyset-paginated page of repositories with a given
+          event type occurring more than a threshold number of times.
+        - warm_up: Open pooled connections and prepare the statements behind the hot API requests.
     """
 
-    def __init__(self, database: Database) -> None:
+    # Leaves room for the notification envelope within the Postgres limit of 8000 bytes
+    _notify_payload_limit = 7000
+
+    def __init__(self, database: Database, notify_channel: str | None = None) -> None:
         self._database = database
+        self._notify_channel = notify_channel
 
-    async def insert_data(self, data: EventModel) -> None:
-        statement = insert(Events).values(data.model_dump())
+    async def warm_up(self) -> None:
+        # Only SQL text matters for the prepared statement cache,
+        # so the smallest possible time window keeps the warm-up queries cheap.
+        await self._database.warm_up(
+            [
+                self._events_time_range_statement(EventTypeEnum.PR_EVENT),
+                self._events_grouped_by_type_statement(offset=1),
+            ]
+        )
 
-        # There is a possibility that poller fetches the same events during multiple iterations. In such case data are skipped
-        statement = statement.on_conflict_do_nothing(index_elements=["event_id"])
-        async with self._database.get_session(commit=True) as session:
-            await session.execute(statement)
-            logger.info("database_controller.insert_data.successful")
+    async def _notify_inserted(
+        self, session: AsyncSession, inserted: Sequence[Row]
+    ) -> None:
+        # Publish compact summaries of inserted events, aggregated per second, type, repository and action.
+        # Notifications are delivered on commit, so listeners never see rolled back events.
+        summaries: dict[tuple[int, str, str, str], list] = {}
+        for row in inserted:
+            created_at = row.created_at.timestamp()
+            key = (int(created_at), row.event_type, row.repository_name, row.action)
+            if summary := summaries.get(key):
+                summary[0] = min(summary[0], created_at)
+                summary[4] += 1
+            else:
+                summaries[key] = [created_at, *key[1:], 1]
 
-    async def insert_data_bulk(self, data_bulk: list[EventModel]) -> int:
+        # Postgres limits a notification payload to 8000 bytes
+        chunks = [[]]
+        chunk_size = 0
+        for summary in summaries.values():
+            summary_size = len(json.dumps(summary))
+            if chunk_size + summary_size > self._notify_payload_limit:
+                chunks.append([])
+                chunk_size = 0
+            chunks[-1].append(summary)
+            chunk_size += summary_size
+
+        for chunk in chunks:
+            await session.execute(
+                select(
+                    func.pg_notify(
+                        self._notify_channel,
+                        func.json_build_object(
+                            "txid",
+                            cast(func.pg_current_xact_id(), String),
+                            "events",
+                            cast(literal(chunk, JSON), JSON),
+                        ).cast(String),
+                    )
+                )
+            )
+
+    async def _update_actor_sketches(
+        self, session: AsyncSession, inserted: Sequence[Row]
+    ) -> None:
+        # Add actors of inserted events to the HyperLogLog sketches of their repository, event type and UTC day
+        actors: dict[tuple[str, EventTypeEnum, datetime], list[int]] = {}
+        for row in inserted:
+            bucket_start = row.created_at.astimezone(timezone.utc).replace(
+                hour=0, minute=0, second=0, microsecond=0
+            )
+            actors.setdefault(
+                (row.repository_name, row.event_type, bucket_start), []
+            ).append(row.actor_id)
+        keys = sorted(actors)
+
+        # Create missing sketches first, so all of them can be locked and concurrent inserts merge their
+        # actors instead of overwriting each other. Keys are always locked in the same order.
+        await session.execute(
+            insert(ActorSketches)
+            .values(
+                [
+                    {
+                        "repository_name": repository_name,
+                        "event_type": event_type,
+                        "bucket_start": bucket_start,
+                        "registers": b"",
+                    }
+                    for repository_name, event_type, bucket_start in keys
+                ]
+            )
+            .on_conflict_do_nothing()
+        )
+        sketches = await session.execute(
+            select(
+                ActorSketches.repository_name,
+                ActorSketches.event_type,
+                ActorSketches.bucket_start,
+                ActorSketches.registers,
+            )
+            .where(
+                tuple_(
+                    ActorSketches.repository_name,
+                    ActorSketches.event_type,
+                    ActorSketches.bucket_start,
+                ).in_(keys)
+            )
+            .order_by(
+                ActorSketches.repository_name,
+                ActorSketches.event_type,
+                ActorSketches.bucket_start,
+            )
+            .with_for_update()
+        )
+
+        updates = []
+        for repository_name, event_type, bucket_start, registers in sketches:
+            sketch = HyperLogLog.from_bytes(registers)
+            for actor_id in actors[(repository_name, event_type, bucket_start)]:
+                sketch.add(actor_id)
+            updates.append(
+                {
+                    "repository_name": repository_name,
+                    "event_type": event_type,
+                    "bucket_start": bucket_start,
+                    "registers": sketch.to_bytes(),
+                }
+            )
+        await session.execute(update(ActorSketches), updates)
+
+    async def _insert(self, data_bulk: list[EventModel]) -> Sequence[Row]:
         statement = insert(Events).values([data.model_dump() for data in data_bulk])
 
         # There is a possibility that poller fetches the same events during multiple iterations. In such case data are skipped
         statement = statement.on_conflict_do_nothing(
             index_elements=[Events.event_id]
-        ).returning(Events.event_id)
+        ).returning(
+            Events.event_id,
+            Events.event_type,
+            Events.actor_id,
+            Events.repository_name,
+            Events.action,
+            Events.created_at,
+        )
         async with self._database.get_session(commit=True) as session:
-            ret = await session.execute(statement)
-            logger.info("database_controller.insert_data_bulk.successful")
+            inserted = (await session.execute(statement)).all()
+            if inserted:
+                await self._update_actor_sketches(session, inserted)
+            if inserted and self._notify_channel:
+                await self._notify_inserted(session, inserted)
 
-        return len(ret.fetchall())
+        return inserted
 
-    async def get_events_by_type(
-        self,
-        event_type: EventTypeEnum,
+    async def insert_data(self, data: EventModel) -> None:
+        await self._insert([data])
+        logger.info("database_controller.insert_data.successful")
+
+    async def insert_data_bulk(self, data_bulk: list[EventModel]) -> int:
+        inserted_count = len(await self._insert(data_bulk))
+        logger.info("database_controller.insert_data_bulk.successful")
+        return inserted_count
+
+    async def insert_new_events(self, data_bulk: list[EventModel]) -> set[int]:
+        # Same as `insert_data_bulk`, returns ids of the events which weren't stored yet
+        inserted = await self._insert(data_bulk)
+        logger.info(
+            "database_controller.insert_new_events.successful",
+            inserted_count=len(inserted),
+        )
+        return {row.event_id for row in inserted}
+
+    @staticmethod
+    def _events_by_type_filters(
+        event_type: EventTypeEnum | Sequence[EventTypeEnum],
         repository_name: str | None = None,
         action: str | None = None,
-    ) -> Sequence[Events]:
-        filters = [Events.event_type == event_type]
+    ) -> list[ColumnElement[bool]]:
+        filters = [
+            Events.event_type == event_type
+            if isinstance(event_type, EventTypeEnum)
+            else Events.event_type.in_(event_type)
+        ]
         if repository_name:
             filters.append(Events.repository_name == repository_name)
         if action:
             filters.append(Events.action == action.lower())
+        return filters
 
+    async def get_events_by_type(
+        self,
+        event_type: EventTypeEnum,
+        repository_name: str | None = None,
+        action: str | None = None,
+    ) -> Sequence[Events]:
+        filters = self._events_by_type_filters(event_type, repository_name, action)
         statement = select(Events).where(*filters)
         async with self._database.get_session(commit=False) as session:
             data = (await session.execute(statement)).scalars().all()
@@ -78,12 +272,176 @@ class DatabaseController:
 
         return data
 
-    async def get_events_grouped_by_type(
+    async def stream_events_created_at(
         self,
+        event_type: EventTypeEnum,
+        repository_name: str | None = None,
+        action: str | None = None,
+        chunk_size: int = 10000,
+    ) -> AsyncIterator[np.ndarray]:
+        # Server-side cursor over the single needed column, only one chunk is held in memory at a time.
+        # Chunks are sorted by `created_at` and contain POSIX timestamps in seconds, converted by Postgres,
+        # so no datetime is built and converted per row on the event loop.
+        filters = self._events_by_type_filters(event_type, repository_name, action)
+        statement = (
+            select(cast(func.extract("epoch", Events.created_at), Float))
+            .where(*filters)
+            .order_by(Events.created_at)
+            .execution_options(yield_per=chunk_size)
+        )
+        events_count = 0
+        async with self._database.get_session() as session:
+            result = await session.stream(statement)
+            async for partition in result.partitions():
+                events_count += len(partition)
+                yield np.fromiter(
+                    (row[0] for row in partition),
+                    dtype=np.float64,
+                    count=len(partition),
+                )
+
+            logger.info(
+                "database_controller.stream_events_created_at.successful",
+                data_count=events_count,
+                event_type=event_type,
+                repository_name=repository_name,
+                action=action,
+            )
+
+    async def stream_events_created_at_by_type(
+        self,
+        event_types: Sequence[EventTypeEnum],
+        repository_name: str | None = None,
+        action: str | None = None,
+        chunk_size: int = 10000,
+    ) -> AsyncIterator[tuple[EventTypeEnum, np.ndarray]]:
+        # One query for all the event types, ordered by (`event_type`, `created_at`) to follow the index.
+        # Yields (event type, POSIX timestamps) chunks, all chunks of one event type come in a row, sorted.
+        filters = self._events_by_type_filters(event_types, repository_name, action)
+        statement = (
+            select(
+                Events.event_type,
+                cast(func.extract("epoch", Events.created_at), Float),
+            )
+            .where(*filters)
+            .order_by(Events.event_type, Events.created_at)
+            .execution_options(yield_per=chunk_size)
+        )
+        events_count = 0
+        async with self._database.get_session() as session:
+            result = await session.stream(statement)
+            async for partition in result.partitions():
+                events_count += len(partition)
+                for event_type, rows in itertools.groupby(
+                    partition, key=lambda row: row[0]
+                ):
+                    yield (
+                        event_type,
+                        np.fromiter((row[1] for row in rows), np.float64),
+                    )
+
+            logger.info(
+                "database_controller.stream_events_created_at_by_type.successful",
+                data_count=events_count,
+                event_types=event_types,
+                repository_name=repository_name,
+                action=action,
+            )
+
+    async def get_events_page(
+        self,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+        event_type: EventTypeEnum | None = None,
+        repository_name: str | None = None,
+        action: str | None = None,
+        created_since: datetime | None = None,
+        created_until: datetime | None = None,
+    ) -> Sequence[Row]:
+        # Keyset pagination on (created_at, event_id), `after` is the key of the last row of the previous page
+        filters = []
+        if event_type:
+            filters.append(Events.event_type == event_type)
+        if repository_name:
+            filters.append(Events.repository_name == repository_name)
+        if action:
+            filters.append(Events.action == action.lower())
+        if created_since:
+            filters.append(Events.created_at >= created_since)
+        if created_until:
+            filters.append(Events.created_at < created_until)
+        if after:
+            filters.append(tuple_(Events.created_at, Events.event_id) > tuple_(*after))
+
+        statement = (
+            select(
+                Events.event_id,
+                Events.event_type,
+                Events.actor_id,
+                Events.repository_id,
+                Events.repository_name,
+                Events.created_at,
+                Events.action,
+            )
+            .where(*filters)
+            .order_by(Events.created_at, Events.event_id)
+            .limit(limit)
+        )
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).all()
+            logger.info(
+                "database_controller.get_events_page.successful",
+                data_count=len(res),
+                after=after,
+                event_type=event_type,
+                repository_name=repository_name,
+                action=action,
+            )
+
+        return res
+
+    @classmethod
+    def _events_time_range_statement(
+        cls,
+        event_type: EventTypeEnum,
+        repository_name: str | None = None,
+        action: str | None = None,
+    ) -> Select[tuple[datetime | None, datetime | None, int]]:
+        # Aggregate in the database, the API process never holds more than one row
+        filters = cls._events_by_type_filters(event_type, repository_name, action)
+        return select(
+            func.min(Events.created_at), func.max(Events.created_at), func.count()
+        ).where(*filters)
+
+    async def get_events_time_range(
+        self,
+        event_type: EventTypeEnum,
+        repository_name: str | None = None,
+        action: str | None = None,
+    ) -> Row[tuple[datetime | None, datetime | None, int]]:
+        statement = self._events_time_range_statement(
+            event_type, repository_name, action
+        )
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).one()
+            logger.info(
+                "database_controller.get_events_time_range.successful",
+                oldest_event_time=res[0],
+                newest_event_time=res[1],
+                events_count=res[2],
+                event_type=event_type,
+                repository_name=repository_name,
+                action=action,
+            )
+
+        return res
+
+    @staticmethod
+    def _events_grouped_by_type_statement(
         offset: int,
         repository_name: str | None = None,
         action: str | None = None,
-    ) -> Sequence[tuple[EventTypeEnum, int]]:
+    ) -> Select[tuple[EventTypeEnum, int, datetime]]:
         filters = [
             Events.created_at >= datetime.now(timezone.utc) - timedelta(seconds=offset)
         ]
@@ -92,11 +450,26 @@ class DatabaseController:
         if action:
             filters.append(Events.action == action.lower())
 
-        statement = (
-            select(Events.event_type, func.count(Events.event_type))
+        # The oldest event per type comes from the same snapshot as the counts
+        return (
+            select(
+                Events.event_type,
+                func.count(Events.event_type),
+                func.min(Events.created_at),
+            )
             .where(*filters)
             .group_by(Events.event_type)
         )
+
+    async def get_events_grouped_by_type(
+        self,
+        offset: int,
+        repository_name: str | None = None,
+        action: str | None = None,
+    ) -> Sequence[tuple[EventTypeEnum, int, datetime]]:
+        statement = self._events_grouped_by_type_statement(
+            offset, repository_name, action
+        )
         async with self._database.get_session() as session:
             res = (await session.execute(statement)).all()
             logger.info(
@@ -109,38 +482,353 @@ class DatabaseController:
 
         return res
 
-    async def get_oldest_event(self, offset: int) -> Events | None:
-        datetime_since = datetime.now(timezone.utc) - timedelta(seconds=offset)
+    async def get_events_summary(
+        self, datetime_since: datetime
+    ) -> tuple[str, Sequence[Row]]:
+        # Counts and oldest event time per second, type, repository and action, together with
+        # the transaction snapshot they were read in, so later notifications can be deduplicated.
+        second = func.date_trunc("second", Events.created_at)
         statement = (
-            select(Events)
+            select(
+                Events.event_type,
+                Events.repository_name,
+                Events.action,
+                func.count(),
+                func.min(Events.created_at),
+            )
             .where(Events.created_at >= datetime_since)
-            .order_by(Events.created_at)
+            .group_by(second, Events.event_type, Events.repository_name, Events.action)
         )
         async with self._database.get_session() as session:
-            res = (await session.execute(statement)).fetchone()
-            if not res:
-                logger.warning(
-                    "database_controller.get_oldest_event.no_data",
-                    datetime_since=datetime_since,
-                )
-                return
+            await session.connection(
+                execution_options={"isolation_level": "REPEATABLE READ"}
+            )
+            snapshot = (
+                await session.execute(select(cast(func.pg_current_snapshot(), String)))
+            ).scalar_one()
+            res = (await session.execute(statement)).all()
+            logger.info(
+                "database_controller.get_events_summary.successful",
+                summaries_count=len(res),
+                datetime_since=datetime_since,
+                snapshot=snapshot,
+            )
+
+        return snapshot, res
+
+    async def get_events_histogram(
+        self,
+        bucket: HistogramBucketEnum,
+        created_since: datetime,
+        created_until: datetime,
+        event_type: EventTypeEnum | None = None,
+        repository_name: str | None = None,
+        action: str | None = None,
+    ) -> Sequence[Row]:
+        # Counts per UTC time bucket with one column per event type (in EventTypeEnum order).
+        # Buckets without events are filled with zeros by joining the counts to a generated series.
+        filters = [
+            Events.created_at >= created_since,
+            Events.created_at < created_until,
+        ]
+        if event_type:
+            filters.append(Events.event_type == event_type)
+        if repository_name:
+            filters.append(Events.repository_name == repository_name)
+        if action:
+            filters.append(Events.action == action.lower())
 
-            oldest_event: Events = res[0]
+        bucket_start = func.date_trunc(bucket, Events.created_at, "UTC")
+        counts = (
+            select(
+                bucket_start.label("bucket_start"),
+                *(
+                    func.count().filter(Events.event_type == t).label(t)
+                    for t in EventTypeEnum
+                ),
+            )
+            .where(*filters)
+            .group_by(bucket_start)
+            .subquery()
+        )
+        series = select(
+            func.generate_series(
+                func.date_trunc(
+                    bucket, literal(created_since, DateTime(timezone=True)), "UTC"
+                ),
+                literal(created_until, DateTime(timezone=True)),
+                cast(literal(f"1 {bucket}"), INTERVAL),
+            ).label("bucket_start")
+        ).subquery()
+        statement = (
+            select(
+                series.c.bucket_start,
+                *(func.coalesce(counts.c[t], 0) for t in EventTypeEnum),
+            )
+            .outerjoin(counts, counts.c.bucket_start == series.c.bucket_start)
+            .where(series.c.bucket_start < created_until)
+            .order_by(series.c.bucket_start)
+        )
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).all()
             logger.info(
-                "database_controller.get_oldest_event.successful",
-                event_id=oldest_event.event_id,
-                created_at=oldest_event.created_at,
+                "database_controller.get_events_histogram.successful",
+                buckets_count=len(res),
+                bucket=bucket,
+                created_since=created_since,
+                created_until=created_until,
+                event_type=event_type,
+                repository_name=repository_name,
+                action=action,
             )
-            return oldest_event
 
-    async def get_repositories_grouped_by_event_type(
-        self, event_type: EventTypeEnum, minimal_events_count: int
+        return res
+
+    @classmethod
+    def _time_gaps_subquery(
+        cls,
+        event_type: EventTypeEnum,
+        repository_name: str | None = None,
+        action: str | None = None,
+    ) -> Subquery:
+        # Seconds between each event and the previous one, NULL for the oldest event
+        filters = cls._events_by_type_filters(event_type, repository_name, action)
+        return (
+            select(
+                Events.created_at,
+                cast(
+                    func.extract(
+                        "epoch",
+                        Events.created_at
+                        - func.lag(Events.created_at).over(order_by=Events.created_at),
+                    ),
+                    Float,
+                ).label("gap"),
+            )
+            .where(*filters)
+            .subquery()
+        )
+
+    async def get_time_gaps_distribution(
+        self,
+        event_type: EventTypeEnum,
+        repository_name: str | None = None,
+        action: str | None = None,
+        quantiles: Sequence[float] = (0.5, 0.9, 0.99),
+    ) -> Row:
+        # Exact statistics of gaps between adjacent events, only one row leaves the database:
+        # (oldest event time, gaps count, min, max, mean, stddev, [quantiles])
+        gaps = self._time_gaps_subquery(event_type, repository_name, action)
+        statement = select(
+            func.min(gaps.c.created_at),
+            func.count(gaps.c.gap),
+            func.min(gaps.c.gap),
+            func.max(gaps.c.gap),
+            func.avg(gaps.c.gap),
+            func.stddev_samp(gaps.c.gap),
+            func.percentile_cont(array(quantiles))
+            .within_group(gaps.c.gap)
+            .cast(ARRAY(Float)),
+        )
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).one()
+            logger.info(
+                "database_controller.get_time_gaps_distribution.successful",
+                gaps_count=res[1],
+                event_type=event_type,
+                repository_name=repository_name,
+                action=action,
+            )
+
+        return res
+
+    async def get_ingest_lag(
+        self, window: int, quantiles: Sequence[float] = (0.5, 0.9, 0.99)
+    ) -> Row:
+        # Seconds between GitHub's `created_at` and `inserted_at` of events inserted within the last `window` seconds:
+        # (events count, [quantiles], max lag, latest `inserted_at`, latest `created_at`)
+        lag = cast(func.extract("epoch", Events.inserted_at - Events.created_at), Float)
+        statement = select(
+            func.count(),
+            func.percentile_cont(array(quantiles)).within_group(lag).cast(ARRAY(Float)),
+            func.max(lag),
+            func.max(Events.inserted_at),
+            func.max(Events.created_at),
+        ).where(
+            Events.inserted_at >= datetime.now(timezone.utc) - timedelta(seconds=window)
+        )
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).one()
+            logger.info(
+                "database_controller.get_ingest_lag.successful",
+                events_count=res[0],
+                window=window,
+            )
+
+        return res
+
+    async def get_time_gaps_sketch(
+        self,
+        event_type: EventTypeEnum,
+        repository_name: str | None = None,
+        action: str | None = None,
+        relative_accuracy: float = 0.01,
+    ) -> Sequence[Row]:
+        # Gaps between adjacent events aggregated into logarithmic buckets (DDSketch), so the database
+        # doesn't have to hold and sort all of them. Gap `g` falls into bucket `ceil(log_gamma(g))`, zero gaps
+        # into bucket NULL. Rows are (bucket, oldest event time, count, min, max, sum, sum of squares).
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        gaps = self._time_gaps_subquery(event_type, repository_name, action)
+        bucket = case(
+            (gaps.c.gap > 0, func.ceil(func.ln(gaps.c.gap) / math.log(gamma))),
+        )
+        statement = (
+            select(
+                bucket,
+                func.min(gaps.c.created_at),
+                func.count(gaps.c.gap),
+                func.min(gaps.c.gap),
+                func.max(gaps.c.gap),
+                func.sum(gaps.c.gap),
+                func.sum(gaps.c.gap * gaps.c.gap),
+            )
+            .group_by(bucket)
+            .order_by(bucket.nulls_first())
+        )
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).all()
+            logger.info(
+                "database_controller.get_time_gaps_sketch.successful",
+                buckets_count=len(res),
+                event_type=event_type,
+                repository_name=repository_name,
+                action=action,
+            )
+
+        return res
+
+    async def get_latest_inserted_at(self) -> datetime | None:
+        statement = select(func.max(Events.inserted_at))
+        async with self._database.get_session() as session:
+            return (await session.execute(statement)).scalar()
+
+    async def get_top_repositories(
+        self, event_type: EventTypeEnum, offset: int, k: int
     ) -> Sequence[tuple[str, int]]:
         statement = (
             select(Events.repository_name, func.count())
-            .where(Events.event_type == event_type)
+            .where(
+                Events.event_type == event_type,
+                Events.created_at
+                >= datetime.now(timezone.utc) - timedelta(seconds=offset),
+            )
+            .group_by(Events.repository_name)
+            .order_by(func.count().desc(), Events.repository_name)
+            .limit(k)
+        )
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).all()
+            logger.info(
+                "database_controller.get_top_repositories.successful",
+                repositories_amount=len(res),
+                event_type=event_type,
+                offset=offset,
+                k=k,
+            )
+
+        return res
+
+    async def get_actor_sketches(
+        self,
+        repository_name: str,
+        bucket_since: datetime,
+        event_type: EventTypeEnum | None = None,
+    ) -> Sequence[bytes]:
+        filters = [
+            ActorSketches.repository_name == repository_name,
+            ActorSketches.bucket_start >= bucket_since,
+        ]
+        if event_type:
+            filters.append(ActorSketches.event_type == event_type)
+
+        statement = select(ActorSketches.registers).where(*filters)
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).scalars().all()
+            logger.info(
+                "database_controller.get_actor_sketches.successful",
+                sketches_count=len(res),
+                repository_name=repository_name,
+                bucket_since=bucket_since,
+                event_type=event_type,
+            )
+
+        return res
+
+    async def get_unique_actors_count(
+        self,
+        repository_name: str,
+        created_since: datetime,
+        event_type: EventTypeEnum | None = None,
+    ) -> int:
+        filters = [
+            Events.repository_name == repository_name,
+            Events.created_at >= created_since,
+        ]
+        if event_type:
+            filters.append(Events.event_type == event_type)
+
+        statement = select(func.count(Events.actor_id.distinct())).where(*filters)
+        async with self._database.get_session() as session:
+            res = (await session.execute(statement)).scalar_one()
+            logger.info(
+                "database_controller.get_unique_actors_count.successful",
+                unique_actors=res,
+                repository_name=repository_name,
+                created_since=created_since,
+                event_type=event_type,
+            )
+
+        return res
+
+    async def get_repositories_grouped_by_event_type(
+        self,
+        event_type: EventTypeEnum,
+        minimal_events_count: int,
+        limit: int | None = None,
+        after: tuple[int, str] | None = None,
+        order: SortOrderEnum = SortOrderEnum.DESC,
+        created_since: datetime | None = None,
+        created_until: datetime | None = None,
+    ) -> Sequence[tuple[str, int]]:
+        # Keyset pagination on (events count, repository name), `after` is the key of the last row of the previous page.
+        # The counts are aggregated again for every page, so pages are only consistent over a fixed time window
+        # and bounding it keeps the aggregation cheap.
+        filters = [Events.event_type == event_type]
+        if created_since:
+            filters.append(Events.created_at >= created_since)
+        if created_until:
+            filters.append(Events.created_at < created_until)
+
+        events_count = func.count()
+        having = [events_count > minimal_events_count]
+        if after:
+            key = tuple_(events_count, Events.repository_name)
+            having.append(
+                key < tuple_(*after)
+                if order == SortOrderEnum.DESC
+                else key > tuple_(*after)
+            )
+
+        sort_keys = [events_count, Events.repository_name]
+        statement = (
+            select(Events.repository_name, events_count)
+            .where(*filters)
             .group_by(Events.repository_name)
-            .having(func.count() > minimal_events_count)
+            .having(*having)
+            .order_by(
+                *(k.desc() if order == SortOrderEnum.DESC else k for k in sort_keys)
+            )
+            .limit(limit)
         )
         async with self._database.get_session() as session:
             res = (await session.execute(statement)).all()
@@ -149,5 +837,9 @@ class DatabaseController:
                 repositories_amount=len(res),
                 event_type=event_type,
                 minimal_events_count=minimal_events_count,
+                after=after,
+                order=order,
+                created_since=created_since,
+                created_until=created_until,
             )
             return res
@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points_count: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling, returns indices of the `points_count` selected points.
+
+    The first and the last point are always kept. The points in between are split into `points_count - 2`
+    buckets and from each bucket the point forming the largest triangle with the previously selected point
+    and the average of the next bucket is selected. So peaks and outliers survive, unlike with plain
+    decimation. `x` has to be sorted.
+    """
+    size = len(x)
+    if points_count >= size or points_count < 3:
+        return np.arange(size)
+
+    # Boundaries of the `points_count - 2` buckets between the first and the last point
+    edges = np.linspace(1, size - 1, points_count - 1).astype(np.int64)
+    indices = np.empty(points_count, dtype=np.int64)
+    indices[0], indices[-1] = 0, size - 1
+
+    selected = 0
+    for bucket in range(points_count - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The last bucket is followed by the last point only
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else size
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        # Doubled triangle areas, the constant factor doesn't change the maximum
+        areas = np.abs(
+            (x[selected] - next_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (next_y - y[selected])
+        )
+        selected = start + int(areas.argmax())
+        indices[bucket + 1] = selected
+
+    return indices
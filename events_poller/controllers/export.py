@@ -0,0 +1,187 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator, Sequence
+from typing import Annotated
+
+import pyarrow as pa
+from fastapi import Depends, Request
+from sqlalchemy.engine import Row
+
+from events_poller.controllers.database import DatabaseController
+from events_poller.logger import logger
+from events_poller.models.enum import ExportFormatEnum
+from events_poller.models.models import EventsExportRequest
+from events_poller.settings import ExportConfig
+
+
+class ExportFormatNotAcceptableError(Exception): ...
+
+
+class ExportController:
+    """
+    Controller responsible for exporting raw GitHub events in bulk.
+
+    Events are read page by page using keyset pagination on `(created_at, event_id)`,
+    every page in its own short transaction, and serialized incrementally, so memory usage
+    stays constant regardless of the number of exported rows.
+
+    Methods:
+        - negotiate_format: Choose the export format from the `Accept` header.
+        - export: Stream serialized events in the chosen format.
+        - _iter_pages: Fetch pages of events until the filtered range is exhausted.
+        - _serialize_ndjson, _serialize_csv, _serialize_arrow: Serialize one page of events.
+    """
+
+    _columns = [
+        "event_id",
+        "event_type",
+        "actor_id",
+        "repository_id",
+        "repository_name",
+        "created_at",
+        "action",
+    ]
+    _arrow_schema = pa.schema(
+        [
+            ("event_id", pa.int64()),
+            ("event_type", pa.string()),
+            ("actor_id", pa.int64()),
+            ("repository_id", pa.int64()),
+            ("repository_name", pa.string()),
+            ("created_at", pa.timestamp("us", tz="UTC")),
+            ("action", pa.string()),
+        ]
+    )
+
+    def __init__(
+        self, db_controller: DatabaseController, export_config: ExportConfig
+    ) -> None:
+        self._db_controller = db_controller
+        self._config = export_config
+
+    @staticmethod
+    def negotiate_format(accept: str | None) -> ExportFormatEnum:
+        # Media ranges are tried in the client's order of preference, NDJSON is the default
+        media_ranges = []
+        for media_range in (accept or "*/*").split(","):
+            media_type, *media_params = media_range.strip().split(";")
+            quality = 1.0
+            for media_param in media_params:
+                key, _, value = media_param.strip().partition("=")
+                if key == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if quality > 0:
+                media_ranges.append((quality, media_type.strip().lower()))
+
+        for _, media_type in sorted(media_ranges, key=lambda m: m[0], reverse=True):
+            if media_type in ("*/*", "application/*"):
+                return ExportFormatEnum.NDJSON
+            if media_type == "text/*":
+                return ExportFormatEnum.CSV
+            if media_type in ExportFormatEnum:
+                return ExportFormatEnum(media_type)
+
+        raise ExportFormatNotAcceptableError()
+
+    async def _iter_pages(
+        self, params: EventsExportRequest
+    ) -> AsyncIterator[Sequence[Row]]:
+        after = None
+        while True:
+            page = await self._db_controller.get_events_page(
+                limit=self._config.page_size, after=after, **params.model_dump()
+            )
+            if page:
+                yield page
+            if len(page) < self._config.page_size:
+                return
+
+            after = (page[-1].created_at, page[-1].event_id)
+
+    @staticmethod
+    def _serialize_ndjson(page: Sequence[Row]) -> bytes:
+        return "".join(
+            json.dumps(
+                {
+                    **row._asdict(),
+                    "created_at": row.created_at.isoformat(),
+                }
+            )
+            + "\n"
+            for row in page
+        ).encode()
+
+    @classmethod
+    def _serialize_csv(cls, page: Sequence[Row], header: bool) -> bytes:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(cls._columns)
+        writer.writerows(
+            (*row[:5], row.created_at.isoformat(), row.action) for row in page
+        )
+        return buffer.getvalue().encode()
+
+    @classmethod
+    def _serialize_arrow(cls, page: Sequence[Row]) -> pa.RecordBatch:
+        return pa.RecordBatch.from_arrays(
+            [
+                pa.array([row[idx] for row in page], type=field.type)
+                for idx, field in enumerate(cls._arrow_schema)
+            ],
+            schema=cls._arrow_schema,
+        )
+
+    async def export(
+        self, params: EventsExportRequest, export_format: ExportFormatEnum
+    ) -> AsyncIterator[bytes]:
+        rows_count = 0
+        match export_format:
+            case ExportFormatEnum.NDJSON:
+                async for page in self._iter_pages(params):
+                    rows_count += len(page)
+                    yield self._serialize_ndjson(page)
+            case ExportFormatEnum.CSV:
+                header = True
+                async for page in self._iter_pages(params):
+                    rows_count += len(page)
+                    yield self._serialize_csv(page, header)
+                    header = False
+                if header:
+                    yield self._serialize_csv([], header)
+            case ExportFormatEnum.ARROW:
+                # IPC stream format, every page is written as one record batch
+                buffer = io.BytesIO()
+                with pa.ipc.new_stream(buffer, self._arrow_schema) as writer:
+                    async for page in self._iter_pages(params):
+                        rows_count += len(page)
+                        writer.write_batch(self._serialize_arrow(page))
+                        yield self._drain(buffer)
+                yield self._drain(buffer)
+            case _:
+                raise ValueError
+
+        logger.info(
+            "export_controller.export.successful",
+            export_format=export_format,
+            rows_count=rows_count,
+            **params.model_dump(),
+        )
+
+    @staticmethod
+    def _drain(buffer: io.BytesIO) -> bytes:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+
+def get_export_controller(request: Request) -> ExportController:
+    return request.app.state.export_controller
+
+
+ExportControllerDependency = Annotated[ExportController, Depends(get_export_controller)]
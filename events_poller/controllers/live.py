@@ -0,0 +1,251 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+from events_poller.controllers.database import DatabaseController
+from events_poller.controllers.sketches import SpaceSaving
+from events_poller.database.engine import Database
+from events_poller.logger import logger
+from events_poller.models.enum import EventTypeEnum
+from events_poller.models.models import EventsInsertedNotificationModel
+from events_poller.settings import LiveMetricsConfig
+
+
+class LiveMetrics:
+    """
+    In-memory sliding-window event counters fed by Postgres LISTEN/NOTIFY.
+
+    The poller publishes summaries of every inserted batch (see DatabaseController.insert_data_bulk).
+    This class keeps them in per-second buckets for the last `window` seconds, so total counts
+    of recent events can be answered without touching the database. Counts are accurate to the second.
+    Counters are kept per event type and action only. Repositories are tracked per minute and event type
+    in memory-bounded Space-Saving summaries, so the memory doesn't grow with the number of repositories.
+
+    - On start (and after every reconnect) it subscribes first and then bootstraps the buckets from
+      the database. Notifications of transactions already visible in the bootstrap snapshot are skipped.
+    - While the listener connection is down, and for counts of a single repository,
+      `get_events_grouped_by_type` returns None and callers fall back to the database.
+
+    Methods:
+        - run: Long-running task maintaining the subscription and the counters.
+        - get_events_grouped_by_type: Counts and oldest event time per event type within an offset.
+        - get_top_repositories: Approximate top repositories by events count within an offset.
+    """
+
+    def __init__(
+        self,
+        database: Database,
+        db_controller: DatabaseController,
+        live_metrics_config: LiveMetricsConfig,
+    ) -> None:
+        self._database = database
+        self._db_controller = db_controller
+        self._config = live_metrics_config
+
+        # second -> (event type, action) -> [oldest created_at timestamp, count]
+        self._buckets: dict[int, dict[tuple[EventTypeEnum, str], list]] = {}
+        # second -> event type -> [oldest created_at timestamp, count], serves unfiltered requests
+        self._totals: dict[int, dict[EventTypeEnum, list]] = {}
+        # minute -> event type -> repository names summary
+        self._top_repositories: dict[int, dict[EventTypeEnum, SpaceSaving]] = {}
+        self._pruned_at = float("-inf")
+
+        self._ready = False
+        self._pending: list[EventsInsertedNotificationModel] | None = None
+        self._terminated = asyncio.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    @staticmethod
+    def _merge(counter: list, created_at: float, count: int) -> None:
+        counter[0] = min(counter[0], created_at)
+        counter[1] += count
+
+    def _add(
+        self,
+        created_at: float,
+        event_type: EventTypeEnum,
+        repository_name: str,
+        action: str,
+        count: int,
+    ) -> None:
+        second = int(created_at)
+        if second < time.time() - self._config.window:
+            return
+
+        key = (event_type, action)
+        bucket = self._buckets.setdefault(second, {})
+        if counter := bucket.get(key):
+            self._merge(counter, created_at, count)
+        else:
+            bucket[key] = [created_at, count]
+
+        totals = self._totals.setdefault(second, {})
+        if counter := totals.get(event_type):
+            self._merge(counter, created_at, count)
+        else:
+            totals[event_type] = [created_at, count]
+
+        summaries = self._top_repositories.setdefault(second // 60, {})
+        if not (summary := summaries.get(event_type)):
+            summary = summaries[event_type] = SpaceSaving(
+                self._config.top_repositories_capacity
+            )
+        summary.add(repository_name, count)
+
+    def _prune(self) -> None:
+        self._pruned_at = time.time()
+        oldest_second = self._pruned_at - self._config.window
+        for second in [s for s in self._buckets if s < oldest_second]:
+            del self._buckets[second]
+            del self._totals[second]
+        for minute in [m for m in self._top_repositories if m < oldest_second // 60]:
+            del self._top_repositories[minute]
+
+    def _apply(self, notification: EventsInsertedNotificationModel) -> None:
+        for (
+            created_at,
+            event_type,
+            repository_name,
+            action,
+            count,
+        ) in notification.events:
+            self._add(created_at, event_type, repository_name, action, count)
+        # Readers prune too, but the counters must stay bounded even when nobody queries them
+        if time.time() - self._pruned_at >= 1:
+            self._prune()
+
+    def _on_notification(self, payload: str) -> None:
+        try:
+            notification = EventsInsertedNotificationModel.model_validate_json(payload)
+        except ValueError as e:
+            logger.warning("live_metrics.invalid_notification", error=str(e))
+            return
+
+        if self._pending is not None:
+            # Bootstrap is running, it decides whether the notification is already included
+            self._pending.append(notification)
+        else:
+            self._apply(notification)
+
+    @staticmethod
+    def _is_visible(txid: int, snapshot: str) -> bool:
+        # Snapshot text representation is `xmin:xmax:xip_list`
+        xmin, xmax, xip = snapshot.split(":")
+        in_progress = {int(x) for x in xip.split(",") if x}
+        return txid < int(xmin) or (txid < int(xmax) and txid not in in_progress)
+
+    async def _bootstrap(self) -> None:
+        self._buckets.clear()
+        self._totals.clear()
+        self._top_repositories.clear()
+
+        snapshot, summaries = await self._db_controller.get_events_summary(
+            datetime.now(timezone.utc) - timedelta(seconds=self._config.window)
+        )
+        for event_type, repository_name, action, count, created_at in summaries:
+            self._add(
+                created_at.timestamp(), event_type, repository_name, action, count
+            )
+
+        pending, self._pending = self._pending or [], None
+        for notification in pending:
+            if not self._is_visible(notification.txid, snapshot):
+                self._apply(notification)
+
+        logger.info(
+            "live_metrics.bootstrap.successful",
+            summaries_count=len(summaries),
+            pending_notifications_count=len(pending),
+        )
+
+    async def run(self) -> None:
+        while True:
+            connection: asyncpg.Connection | None = None
+            try:
+                self._terminated.clear()
+                self._pending = []
+                connection = await self._database.listen(
+                    self._config.channel, self._on_notification, self._terminated.set
+                )
+                await self._bootstrap()
+                self._ready = True
+
+                await self._terminated.wait()
+                logger.warning("live_metrics.connection_lost")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("live_metrics.error", error=str(e))
+            finally:
+                self._ready = False
+                self._pending = None
+                if connection and not connection.is_closed():
+                    connection.terminate()
+
+            await asyncio.sleep(self._config.reconnect_interval)
+
+    def get_events_grouped_by_type(
+        self,
+        offset: int,
+        repository_name: str | None = None,
+        action: str | None = None,
+    ) -> list[tuple[EventTypeEnum, int, datetime]] | None:
+        # Counts of a single repository are not kept in memory
+        if not self._ready or offset > self._config.window or repository_name:
+            return None
+
+        self._prune()
+        first_second = int(time.time() - offset)
+        grouped: dict[EventTypeEnum, list] = {}
+
+        def _count(event_type: EventTypeEnum, created_at: float, count: int) -> None:
+            if counter := grouped.get(event_type):
+                self._merge(counter, created_at, count)
+            else:
+                grouped[event_type] = [created_at, count]
+
+        if not action:
+            for second, totals in self._totals.items():
+                if second >= first_second:
+                    for event_type, (created_at, count) in totals.items():
+                        _count(event_type, created_at, count)
+        else:
+            action = action.lower()
+            for second, bucket in self._buckets.items():
+                if second < first_second:
+                    continue
+                for (event_type, _action), (created_at, count) in bucket.items():
+                    if _action == action:
+                        _count(event_type, created_at, count)
+
+        return [
+            (
+                event_type,
+                count,
+                datetime.fromtimestamp(created_at, tz=timezone.utc),
+            )
+            for event_type, (created_at, count) in grouped.items()
+        ]
+
+    def get_top_repositories(
+        self, event_type: EventTypeEnum, offset: int, k: int
+    ) -> list[tuple[str, int, int]] | None:
+        # Summaries are kept per minute, so up to a minute before the offset may be included as well
+        if not self._ready or offset > self._config.window:
+            return None
+
+        self._prune()
+        first_minute = int(time.time() - offset) // 60
+        return SpaceSaving.merge_top(
+            (
+                summaries[event_type]
+                for minute, summaries in self._top_repositories.items()
+                if minute >= first_minute and event_type in summaries
+            ),
+            k,
+        )
@@ -1,24 +1,65 @@
+import asyncio
+import base64
+import json
+import math
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
+import numpy as np
 from fastapi import Depends, Request
-from events_poller.database.models import Events
+from sqlalchemy.engine import Row
 from events_poller.logger import logger
+from events_poller.controllers.cache import MetricsCache, cached_metric
 from events_poller.controllers.database import DatabaseController
-from events_poller.models.enum import EventTypeEnum
+from events_poller.controllers.live import LiveMetrics
+from events_poller.controllers.sketches import HyperLogLog
+from events_poller.database.engine import DatabaseError
+from events_poller.prometheus import observe_latency
+from events_poller.models.enum import EventTypeEnum, HistogramBucketEnum
 from events_poller.models.models import (
+    EventAvgTimeBatchItem,
     EventAvgTimeMetricRequest,
     EventAvgTimeMetricResponse,
+    EventAvgTimeVisualizeRequest,
+    EventTimeDistributionBatchItem,
+    EventTimeDistributionRequest,
+    EventTimeDistributionResponse,
+    EventsHistogramBatchItem,
+    EventsHistogramBucketModel,
+    EventsHistogramRequest,
+    EventsHistogramResponse,
+    FreshnessRequest,
+    FreshnessResponse,
     GroupedEventsCountModel,
+    MetricsBatchItem,
+    MetricsBatchItemResponse,
+    MetricsBatchRequest,
+    MetricsBatchResponse,
+    RepositoriesWithMultipleEventsBatchItem,
     RepositoriesWithMultipleEventsRequest,
     RepositoriesWithMultipleEventsResponse,
+    TopRepositoriesRequest,
+    TopRepositoriesResponse,
+    TopRepositoryModel,
+    TotalEventsBatchItem,
     TotalEventsMetricRequest,
     TotalEventsMetricResponse,
+    UniqueActorsBatchItem,
+    UniqueActorsRequest,
+    UniqueActorsResponse,
 )
 
 
 class CalculationFailedError(Exception): ...
 
 
+class InvalidTimeRangeError(Exception): ...
+
+
+class InvalidCursorError(Exception): ...
+
+
 class MetricsController:
     """
     Controller responsible for retrieving, processing, and calculating GitHub event metrics.
@@ -26,82 +67,282 @@ class MetricsController:
     This class acts as a service layer between the API endpoints and the database layer.
     It pulls event data from the database via the DatabaseController and computes metrics
     such as average time between events, total event counts, and repositories with a high
-    number of specific events.
+    number of specific events. Computed metrics are served from the optional MetricsCache,
+    total counts and top repositories of recent events from the optional LiveMetrics.
 
     Methods:
         - calculate_event_avg_time: Computes the average time between adjacent events.
+        - calculate_event_time_distribution: Computes quantiles and other statistics of times between adjacent events.
         - get_events_total_count: Groups and counts events by type.
-        - get_repositories_with_multiple_events: Finds repositories exceeding a threshold of events.
-        - get_events_sorted_by_time: Helper method to sort events chronologically.
-        - _calculate_avg_time: Calculates average seconds between adjacent events.
-        - get_time_diff_per_event_pair: Returns list of time differences in seconds between event pairs.
+        - get_top_repositories: Finds repositories with the most events of a given type.
+        - get_unique_actors: Estimates the number of distinct actors of a repository.
+        - get_repositories_with_multiple_events: Finds repositories exceeding a threshold of events, page by page.
+        - get_time_diff_per_event_type: Returns the time differences of multiple event types, fetched in one query.
+        - get_events_histogram: Counts events per time bucket and event type.
         - get_event_count_by_type: Utility method to get count for a specific event type from a grouped result.
+        - execute_metric: Computes a metric described by a batch item, errors are returned in the response.
+        - execute_batch: Computes a list of metrics concurrently, with per-item errors.
+        - get_watermark: Returns the data watermark (latest `inserted_at`) the metrics are computed from.
+        - get_freshness: Computes quantiles of the ingest lag of recently inserted events.
     """
 
-    def __init__(self, db_controller: DatabaseController) -> None:
+    _histogram_bucket_sizes = {
+        HistogramBucketEnum.MINUTE: timedelta(minutes=1),
+        HistogramBucketEnum.HOUR: timedelta(hours=1),
+        HistogramBucketEnum.DAY: timedelta(days=1),
+    }
+    _histogram_max_buckets = 10000
+    _distribution_quantiles = (0.5, 0.9, 0.99)
+    _sketch_relative_accuracy = 0.01
+
+    def __init__(
+        self,
+        db_controller: DatabaseController,
+        cache: MetricsCache | None = None,
+        live_metrics: LiveMetrics | None = None,
+        batch_concurrency: int = 4,
+    ) -> None:
         self._db_controller = db_controller
+        self._cache = cache
+        self._live_metrics = live_metrics
+        # Shared by all batches, so concurrent batch requests together can't exhaust the connection pool
+        self._batch_semaphore = asyncio.Semaphore(batch_concurrency)
 
-    def _calculate_avg_time(self, events: list[Events]) -> float:
-        # Sum of the difference between two adjacent sorted events
-        time_diff_per_pair = self.get_time_diff_per_event_pair(events)
-        total_time_diff = sum(time_diff_per_pair)
+    async def get_watermark(self) -> datetime | None:
+        # The cache re-reads the watermark at most once per interval, without it every call hits the database
+        if self._cache:
+            return await self._cache.get_watermark()
+        return await self._db_controller.get_latest_inserted_at()
 
-        avg_time = total_time_diff / (len(events) - 1)
-        logger.info(
-            "Calculated avg time between events",
-            total_time_diff=total_time_diff,
-            events_count=len(events),
-            avg_time=avg_time,
+    async def get_freshness(self, params: FreshnessRequest) -> FreshnessResponse:
+        # Not cached, the age of the newest event is relative to the current time
+        (
+            events_count,
+            lag_quantiles,
+            lag_max,
+            latest_inserted_at,
+            latest_created_at,
+        ) = await self._db_controller.get_ingest_lag(
+            params.window, self._distribution_quantiles
+        )
+        lag_p50, lag_p90, lag_p99 = lag_quantiles or (None, None, None)
+        return FreshnessResponse(
+            window=params.window,
+            events_count=events_count,
+            lag_p50=lag_p50,
+            lag_p90=lag_p90,
+            lag_p99=lag_p99,
+            lag_max=lag_max,
+            latest_inserted_at=latest_inserted_at,
+            latest_created_at=latest_created_at,
+            latest_event_age=(
+                (datetime.now(timezone.utc) - latest_created_at).total_seconds()
+                if latest_created_at
+                else None
+            ),
         )
-        return avg_time
 
-    @staticmethod
-    def get_time_diff_per_event_pair(events: list[Events]) -> list[float]:
-        return [
-            (events[idx + 1].created_at - events[idx].created_at).total_seconds()
-            for idx in range(len(events) - 1)
-        ]
+    @observe_latency
+    async def get_time_diff_per_event_type(
+        self, params: EventAvgTimeVisualizeRequest
+    ) -> dict[EventTypeEnum, np.ndarray]:
+        # Differences in seconds between adjacent events sorted chronologically, per event type. All the requested
+        # event types are fetched at once in one query, streamed chunk by chunk.
+        event_types = [params.event_type] if params.event_type else list(EventTypeEnum)
+        created_at_chunks: dict[EventTypeEnum, list[np.ndarray]] = {
+            event_type: [] for event_type in event_types
+        }
+        async for (
+            event_type,
+            created_at,
+        ) in self._db_controller.stream_events_created_at_by_type(
+            event_types, params.repository_name, params.action
+        ):
+            created_at_chunks[event_type].append(created_at)
 
-    async def get_events_sorted_by_time(
-        self, params: EventAvgTimeMetricRequest
-    ) -> list[Events]:
-        events = await self._db_controller.get_events_by_type(**params.model_dump())
-        return sorted(events, key=lambda x: x.created_at)
+        return {
+            event_type: np.diff(np.concatenate(chunks))
+            if chunks
+            else np.empty(0, dtype=np.float64)
+            for event_type, chunks in created_at_chunks.items()
+        }
 
+    @observe_latency
+    @cached_metric
     async def calculate_event_avg_time(
         self, params: EventAvgTimeMetricRequest
-    ) -> EventAvgTimeMetricResponse | None:
-        events_sorted = await self.get_events_sorted_by_time(params)
-        if not events_sorted:
+    ) -> EventAvgTimeMetricResponse:
+        (
+            oldest_event_time,
+            newest_event_time,
+            events_count,
+        ) = await self._db_controller.get_events_time_range(**params.model_dump())
+        if events_count < 2:
             logger.warning("No data to calculate metric", **params.model_dump())
             raise CalculationFailedError()
 
+        # Sum of the differences between adjacent sorted events telescopes to newest - oldest
+        avg_time = (newest_event_time - oldest_event_time).total_seconds() / (
+            events_count - 1
+        )
+        logger.info(
+            "Calculated avg time between events",
+            events_count=events_count,
+            avg_time=avg_time,
+        )
         return EventAvgTimeMetricResponse(
-            oldest_event_time=events_sorted[0].created_at,
+            oldest_event_time=oldest_event_time,
+            repository_name=params.repository_name or "all",
+            events_count=events_count,
+            avg_time=round(avg_time, 2),
+        )
+
+    @staticmethod
+    def _sketch_quantile(buckets: Sequence[Row], gamma: float, rank: float) -> float:
+        # Representative value of the bucket holding the value at `rank`, clamped to the gaps seen in it
+        seen = 0
+        for bucket, _, count, min_gap, max_gap, *_ in buckets:
+            seen += count
+            if count and seen > rank:
+                value = 0.0 if bucket is None else 2 * gamma**bucket / (gamma + 1)
+                return min(max(value, min_gap), max_gap)
+        return buckets[-1][4]
+
+    async def _calculate_approximate_time_distribution(
+        self, params: EventTimeDistributionRequest
+    ) -> EventTimeDistributionResponse | None:
+        relative_accuracy = self._sketch_relative_accuracy
+        buckets = await self._db_controller.get_time_gaps_sketch(
+            params.event_type,
+            params.repository_name,
+            params.action,
+            relative_accuracy,
+        )
+        gaps_count = sum(b[2] for b in buckets)
+        if not gaps_count:
+            return None
+
+        # Moments are exact, they are merged from per-bucket sums
+        gaps_sum = sum(b[5] or 0.0 for b in buckets)
+        gaps_sum_squares = sum(b[6] or 0.0 for b in buckets)
+        avg_time = gaps_sum / gaps_count
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        p50_time, p90_time, p99_time = (
+            self._sketch_quantile(buckets, gamma, q * (gaps_count - 1))
+            for q in self._distribution_quantiles
+        )
+        return EventTimeDistributionResponse(
+            oldest_event_time=min(b[1] for b in buckets),
             repository_name=params.repository_name or "all",
-            events_count=len(events_sorted),
-            avg_time=round(self._calculate_avg_time(events_sorted), 2),
+            events_count=gaps_count + 1,
+            min_time=min(b[3] for b in buckets if b[2]),
+            max_time=max(b[4] for b in buckets if b[2]),
+            avg_time=round(avg_time, 2),
+            stddev_time=(
+                round(
+                    math.sqrt(
+                        max(gaps_sum_squares - gaps_count * avg_time**2, 0.0)
+                        / (gaps_count - 1)
+                    ),
+                    2,
+                )
+                if gaps_count > 1
+                else None
+            ),
+            p50_time=round(p50_time, 2),
+            p90_time=round(p90_time, 2),
+            p99_time=round(p99_time, 2),
+            approximate=True,
+            relative_error=relative_accuracy,
+        )
+
+    async def _calculate_exact_time_distribution(
+        self, params: EventTimeDistributionRequest
+    ) -> EventTimeDistributionResponse | None:
+        (
+            oldest_event_time,
+            gaps_count,
+            min_time,
+            max_time,
+            avg_time,
+            stddev_time,
+            quantiles,
+        ) = await self._db_controller.get_time_gaps_distribution(
+            params.event_type,
+            params.repository_name,
+            params.action,
+            self._distribution_quantiles,
         )
+        if not gaps_count:
+            return None
+
+        p50_time, p90_time, p99_time = quantiles
+        return EventTimeDistributionResponse(
+            oldest_event_time=oldest_event_time,
+            repository_name=params.repository_name or "all",
+            events_count=gaps_count + 1,
+            min_time=round(min_time, 2),
+            max_time=round(max_time, 2),
+            avg_time=round(avg_time, 2),
+            stddev_time=round(stddev_time, 2) if stddev_time is not None else None,
+            p50_time=round(p50_time, 2),
+            p90_time=round(p90_time, 2),
+            p99_time=round(p99_time, 2),
+        )
+
+    @observe_latency
+    @cached_metric
+    async def calculate_event_time_distribution(
+        self, params: EventTimeDistributionRequest
+    ) -> EventTimeDistributionResponse:
+        # Statistics of times between adjacent events are computed in the database, only a few numbers leave it
+        distribution = await (
+            self._calculate_approximate_time_distribution(params)
+            if params.approximate
+            else self._calculate_exact_time_distribution(params)
+        )
+        if not distribution:
+            logger.warning("No data to calculate metric", **params.model_dump())
+            raise CalculationFailedError()
+
+        logger.info(
+            "Calculated distribution of time between events",
+            events_count=distribution.events_count,
+            approximate=params.approximate,
+        )
+        return distribution
 
     @staticmethod
     def get_event_count_by_type(
-        event_type: EventTypeEnum, events_grouped: list[tuple[EventTypeEnum, int]]
+        event_type: EventTypeEnum,
+        events_grouped: Sequence[tuple[EventTypeEnum, int, datetime]],
     ) -> int:
         event_by_type = [e for e in events_grouped if e[0] == event_type]
         return event_by_type[0][1] if event_by_type else 0
 
+    @cached_metric
+    async def _get_events_grouped_by_type(
+        self, params: TotalEventsMetricRequest
+    ) -> Sequence[tuple[EventTypeEnum, int, datetime]]:
+        return await self._db_controller.get_events_grouped_by_type(
+            **params.model_dump()
+        )
+
+    @observe_latency
     async def get_events_total_count(
         self, params: TotalEventsMetricRequest
     ) -> TotalEventsMetricResponse:
-        events_grouped = await self._db_controller.get_events_grouped_by_type(
-            **params.model_dump()
+        # Recent offsets are answered from in-memory live counters, when they are available
+        events_grouped = (
+            self._live_metrics.get_events_grouped_by_type(**params.model_dump())
+            if self._live_metrics
+            else None
         )
+        if events_grouped is None:
+            events_grouped = await self._get_events_grouped_by_type(params)
 
-        # Note: This method may not always return perfectly accurate results
-        # if the poller is actively inserting new events during execution.
-        oldest_event = await self._db_controller.get_oldest_event(params.offset)
         return TotalEventsMetricResponse(
-            oldest_event_time=oldest_event.created_at if oldest_event else None,
+            oldest_event_time=min((e[2] for e in events_grouped), default=None),
             repository_name=params.repository_name or "all",
             events_count=GroupedEventsCountModel(
                 pr_event=self.get_event_count_by_type(
@@ -117,18 +358,300 @@ class MetricsController:
             ),
         )
 
+    @staticmethod
+    def _cursor_filters(params: RepositoriesWithMultipleEventsRequest) -> list:
+        # Parameters the pages depend on, a cursor is only valid for the same ones
+        return [
+            params.event_type,
+            params.order,
+            params.minimal_events_count,
+            params.offset,
+        ]
+
+    @staticmethod
+    def _encode_cursor(
+        after: tuple[int, str], filters: list, created_until: datetime | None
+    ) -> str:
+        return base64.urlsafe_b64encode(
+            json.dumps(
+                {
+                    "after": after,
+                    "filters": filters,
+                    "created_until": (
+                        created_until.timestamp() if created_until else None
+                    ),
+                }
+            ).encode()
+        ).decode()
+
+    @staticmethod
+    def _decode_cursor(
+        cursor: str, filters: list
+    ) -> tuple[tuple[int, str], datetime | None]:
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(cursor))
+            events_count, repository_name = decoded["after"]
+            created_until = decoded["created_until"]
+            if (
+                not isinstance(events_count, int)
+                or not isinstance(repository_name, str)
+                or not isinstance(created_until, int | float | None)
+                or decoded["filters"] != filters
+            ):
+                raise ValueError()
+            if created_until is not None:
+                created_until = datetime.fromtimestamp(created_until, tz=timezone.utc)
+        except (TypeError, ValueError, KeyError, OverflowError, OSError):
+            logger.warning("Invalid pagination cursor", cursor=cursor)
+            raise InvalidCursorError()
+        return (events_count, repository_name), created_until
+
+    @observe_latency
+    @cached_metric
     async def get_repositories_with_multiple_events(
         self, params: RepositoriesWithMultipleEventsRequest
     ) -> RepositoriesWithMultipleEventsResponse:
+        # A window ends when the first page was requested, the cursor carries it to the following pages,
+        # so they don't shift with the current time
+        filters = self._cursor_filters(params)
+        after = None
+        created_until = datetime.now(timezone.utc) if params.offset else None
+        if params.cursor:
+            after, created_until = self._decode_cursor(params.cursor, filters)
+
+        # One extra row tells whether there is a next page
         repositories_grouped = (
             await self._db_controller.get_repositories_grouped_by_event_type(
-                **params.model_dump()
+                params.event_type,
+                params.minimal_events_count,
+                limit=params.limit + 1,
+                after=after,
+                order=params.order,
+                created_since=(
+                    created_until - timedelta(seconds=params.offset)
+                    if created_until
+                    else None
+                ),
+                created_until=created_until,
             )
         )
+        page = repositories_grouped[: params.limit]
         return RepositoriesWithMultipleEventsResponse(
             event_type=params.event_type,
-            repositories={r[0]: r[1] for r in repositories_grouped},
+            repositories={r[0]: r[1] for r in page},
+            next_cursor=(
+                self._encode_cursor((page[-1][1], page[-1][0]), filters, created_until)
+                if len(repositories_grouped) > params.limit
+                else None
+            ),
+        )
+
+    @observe_latency
+    @cached_metric
+    async def get_events_histogram(
+        self, params: EventsHistogramRequest
+    ) -> EventsHistogramResponse:
+        created_until = params.created_until or datetime.now(timezone.utc)
+        created_since = params.created_since or created_until - timedelta(days=1)
+        if not (
+            created_since
+            < created_until
+            <= created_since
+            + self._histogram_bucket_sizes[params.bucket] * self._histogram_max_buckets
+        ):
+            logger.warning(
+                "Invalid histogram time range",
+                created_since=created_since,
+                created_until=created_until,
+                bucket=params.bucket,
+            )
+            raise InvalidTimeRangeError()
+
+        histogram = await self._db_controller.get_events_histogram(
+            params.bucket,
+            created_since,
+            created_until,
+            params.event_type,
+            params.repository_name,
+            params.action,
+        )
+        return EventsHistogramResponse(
+            repository_name=params.repository_name or "all",
+            bucket=params.bucket,
+            created_since=created_since,
+            created_until=created_until,
+            buckets=[
+                EventsHistogramBucketModel(
+                    bucket_start=bucket_start,
+                    events_count=GroupedEventsCountModel(
+                        pr_event=counts[EventTypeEnum.PR_EVENT],
+                        watch_event=counts[EventTypeEnum.WATCH_EVENT],
+                        issue_event=counts[EventTypeEnum.ISSUES_EVENT],
+                        total=sum(counts.values()),
+                    ),
+                )
+                for bucket_start, counts in (
+                    (row[0], dict(zip(EventTypeEnum, row[1:]))) for row in histogram
+                )
+            ],
+        )
+
+    @cached_metric
+    async def _get_top_repositories(
+        self, params: TopRepositoriesRequest
+    ) -> Sequence[tuple[str, int]]:
+        return await self._db_controller.get_top_repositories(
+            params.event_type, params.offset, params.k
+        )
+
+    @observe_latency
+    async def get_top_repositories(
+        self, params: TopRepositoriesRequest
+    ) -> TopRepositoriesResponse:
+        # Recent offsets are answered from in-memory heavy hitters summaries, the database is the exact fallback
+        top_repositories = (
+            self._live_metrics.get_top_repositories(
+                params.event_type, params.offset, params.k
+            )
+            if self._live_metrics and not params.exact
+            else None
+        )
+        if top_repositories is not None:
+            return TopRepositoriesResponse(
+                event_type=params.event_type,
+                offset=params.offset,
+                approximate=True,
+                repositories=[
+                    TopRepositoryModel(
+                        repository_name=repository_name,
+                        events_count=count,
+                        max_error=error,
+                    )
+                    for repository_name, count, error in top_repositories
+                ],
+            )
+
+        return TopRepositoriesResponse(
+            event_type=params.event_type,
+            offset=params.offset,
+            repositories=[
+                TopRepositoryModel(repository_name=repository_name, events_count=count)
+                for repository_name, count in await self._get_top_repositories(params)
+            ],
+        )
+
+    @observe_latency
+    @cached_metric
+    async def get_unique_actors(
+        self, params: UniqueActorsRequest
+    ) -> UniqueActorsResponse:
+        created_since = datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) - timedelta(days=params.days - 1)
+        if params.exact:
+            unique_actors = await self._db_controller.get_unique_actors_count(
+                params.repository_name, created_since, params.event_type
+            )
+            return UniqueActorsResponse(
+                repository_name=params.repository_name,
+                event_type=params.event_type,
+                created_since=created_since,
+                unique_actors=unique_actors,
+                lower_bound=unique_actors,
+                upper_bound=unique_actors,
+            )
+
+        # Daily sketches of all requested event types are merged into one
+        sketch = HyperLogLog()
+        for registers in await self._db_controller.get_actor_sketches(
+            params.repository_name, created_since, params.event_type
+        ):
+            sketch.merge(HyperLogLog.from_bytes(registers))
+
+        estimate = sketch.estimate()
+        relative_error = HyperLogLog.relative_error()
+        return UniqueActorsResponse(
+            repository_name=params.repository_name,
+            event_type=params.event_type,
+            created_since=created_since,
+            unique_actors=round(estimate),
+            approximate=True,
+            relative_error=round(relative_error, 4),
+            lower_bound=math.floor(estimate * (1 - 2 * relative_error)),
+            upper_bound=math.ceil(estimate * (1 + 2 * relative_error)),
+        )
+
+    async def execute_metric(self, item: MetricsBatchItem) -> MetricsBatchItemResponse:
+        async with self._batch_semaphore:
+            try:
+                match item:
+                    case EventAvgTimeBatchItem():
+                        result = await self.calculate_event_avg_time(item.params)
+                    case EventTimeDistributionBatchItem():
+                        result = await self.calculate_event_time_distribution(
+                            item.params
+                        )
+                    case TotalEventsBatchItem():
+                        result = await self.get_events_total_count(item.params)
+                    case RepositoriesWithMultipleEventsBatchItem():
+                        result = await self.get_repositories_with_multiple_events(
+                            item.params
+                        )
+                    case EventsHistogramBatchItem():
+                        result = await self.get_events_histogram(item.params)
+                    case UniqueActorsBatchItem():
+                        result = await self.get_unique_actors(item.params)
+            except CalculationFailedError:
+                return MetricsBatchItemResponse(
+                    metric=item.metric,
+                    status_code=400,
+                    error="Not enough data for desired combination of input parameters in order to calculate the metric.",
+                )
+            except InvalidCursorError:
+                return MetricsBatchItemResponse(
+                    metric=item.metric,
+                    status_code=400,
+                    error="Invalid pagination cursor.",
+                )
+            except InvalidTimeRangeError:
+                return MetricsBatchItemResponse(
+                    metric=item.metric,
+                    status_code=400,
+                    error="Invalid time range for the requested bucket size.",
+                )
+            except DatabaseError:
+                return MetricsBatchItemResponse(
+                    metric=item.metric,
+                    status_code=500,
+                    error="Database connection error",
+                )
+            except Exception as e:
+                # Errors of the driver, timeouts of the pool, ... fail only the item
+                logger.exception(
+                    "metrics_controller.execute_metric.error",
+                    metric=item.metric,
+                    error=str(e),
+                )
+                return MetricsBatchItemResponse(
+                    metric=item.metric,
+                    status_code=500,
+                    error="Failed to calculate the metric.",
+                )
+
+        return MetricsBatchItemResponse(metric=item.metric, result=result)
+
+    @observe_latency
+    async def execute_batch(self, params: MetricsBatchRequest) -> MetricsBatchResponse:
+        # Results keep the order of the requests, a failed item doesn't fail the others
+        results = await asyncio.gather(
+            *(self.execute_metric(item) for item in params.requests)
+        )
+        logger.info(
+            "metrics_controller.execute_batch.successful",
+            requests_count=len(params.requests),
+            failed_count=sum(1 for r in results if r.error),
         )
+        return MetricsBatchResponse(results=results)
 
 
 def get_metrics_controller(request: Request) -> MetricsController:
@@ -0,0 +1,171 @@
+import heapq
+import math
+from collections.abc import Hashable, Iterable
+
+import numpy as np
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters summary with at most `capacity` counters.
+
+    Counts of monitored keys are overestimated by at most their recorded error. When the summary is full,
+    a new key replaces the key with the smallest count and inherits it as its error. Any key that isn't
+    monitored occurred at most `min_count` times.
+
+    Methods:
+        - add: Count `count` occurrences of a key.
+        - min_count: Upper bound of the count of keys that aren't monitored.
+        - items: Monitored keys with their (count, error).
+        - merge_top: Merge multiple summaries and return the top keys with their error bounds.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self._capacity = capacity
+        # key -> [count, error]
+        self._counters: dict[Hashable, list[int]] = {}
+        # Lazy min-heap of (count, key), entries whose count doesn't match the counter anymore are stale
+        self._heap: list[tuple[int, Hashable]] = []
+
+    def _push(self, key: Hashable, count: int) -> None:
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self._capacity:
+            # Drop the stale entries, so the heap stays bounded too
+            self._heap = [(c[0], k) for k, c in self._counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> tuple[Hashable, list[int]]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter and counter[0] == count:
+                return key, self._counters.pop(key)
+
+    def add(self, key: Hashable, count: int = 1) -> None:
+        if counter := self._counters.get(key):
+            counter[0] += count
+        elif len(self._counters) < self._capacity:
+            counter = self._counters[key] = [count, 0]
+        else:
+            _, (min_count, _) = self._pop_min()
+            counter = self._counters[key] = [min_count + count, min_count]
+        self._push(key, counter[0])
+
+    def min_count(self) -> int:
+        if len(self._counters) < self._capacity:
+            return 0
+        while True:
+            count, key = self._heap[0]
+            counter = self._counters.get(key)
+            if counter and counter[0] == count:
+                return count
+            heapq.heappop(self._heap)
+
+    def items(self) -> Iterable[tuple[Hashable, tuple[int, int]]]:
+        return ((key, (count, error)) for key, (count, error) in self._counters.items())
+
+    @staticmethod
+    def merge_top(
+        summaries: Iterable["SpaceSaving"], k: int
+    ) -> list[tuple[Hashable, int, int]]:
+        # Counts are summed across summaries. A key missing in a full summary may have occurred up to its
+        # `min_count` times there, which is added to the error. Returns (key, count, error) of the top `k` keys,
+        # the true count of each of them lies within count ± error.
+        counts: dict[Hashable, list[int]] = {}
+        missing_error = 0
+        for summary in summaries:
+            min_count = summary.min_count()
+            missing_error += min_count
+            for key, (count, error) in summary.items():
+                if merged := counts.get(key):
+                    merged[0] += count
+                    merged[1] += error - min_count
+                else:
+                    counts[key] = [count, error - min_count]
+
+        return [
+            (key, count, error + missing_error)
+            for key, (count, error) in heapq.nlargest(
+                k, counts.items(), key=lambda item: item[1][0]
+            )
+        ]
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct count sketch with 2^`precision` registers.
+
+    Sketches of the same precision are merged by taking the maximum of each register, so a sketch per time
+    bucket can be combined into any range of buckets. The relative standard error of the estimate is
+    1.04 / sqrt(2^`precision`), 1.6 % with the default precision.
+
+    Methods:
+        - add: Add an integer value.
+        - merge: Merge another sketch into this one.
+        - estimate: Estimated number of distinct values added.
+        - from_bytes: Load a sketch serialized by `to_bytes`.
+        - to_bytes: Serialize the sketch, sparse sketches are stored as (index, rank) pairs only.
+    """
+
+    precision = 12
+    _mask = (1 << 64) - 1
+    _sparse_dtype = np.dtype([("index", "<u2"), ("rank", "u1")])
+
+    def __init__(self) -> None:
+        self._registers = np.zeros(1 << self.precision, dtype=np.uint8)
+
+    @classmethod
+    def relative_error(cls) -> float:
+        return 1.04 / math.sqrt(1 << cls.precision)
+
+    @classmethod
+    def _hash(cls, value: int) -> int:
+        # splitmix64 finalizer, spreads sequential ids over all 64 bits
+        z = (value + 0x9E3779B97F4A7C15) & cls._mask
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & cls._mask
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & cls._mask
+        return z ^ (z >> 31)
+
+    def add(self, value: int) -> None:
+        # The first `precision` bits select the register, it keeps the longest run of leading zeros seen in the rest
+        value_hash = self._hash(value)
+        rest_bits = 64 - self.precision
+        index = value_hash >> rest_bits
+        rank = rest_bits - (value_hash & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self._registers, other._registers, out=self._registers)
+
+    def estimate(self) -> float:
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw_estimate = (
+            alpha * m * m / np.ldexp(1.0, -self._registers.astype(np.int32)).sum()
+        )
+        zeros = m - np.count_nonzero(self._registers)
+        if raw_estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * math.log(m / zeros)
+        return float(raw_estimate)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        sketch = cls()
+        if len(data) == len(sketch._registers):
+            sketch._registers = np.frombuffer(data, dtype=np.uint8).copy()
+        else:
+            sparse = np.frombuffer(data, dtype=cls._sparse_dtype)
+            sketch._registers[sparse["index"]] = sparse["rank"]
+        return sketch
+
+    def to_bytes(self) -> bytes:
+        indices = np.flatnonzero(self._registers)
+        if len(indices) * self._sparse_dtype.itemsize >= len(self._registers):
+            return self._registers.tobytes()
+
+        sparse = np.empty(len(indices), dtype=self._sparse_dtype)
+        sparse["index"] = indices
+        sparse["rank"] = self._registers[indices]
+        return sparse.tobytes()
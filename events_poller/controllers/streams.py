@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Annotated
+
+from fastapi import Depends, Request
+
+from events_poller.controllers.cache import current_values_only
+from events_poller.controllers.metrics import MetricsController
+from events_poller.logger import logger
+from events_poller.models.models import MetricsBatchItem
+from events_poller.settings import MetricsStreamConfig
+
+
+@dataclass
+class _Stream:
+    subscribers: set[asyncio.Queue[str]] = field(default_factory=set)
+    producer: asyncio.Task | None = None
+    # Latest computed value, sent to new subscribers right away
+    value: str | None = None
+
+
+class MetricsStreams:
+    """
+    Pushes metric updates to server-sent events subscribers.
+
+    - Subscribers of the same metric and parameters share one stream. A single producer task per stream
+      computes the metric and fans the result out to all of them, only when it differs from the previous one.
+    - `run` checks the data watermark (latest `inserted_at`) every `interval` seconds and wakes up all
+      producers when it moves, or at least every `max_interval` seconds. So each update tick costs one
+      computation per distinct parameter set, regardless of the number of subscribers.
+    - Each subscriber holds the latest value only, a slow client skips intermediate updates instead of
+      buffering them. The producer is stopped when the last subscriber leaves.
+
+    Methods:
+        - run: Long-running task checking the watermark and waking up the producers, stops them when cancelled.
+        - subscribe: Yields the current value of a metric and its updates as server-sent events.
+    """
+
+    def __init__(
+        self,
+        metrics_controller: MetricsController,
+        metrics_stream_config: MetricsStreamConfig,
+    ) -> None:
+        self._metrics_controller = metrics_controller
+        self._config = metrics_stream_config
+
+        self._streams: dict[str, _Stream] = {}
+        # Replaced on every update tick, producers wait for the one which was current when they started computing
+        self._updated = asyncio.Event()
+
+    @staticmethod
+    def _put_latest(queue: asyncio.Queue[str], value: str) -> None:
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(value)
+
+    def _notify(self) -> None:
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def _produce(self, stream: _Stream, item: MetricsBatchItem) -> None:
+        # The metric is recomputed because the watermark moved, a snapshot of the previous one would hide the
+        # update. The producer runs in its own task, so the flag doesn't leak to other callers.
+        current_values_only.set(True)
+        while True:
+            updated = self._updated
+            try:
+                result = await self._metrics_controller.execute_metric(item)
+            except Exception as e:
+                logger.exception(
+                    "metrics_streams.produce.error",
+                    metric=item.metric,
+                    error=str(e),
+                )
+            else:
+                value = result.model_dump_json()
+                if value != stream.value:
+                    stream.value = value
+                    for queue in stream.subscribers:
+                        self._put_latest(queue, value)
+            await updated.wait()
+
+    async def run(self) -> None:
+        watermark = None
+        notified_at = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(self._config.interval)
+                if not self._streams:
+                    continue
+
+                try:
+                    current_watermark = await self._metrics_controller.get_watermark()
+                except Exception as e:
+                    logger.warning("metrics_streams.watermark.error", error=str(e))
+                    continue
+
+                if (
+                    current_watermark != watermark
+                    or time.monotonic() - notified_at >= self._config.max_interval
+                ):
+                    watermark = current_watermark
+                    notified_at = time.monotonic()
+                    self._notify()
+        finally:
+            # Producers would otherwise keep querying the database while it's being disposed
+            producers = [s.producer for s in self._streams.values() if s.producer]
+            for producer in producers:
+                producer.cancel()
+            await asyncio.gather(*producers, return_exceptions=True)
+
+    async def subscribe(self, item: MetricsBatchItem) -> AsyncIterator[str]:
+        key = item.model_dump_json()
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=1)
+        if not (stream := self._streams.get(key)):
+            stream = self._streams[key] = _Stream()
+            stream.producer = asyncio.create_task(self._produce(stream, item))
+            logger.info("metrics_streams.stream_started", metric=item.metric, key=key)
+        elif stream.value is not None:
+            queue.put_nowait(stream.value)
+        stream.subscribers.add(queue)
+
+        try:
+            while True:
+                try:
+                    value = await asyncio.wait_for(queue.get(), self._config.heartbeat)
+                except TimeoutError:
+                    yield ": heartbeat\n\n"
+                else:
+                    yield f"event: {item.metric}\ndata: {value}\n\n"
+        finally:
+            stream.subscribers.discard(queue)
+            if not stream.subscribers:
+                del self._streams[key]
+                if stream.producer:
+                    stream.producer.cancel()
+                logger.info(
+                    "metrics_streams.stream_stopped", metric=item.metric, key=key
+                )
+
+
+def get_metrics_streams(request: Request) -> MetricsStreams:
+    return request.app.state.metrics_streams
+
+
+MetricsStreamsDependency = Annotated[MetricsStreams, Depends(get_metrics_streams)]
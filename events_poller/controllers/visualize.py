@@ -1,16 +1,108 @@
+import asyncio
+import functools
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Annotated
 
+import numpy as np
 import plotly.graph_objects as go
+import plotly.io as pio
 
-from fastapi import Depends
-from events_poller.controllers.metrics import MetricsControllerDependency
-from events_poller.models.enum import EventTypeEnum, GraphTypeEnum
+from fastapi import Depends, Request
+from events_poller.controllers.cache import MetricsCache
+from events_poller.controllers.downsampling import lttb
+from events_poller.controllers.metrics import MetricsController
+from events_poller.models.enum import EventTypeEnum, FigureFormatEnum, GraphTypeEnum
 from events_poller.logger import logger
 from events_poller.models.models import (
-    EventAvgTimeMetricRequest,
     EventAvgTimeVisualizeRequest,
     TotalEventsMetricRequest,
 )
+from events_poller.settings import CacheConfig, VisualizationConfig
+
+
+COLORS = ("darkred", "darkkhaki", "darkorange")
+
+
+def build_avg_time_figure(
+    time_diff_per_type: dict[EventTypeEnum, np.ndarray],
+    max_points: int,
+    webgl_threshold: int,
+) -> go.Figure:
+    fig = go.Figure()
+
+    for _color, (_event, time_diff_per_pair) in zip(COLORS, time_diff_per_type.items()):
+        avg_time = (
+            round(float(time_diff_per_pair.mean()), 2)
+            if time_diff_per_pair.size
+            else 0.0
+        )
+
+        points_count = time_diff_per_pair.size
+        x = np.arange(points_count)
+        y = time_diff_per_pair
+        # The legend reports the original number of points, the average is computed from all of them
+        legend = f"{points_count:,} pairs"
+        if points_count > max_points:
+            indices = lttb(x, y, max_points)
+            x, y = indices, y[indices]
+            legend += f", {indices.size:,} shown"
+
+        scatter = go.Scattergl if points_count > webgl_threshold else go.Scatter
+        fig.add_trace(
+            scatter(
+                x=x,
+                y=y,
+                mode="markers",
+                name=f"{_event} - diff time ({legend})",
+                line=dict(color=_color, width=1, dash="dot"),
+            )
+        )
+        fig.add_hline(
+            y=avg_time,
+            showlegend=True,
+            name=f"{_event} - avg time of {avg_time} seconds",
+            line=dict(color=_color, width=1, dash="longdash"),
+        )
+
+    fig.update_layout(
+        title="Average time between events",
+        title_x=0.5,
+        xaxis_title="Events",
+        yaxis_title="Time Between Events",
+        margin=dict(l=40, r=20, t=60, b=40),
+        showlegend=True,
+        legend_title_text="Event Type",
+    )
+    return fig
+
+
+def build_total_count_figure(events_count: dict[str, int], offset: int) -> go.Figure:
+    fig = go.Figure(go.Bar(x=list(events_count.keys()), y=list(events_count.values())))
+    fig.update_layout(
+        title=f"Events distribution by their type within the last {offset} seconds",
+        title_x=0.5,
+        xaxis_title="Event Type",
+        yaxis_title="Events Count",
+        margin=dict(l=40, r=20, t=60, b=40),
+    )
+    return fig
+
+
+def render_figure(
+    build_figure: Callable[[], go.Figure], figure_format: FigureFormatEnum
+) -> str:
+    # Runs in the render pool, downsampling, building and serializing a figure is CPU-bound and would
+    # stall the event loop. Only the metric data is sent to the pool.
+    figure = build_figure()
+    match figure_format:
+        case FigureFormatEnum.HTML:
+            return pio.to_html(
+                figure, full_html=True, include_plotlyjs="cdn", validate=False
+            )
+        case FigureFormatEnum.JSON:
+            return pio.to_json(figure, validate=False)
 
 
 class VisualizeController:
@@ -21,100 +113,82 @@ class VisualizeController:
     It leverages the MetricsController to fetch processed data and renders them into
     interactive charts such as:
 
-    - Scatter plots with average time between events
+    - Scatter plots with average time between events, downsampled to `max_points` points per trace
+      and rendered with WebGL above `webgl_threshold` points, so their size is bounded
     - Bar charts representing event type distributions
 
+    Only the metric data is fetched on the event loop. Figures are downsampled, built and serialized to HTML
+    or Plotly JSON in a pool of `render_workers` processes, so rendering doesn't stall the event loop.
+    Rendered output is cached per graph, format and parameters, and invalidated when the data watermark moves.
+
     Methods:
-        - get_graph: Dispatcher method selecting the graph type to generate.
-        - _get_avg_time_graph: Visualizes time differences and averages between events.
-        - _get_total_count_graph: Displays a bar chart of event type counts.
+        - render: Returns a rendered graph, from the cache if possible.
+        - close: Shuts the render pool down.
+        - get_graph: Dispatcher method fetching the data of a graph type, returns the function building its figure.
+        - _get_avg_time_graph: Fetches time differences between events, returns the scatter plot builder.
+        - _get_total_count_graph: Fetches event type counts, returns the bar chart builder.
     """
 
-    def __init__(self, metrics_controller: MetricsControllerDependency):
+    def __init__(
+        self,
+        metrics_controller: MetricsController,
+        visualization_config: VisualizationConfig,
+    ):
         self._metrics_controller = metrics_controller
-        self._colors = ["darkred", "darkkhaki", "darkorange"]
+        self._config = visualization_config
 
-    async def _get_avg_time_graph(
-        self, params: EventAvgTimeVisualizeRequest
-    ) -> go.Figure:
-        async def _get_time_diff_per_event_type(
-            params: EventAvgTimeVisualizeRequest,
-        ) -> list[float]:
-            event_metric_param = EventAvgTimeMetricRequest(
-                event_type=params.event_type,
-                action=params.action,
-                repository_name=params.repository_name,
-            )
-            events_sorted = await self._metrics_controller.get_events_sorted_by_time(
-                event_metric_param
+        # Spawned workers don't inherit the API's event loop and database connections
+        self._render_pool: Executor = (
+            ProcessPoolExecutor(
+                visualization_config.render_workers,
+                mp_context=multiprocessing.get_context("spawn"),
             )
-            return self._metrics_controller.get_time_diff_per_event_pair(events_sorted)
-
-        fig = go.Figure()
-
-        events_to_plot = (
-            [params.event_type] if params.event_type else list(EventTypeEnum)
+            if visualization_config.render_workers > 0
+            else ThreadPoolExecutor(1)
         )
-        for _color, _event in zip(self._colors, events_to_plot):
-            _params = EventAvgTimeVisualizeRequest(
-                event_type=_event,
-                action=params.action,
-                repository_name=params.repository_name,
-            )
-            time_diff_per_pair = await _get_time_diff_per_event_type(_params)
-            avg_time = round(sum(time_diff_per_pair) / (len(time_diff_per_pair) - 1), 2)
-
-            fig.add_trace(
-                go.Scatter(
-                    x=[i for i in range(len(time_diff_per_pair) - 1)],
-                    y=time_diff_per_pair,
-                    mode="markers",
-                    name=f"{_event} - diff time",
-                    line=dict(color=_color, width=1, dash="dot"),
-                )
-            )
-            fig.add_hline(
-                y=avg_time,
-                showlegend=True,
-                name=f"{_event} - avg time of {avg_time} seconds",
-                line=dict(color=_color, width=1, dash="longdash"),
+        self._cache = (
+            MetricsCache(
+                CacheConfig(
+                    max_entries=visualization_config.cache_entries,
+                    ttl=visualization_config.cache_ttl,
+                    refresh_interval=0,
+                ),
+                metrics_controller.get_watermark,
             )
+            if visualization_config.cache_entries > 0
+            else None
+        )
 
-        fig.update_layout(
-            title="Average time between events",
-            title_x=0.5,
-            xaxis_title="Events",
-            yaxis_title="Time Between Events",
-            margin=dict(l=40, r=20, t=60, b=40),
-            showlegend=True,
-            legend_title_text="Event Type",
+    async def _get_avg_time_graph(
+        self, params: EventAvgTimeVisualizeRequest
+    ) -> Callable[[], go.Figure]:
+        time_diff_per_type = (
+            await self._metrics_controller.get_time_diff_per_event_type(params)
+        )
+        return functools.partial(
+            build_avg_time_figure,
+            time_diff_per_type,
+            self._config.max_points,
+            self._config.webgl_threshold,
         )
-        return fig
 
     async def _get_total_count_graph(
         self, params: TotalEventsMetricRequest
-    ) -> go.Figure:
+    ) -> Callable[[], go.Figure]:
         events_total_count = await self._metrics_controller.get_events_total_count(
             params
         )
-        event_types_real = events_total_count.events_count.model_dump(exclude="total")
-        fig = go.Figure(
-            go.Bar(x=list(event_types_real.keys()), y=list(event_types_real.values()))
-        )
-        fig.update_layout(
-            title=f"Events distribution by their type within the last {params.offset} seconds",
-            title_x=0.5,
-            xaxis_title="Event Type",
-            yaxis_title="Events Count",
-            margin=dict(l=40, r=20, t=60, b=40),
+        return functools.partial(
+            build_total_count_figure,
+            events_total_count.events_count.model_dump(exclude="total"),
+            params.offset,
         )
-        return fig
 
     async def get_graph(
         self,
         params: EventAvgTimeVisualizeRequest | TotalEventsMetricRequest,
         graph_type: GraphTypeEnum,
-    ) -> go.Figure:
+    ) -> Callable[[], go.Figure]:
         match graph_type:
             case GraphTypeEnum.AVG_TIME:
                 logger.info("Requesting graph to visualize", graph_type=graph_type)
@@ -125,11 +199,37 @@ class VisualizeController:
             case _:
                 raise ValueError
 
+    async def _render(
+        self,
+        params: EventAvgTimeVisualizeRequest | TotalEventsMetricRequest,
+        graph_type: GraphTypeEnum,
+        figure_format: FigureFormatEnum,
+    ) -> str:
+        build_figure = await self.get_graph(params=params, graph_type=graph_type)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._render_pool, render_figure, build_figure, figure_format
+        )
+
+    async def render(
+        self,
+        params: EventAvgTimeVisualizeRequest | TotalEventsMetricRequest,
+        graph_type: GraphTypeEnum,
+        figure_format: FigureFormatEnum,
+    ) -> str:
+        if not self._cache:
+            return await self._render(params, graph_type, figure_format)
+
+        return await self._cache.get_or_compute(
+            (graph_type, figure_format, params.model_dump_json()),
+            lambda: self._render(params, graph_type, figure_format),
+        )
+
+    def close(self) -> None:
+        self._render_pool.shutdown(cancel_futures=True)
+
 
-def get_visualize_controller(
-    metrics_controller: MetricsControllerDependency,
-) -> VisualizeController:
-    return VisualizeController(metrics_controller)
+def get_visualize_controller(request: Request) -> VisualizeController:
+    return request.app.state.visualize_controller
 
 
 VisualizeControllerDependency = Annotated[
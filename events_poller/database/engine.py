@@ -1,15 +1,21 @@
+import asyncio
+from collections.abc import Callable, Sequence
 from contextlib import asynccontextmanager
+import time
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
 )
+from sqlalchemy.sql import Executable
 
 import asyncpg
 
 from events_poller.logger import logger
+from events_poller.models.models import PoolStatusModel
 from events_poller.settings import DatabaseConfig
 
 
@@ -22,13 +28,24 @@ class Database:
         self._engine = self._create_engine()
         self._session = async_sessionmaker(self._engine)
 
+        # Pool usage statistics, see `pool_status`
+        self._waiters = 0
+        self._checkouts = 0
+        self._checkout_wait_total = 0.0
+        self._checkout_wait_max = 0.0
+
     def _create_engine(self) -> AsyncEngine:
         # Create an async engine with connection pool
+        pool_config = self._db_config.pool_config
         try:
             return create_async_engine(
                 "postgresql+asyncpg://",
                 async_creator=self._get_connection,
-                **self._db_config.pool_config.model_dump(),
+                pool_pre_ping=pool_config.pool_pre_ping,
+                pool_recycle=pool_config.pool_recycle,
+                pool_size=pool_config.pool_size,
+                max_overflow=pool_config.max_overflow,
+                pool_timeout=pool_config.pool_timeout,
             )
         except Exception as e:
             logger.exception("database.error", error=str(e))
@@ -42,7 +59,45 @@ class Database:
             user=self._db_config.user,
             password=self._db_config.password,
             database=self._db_config.database,
+            statement_cache_size=self._db_config.pool_config.statement_cache_size,
+            server_settings=self._db_config.pool_config.server_settings,
+        )
+
+    async def listen(
+        self,
+        channel: str,
+        on_notification: Callable[[str], None],
+        on_termination: Callable[[], None],
+    ) -> asyncpg.Connection:
+        # Dedicated connection outside of the pool, it stays subscribed until the caller closes it
+        connection = await self._get_connection()
+        await connection.add_listener(
+            channel,
+            lambda _connection, _pid, _channel, payload: on_notification(payload),
         )
+        connection.add_termination_listener(lambda _connection: on_termination())
+        logger.info("database.listen.successful", channel=channel)
+        return connection
+
+    @asynccontextmanager
+    async def _checkout(self) -> AsyncGenerator[AsyncConnection, None]:
+        # Acquire a connection from the pool and measure how long the caller had to wait for it
+        self._waiters += 1
+        started = time.perf_counter()
+        try:
+            connection = await self._engine.connect()
+        finally:
+            self._waiters -= 1
+
+        wait_time = time.perf_counter() - started
+        self._checkouts += 1
+        self._checkout_wait_total += wait_time
+        self._checkout_wait_max = max(self._checkout_wait_max, wait_time)
+
+        try:
+            yield connection
+        finally:
+            await connection.close()
 
     @asynccontextmanager
     async def get_session(
@@ -50,14 +105,75 @@ class Database:
     ) -> AsyncGenerator[AsyncSession, None]:
         # yield a session from connection pool and commit transaction when `commit == True`
         # If an exception occurs, rollback to maintain ACID compliance.
-        async with self._session() as session:
-            try:
-                yield session
-                if commit:
-                    await session.commit()
-            except Exception:
-                await session.rollback()
-                raise
+        async with self._checkout() as connection:
+            async with self._session(bind=connection) as session:
+                try:
+                    yield session
+                    if commit:
+                        await session.commit()
+                except Exception:
+                    await session.rollback()
+                    raise
+
+    async def _warm_up_connection(
+        self, statements: Sequence[Executable], barrier: asyncio.Barrier
+    ) -> None:
+        try:
+            async with self._checkout() as connection:
+                for statement in statements:
+                    await connection.execute(statement)
+
+                # Hold the connection until all of them are opened, otherwise the pool would hand out the same one
+                await barrier.wait()
+        except Exception:
+            await barrier.abort()
+            raise
+
+    async def warm_up(self, statements: Sequence[Executable] = ()) -> None:
+        # Open `warmup_connections` connections up front and execute hot statements on each of them,
+        # so the first requests after startup don't pay for connecting and preparing statements.
+        connections_count = min(
+            self._db_config.pool_config.warmup_connections,
+            self._db_config.pool_config.pool_size,
+        )
+        if connections_count <= 0:
+            return
+
+        started = time.perf_counter()
+        barrier = asyncio.Barrier(connections_count)
+        try:
+            await asyncio.gather(
+                *(
+                    self._warm_up_connection(statements, barrier)
+                    for _ in range(connections_count)
+                )
+            )
+        except Exception as e:
+            # Warm-up is an optimization only, the pool recovers lazily on the first requests
+            logger.warning("database.warm_up.failed", error=str(e))
+            return
+
+        logger.info(
+            "database.warm_up.successful",
+            connections_count=connections_count,
+            statements_count=len(statements),
+            duration=round(time.perf_counter() - started, 3),
+        )
+
+    def pool_status(self) -> PoolStatusModel:
+        pool = self._engine.pool
+        return PoolStatusModel(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            waiters=self._waiters,
+            checkouts=self._checkouts,
+            checkout_wait_avg=(
+                self._checkout_wait_total / self._checkouts if self._checkouts else 0.0
+            ),
+            checkout_wait_max=self._checkout_wait_max,
+        )
 
     async def close_connection(self) -> None:
         # Close all connections in the pool to prevent memory leaks.
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import BigInteger, DateTime, String
+from sqlalchemy import BigInteger, DateTime, Index, LargeBinary, String
 from sqlalchemy import Enum as SAEnum
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.sql.functions import now
@@ -13,6 +13,10 @@ class Base(DeclarativeBase):
 
 class Events(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_event_type_created_at", "event_type", "created_at"),
+        Index("ix_events_created_at_event_id", "created_at", "event_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     event_id: Mapped[int] = mapped_column(BigInteger, nullable=False, unique=True)
@@ -27,5 +31,19 @@ class Events(Base):
     )
     action: Mapped[str] = mapped_column(String, nullable=False, index=True)
     inserted_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=now()
+        DateTime(timezone=True), nullable=False, server_default=now(), index=True
+    )
+
+
+class ActorSketches(Base):
+    # HyperLogLog sketch of actor ids per repository, event type and day, maintained on insert
+    __tablename__ = "actor_sketches"
+
+    repository_name: Mapped[str] = mapped_column(String, primary_key=True)
+    event_type: Mapped[EventTypeEnum] = mapped_column(
+        SAEnum(EventTypeEnum), primary_key=True
+    )
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
     )
+    registers: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
@@ -10,3 +10,34 @@ class EventTypeEnum(StrEnum):
 class GraphTypeEnum(StrEnum):
     AVG_TIME = "avg-time"
     TOTAL_COUNT = "total-count"
+
+
+class FigureFormatEnum(StrEnum):
+    HTML = "html"
+    JSON = "json"
+
+
+class MetricTypeEnum(StrEnum):
+    EVENT_AVG_TIME = "event-avg-time"
+    EVENT_TIME_DISTRIBUTION = "event-time-distribution"
+    EVENTS_TOTAL_COUNT = "events-total-count"
+    MULTIPLE_EVENTS_REPOS = "multiple-events-repos"
+    EVENTS_HISTOGRAM = "events-histogram"
+    UNIQUE_ACTORS = "unique-actors"
+
+
+class HistogramBucketEnum(StrEnum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+
+class SortOrderEnum(StrEnum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+class ExportFormatEnum(StrEnum):
+    NDJSON = "application/x-ndjson"
+    CSV = "text/csv"
+    ARROW = "application/vnd.apache.arrow.stream"
@@ -1,7 +1,20 @@
 from datetime import datetime
-from pydantic import AnyHttpUrl, BaseModel, ConfigDict, PositiveInt
+from typing import Annotated, Literal
+from pydantic import (
+    AnyHttpUrl,
+    AwareDatetime,
+    BaseModel,
+    ConfigDict,
+    Field,
+    PositiveInt,
+)
 
-from events_poller.models.enum import EventTypeEnum
+from events_poller.models.enum import (
+    EventTypeEnum,
+    HistogramBucketEnum,
+    MetricTypeEnum,
+    SortOrderEnum,
+)
 
 
 class EventModel(BaseModel):
@@ -18,11 +31,20 @@ class EventModel(BaseModel):
 
 class GitHubApiResponseMetaModel(BaseModel):
     data: list[EventModel]
+    fetched_at: datetime
     sleep: int
     rate_limited: bool = False
     pagination_link: AnyHttpUrl | None = None
 
 
+class QueuedEventsModel(BaseModel):
+    events: list[EventModel]
+    # When the GitHub response was received, compared with the `created_at` of the events
+    fetched_at: datetime
+    # `time.monotonic()` when the batch was put into the queue
+    enqueued_at: float
+
+
 class MetricBaseRequest(BaseModel):
     repository_name: str | None = None
     action: str | None = None
@@ -32,6 +54,11 @@ class EventAvgTimeMetricRequest(MetricBaseRequest):
     event_type: EventTypeEnum = EventTypeEnum.PR_EVENT
 
 
+class EventTimeDistributionRequest(EventAvgTimeMetricRequest):
+    # Quantiles from a logarithmic sketch with bounded relative error instead of sorting all the gaps
+    approximate: bool = False
+
+
 class EventAvgTimeVisualizeRequest(MetricBaseRequest):
     event_type: EventTypeEnum | None = None
 
@@ -43,6 +70,44 @@ class TotalEventsMetricRequest(MetricBaseRequest):
 class RepositoriesWithMultipleEventsRequest(BaseModel):
     event_type: EventTypeEnum
     minimal_events_count: int = 2
+    # Repositories are sorted by events count (and name), `cursor` is `next_cursor` of the previous page
+    limit: Annotated[int, Field(ge=1, le=1000)] = 100
+    cursor: str | None = None
+    order: SortOrderEnum = SortOrderEnum.DESC
+    # Only count events from the last `offset` seconds, all of them by default. The window is fixed when
+    # the first page is requested, pages are consistent unless events created within it are inserted meanwhile.
+    offset: PositiveInt | None = None
+
+
+class TopRepositoriesRequest(BaseModel):
+    event_type: EventTypeEnum
+    offset: PositiveInt = 3600
+    k: Annotated[int, Field(ge=1, le=1000)] = 10
+    # Skip the in-memory summaries and count in the database
+    exact: bool = False
+
+
+class UniqueActorsRequest(BaseModel):
+    repository_name: str
+    event_type: EventTypeEnum | None = None
+    # UTC days including the current one
+    days: Annotated[int, Field(ge=1, le=365)] = 7
+    # Count distinct actors in the database instead of merging the sketches
+    exact: bool = False
+
+
+class EventsHistogramRequest(MetricBaseRequest):
+    event_type: EventTypeEnum | None = None
+    bucket: HistogramBucketEnum = HistogramBucketEnum.HOUR
+    # Defaults to the last 24 hours
+    created_since: AwareDatetime | None = None
+    created_until: AwareDatetime | None = None
+
+
+class EventsExportRequest(MetricBaseRequest):
+    event_type: EventTypeEnum | None = None
+    created_since: datetime | None = None
+    created_until: datetime | None = None
 
 
 class MetricBaseResponse(BaseModel):
@@ -55,6 +120,20 @@ class EventAvgTimeMetricResponse(MetricBaseResponse):
     avg_time: float
 
 
+class EventTimeDistributionResponse(MetricBaseResponse):
+    events_count: int
+    min_time: float
+    max_time: float
+    avg_time: float
+    stddev_time: float | None = None
+    p50_time: float
+    p90_time: float
+    p99_time: float
+    approximate: bool = False
+    # Upper bound of the relative error of approximate quantiles
+    relative_error: float = 0.0
+
+
 class GroupedEventsCountModel(BaseModel):
     pr_event: int
     watch_event: int
@@ -69,3 +148,158 @@ class TotalEventsMetricResponse(MetricBaseResponse):
 class RepositoriesWithMultipleEventsResponse(BaseModel):
     event_type: EventTypeEnum
     repositories: dict[str, int]
+    next_cursor: str | None = None
+
+
+class TopRepositoryModel(BaseModel):
+    repository_name: str
+    events_count: int
+    # The true count lies within `events_count` ± `max_error`
+    max_error: int = 0
+
+
+class TopRepositoriesResponse(BaseModel):
+    event_type: EventTypeEnum
+    offset: int
+    approximate: bool = False
+    repositories: list[TopRepositoryModel]
+
+
+class UniqueActorsResponse(BaseModel):
+    repository_name: str
+    event_type: EventTypeEnum | None = None
+    created_since: datetime
+    unique_actors: int
+    approximate: bool = False
+    # Relative standard error of the estimate, the bounds cover ~95 % of estimates (2 standard errors)
+    relative_error: float = 0.0
+    lower_bound: int
+    upper_bound: int
+
+
+class EventsHistogramBucketModel(BaseModel):
+    bucket_start: datetime
+    events_count: GroupedEventsCountModel
+
+
+class EventsHistogramResponse(BaseModel):
+    repository_name: str = "all"
+    bucket: HistogramBucketEnum
+    created_since: datetime
+    created_until: datetime
+    buckets: list[EventsHistogramBucketModel]
+
+
+class EventAvgTimeBatchItem(BaseModel):
+    metric: Literal[MetricTypeEnum.EVENT_AVG_TIME]
+    params: EventAvgTimeMetricRequest = EventAvgTimeMetricRequest()
+
+
+class EventTimeDistributionBatchItem(BaseModel):
+    metric: Literal[MetricTypeEnum.EVENT_TIME_DISTRIBUTION]
+    params: EventTimeDistributionRequest = EventTimeDistributionRequest()
+
+
+class TotalEventsBatchItem(BaseModel):
+    metric: Literal[MetricTypeEnum.EVENTS_TOTAL_COUNT]
+    params: TotalEventsMetricRequest
+
+
+class RepositoriesWithMultipleEventsBatchItem(BaseModel):
+    metric: Literal[MetricTypeEnum.MULTIPLE_EVENTS_REPOS]
+    params: RepositoriesWithMultipleEventsRequest
+
+
+class EventsHistogramBatchItem(BaseModel):
+    metric: Literal[MetricTypeEnum.EVENTS_HISTOGRAM]
+    params: EventsHistogramRequest = EventsHistogramRequest()
+
+
+class UniqueActorsBatchItem(BaseModel):
+    metric: Literal[MetricTypeEnum.UNIQUE_ACTORS]
+    params: UniqueActorsRequest
+
+
+MetricsBatchItem = Annotated[
+    EventAvgTimeBatchItem
+    | EventTimeDistributionBatchItem
+    | TotalEventsBatchItem
+    | RepositoriesWithMultipleEventsBatchItem
+    | EventsHistogramBatchItem
+    | UniqueActorsBatchItem,
+    Field(discriminator="metric"),
+]
+
+
+class MetricsBatchRequest(BaseModel):
+    requests: list[MetricsBatchItem] = Field(min_length=1, max_length=100)
+
+
+class MetricsBatchItemResponse(BaseModel):
+    metric: MetricTypeEnum
+    status_code: int = 200
+    result: (
+        EventAvgTimeMetricResponse
+        | EventTimeDistributionResponse
+        | TotalEventsMetricResponse
+        | RepositoriesWithMultipleEventsResponse
+        | EventsHistogramResponse
+        | UniqueActorsResponse
+        | None
+    ) = None
+    error: str | None = None
+
+
+class MetricsBatchResponse(BaseModel):
+    results: list[MetricsBatchItemResponse]
+
+
+class PoolStatusModel(BaseModel):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiters: int
+    checkouts: int
+    checkout_wait_avg: float
+    checkout_wait_max: float
+
+
+class CacheStatsModel(BaseModel):
+    entries: int
+    in_flight: int
+    hits: int
+    misses: int
+    hit_rate: float
+    stale_served: int
+    invalidations: int
+    evictions: int
+    refreshed_entries: int
+    refreshes: int
+    refresh_failures: int
+    watermark: datetime | None = None
+
+
+class FreshnessRequest(BaseModel):
+    # Events inserted within the last `window` seconds
+    window: PositiveInt = 3600
+
+
+class FreshnessResponse(BaseModel):
+    window: int
+    events_count: int
+    # Seconds between creation on GitHub and insertion of the events
+    lag_p50: float | None = None
+    lag_p90: float | None = None
+    lag_p99: float | None = None
+    lag_max: float | None = None
+    latest_inserted_at: datetime | None = None
+    latest_created_at: datetime | None = None
+    # Seconds since the newest stored event was created on GitHub
+    latest_event_age: float | None = None
+
+
+class EventsInsertedNotificationModel(BaseModel):
+    txid: int
+    # (oldest created_at timestamp, event type, repository name, action, events count)
+    events: list[tuple[float, EventTypeEnum, str, str, int]]
@@ -1,4 +1,5 @@
 import asyncio
+import time
 from datetime import datetime, timezone
 import re
 import httpx
@@ -6,7 +7,17 @@ from pydantic import AnyHttpUrl
 
 from events_poller.logger import logger
 from events_poller.models.enum import EventTypeEnum
-from events_poller.models.models import EventModel, GitHubApiResponseMetaModel
+from events_poller.models.models import (
+    EventModel,
+    GitHubApiResponseMetaModel,
+    QueuedEventsModel,
+)
+from events_poller.prometheus import (
+    GITHUB_RATE_LIMIT_REMAINING,
+    GITHUB_REQUEST_DURATION,
+    GITHUB_REQUESTS,
+    POLLER_EVENTS_FETCHED,
+)
 from events_poller.settings import GitHubApiConfig, GitHubApiParams
 
 
@@ -33,6 +44,8 @@ class GitHubApiPoller:
         retry_after = headers.get("retry-after")
         rate_limit_remaining = headers.get("x-ratelimit-remaining")
         rate_limit_reset = headers.get("x-ratelimit-reset")
+        if rate_limit_remaining:
+            GITHUB_RATE_LIMIT_REMAINING.set(int(rate_limit_remaining))
         logger.info(
             "rate limiting related header values",
             retry_after=retry_after,
@@ -89,12 +102,15 @@ class GitHubApiPoller:
     ) -> GitHubApiResponseMetaModel:
         try:
             logger.info("Trying to fetch data from GitHubApi", url=str(url))
-            res = await self._aclient.get(
-                str(url),
-                headers=self._config.headers.model_dump(),
-                params=params.model_dump() if params else params,
-            )
+            with GITHUB_REQUEST_DURATION.time():
+                res = await self._aclient.get(
+                    str(url),
+                    headers=self._config.headers.model_dump(),
+                    params=params.model_dump() if params else params,
+                )
+            fetched_at = datetime.now(timezone.utc)
             response_code = res.status_code
+            GITHUB_REQUESTS.labels(response_code).inc()
             res.raise_for_status()
         except httpx.HTTPStatusError:
             logger.warning("Http error from server", status_code=response_code)
@@ -106,6 +122,7 @@ class GitHubApiPoller:
         data = []
         if httpx.codes.is_success(response_code):
             data = self._parse_response(res)
+            POLLER_EVENTS_FETCHED.inc(len(data))
 
         rate_limit = self._calculate_sleep(res.headers)
         sleep = max(self._config.rate_limit_base, rate_limit)
@@ -113,6 +130,7 @@ class GitHubApiPoller:
 
         return GitHubApiResponseMetaModel(
             data=data,
+            fetched_at=fetched_at,
             sleep=sleep,
             rate_limited=rate_limit != 0,
             pagination_link=pagination_link,
@@ -127,7 +145,13 @@ class GitHubApiPoller:
             while True:
                 response_meta = await self._fetch_data(url, params)
                 if response_meta.data:
-                    await self._queue.put(response_meta.data)
+                    await self._queue.put(
+                        QueuedEventsModel(
+                            events=response_meta.data,
+                            fetched_at=response_meta.fetched_at,
+                            enqueued_at=time.monotonic(),
+                        )
+                    )
                 else:
                     logger.warning("No data fetched from the GitHubApi")
 
@@ -1,34 +1,83 @@
 import asyncio
+import signal
+
+from prometheus_client import REGISTRY, start_http_server
 
 from events_poller.controllers.database import DatabaseController
 from events_poller.database.engine import Database
 from events_poller.logger import logger
 from events_poller.poller.poller import GitHubApiPoller
 from events_poller.poller.worker import DBWorker
-from events_poller.settings import DatabaseConfig, GitHubApiConfig, poller_config
+from events_poller.profiling import SamplingProfiler, start_profiling_tasks
+from events_poller.prometheus import (
+    POLLER_QUEUE_DEPTH,
+    DatabasePoolCollector,
+    monitor_event_loop_lag,
+)
+from events_poller.settings import (
+    DatabaseConfig,
+    GitHubApiConfig,
+    LiveMetricsConfig,
+    PollerDatabasePoolConfig,
+    ProfilingConfig,
+    PrometheusConfig,
+    poller_config,
+)
 
 
 async def main() -> None:
     """
     Main entry point for the poller application.
 
-    - Initializes a shared database connection pool.
+    - Initializes a shared database connection pool and optionally warms it up.
     - Initializes an async queue where responses are stored
     - Spawns async DBWorker tasks for consuming a queue and storing GitHub event data to database.
     - Starts the GitHub API poller as a separate task pushing responses to queue.
+    - Optionally serves Prometheus metrics of the process on a separate HTTP listener.
+    - Optionally profiles the process, see `ProfilingConfig`.
     - All tasks are awaited concurrently via asyncio.gather.
     """
 
     # Create one database connection pool for all workers, they will acquire from it
     # pass it in the constructor of DBWorker
-    db = Database(DatabaseConfig())
-    controller = DatabaseController(db)
+    db = Database(DatabaseConfig(pool_config=PollerDatabasePoolConfig()))
+
+    # Publish summaries of inserted events for the live metrics of the API
+    live_metrics_config = LiveMetricsConfig()
+    controller = DatabaseController(
+        db,
+        notify_channel=(
+            live_metrics_config.channel if live_metrics_config.enabled else None
+        ),
+    )
 
     # Create a queue with max_size where the data will be put and processed by workers
     queue = asyncio.Queue(maxsize=poller_config.queue_size)
 
+    prometheus_config = PrometheusConfig()
+    if prometheus_config.enabled:
+        # Served from a daemon thread, metrics are read at scrape time
+        POLLER_QUEUE_DEPTH.set_function(queue.qsize)
+        REGISTRY.register(DatabasePoolCollector(db))
+        start_http_server(prometheus_config.poller_port)
+        logger.info(
+            "event_poller.prometheus_listener_started",
+            port=prometheus_config.poller_port,
+        )
+
+    # Sampling starts right away when enabled, SIGUSR1 starts or stops it at runtime
+    profiling_config = ProfilingConfig()
+    profiler = SamplingProfiler(
+        profiling_config.sampling_interval, profiling_config.sampling_output
+    )
+    if profiling_config.sampling_profiler:
+        profiler.start()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, profiler.toggle)
+
     # Create a new tasks for workers handling data in a queue
     try:
+        await db.warm_up()
+
         workers = [
             asyncio.create_task(
                 DBWorker(
@@ -46,11 +95,23 @@ async def main() -> None:
             GitHubApiPoller(gh_poller_config=GitHubApiConfig(), queue=queue).run()
         )
 
+        monitors = (
+            [
+                asyncio.create_task(
+                    monitor_event_loop_lag(prometheus_config.event_loop_lag_interval)
+                )
+            ]
+            if prometheus_config.enabled
+            else []
+        ) + start_profiling_tasks(profiling_config)
+
         # Add all tasks into event loop
-        await asyncio.gather(scheduler, *workers)
+        await asyncio.gather(scheduler, *workers, *monitors)
     except Exception:
         raise
     finally:
+        # Write the sampled stacks, if the profiler is running
+        profiler.stop()
         # Close connection gracefully
         await db.close_connection()
 
@@ -1,8 +1,20 @@
 import asyncio
+import time
+from datetime import datetime, timezone
+
 from events_poller.controllers.database import DatabaseController
 from events_poller.database.engine import Database
 from events_poller.logger import logger
-from events_poller.models.models import EventModel
+from events_poller.models.models import EventModel, QueuedEventsModel
+from events_poller.prometheus import (
+    INGEST_LAG,
+    POLLER_EVENTS_DUPLICATE,
+    POLLER_EVENTS_INSERTED,
+    POLLER_INSERT_BATCH_SIZE,
+    POLLER_INSERT_DURATION,
+    POLLER_INSERT_FAILURES,
+    POLLER_QUEUE_WAIT,
+)
 
 
 class DataInsertedMismatch(Exception): ...
@@ -24,15 +36,52 @@ class DBWorker:
         self._name = name
         self._queue = queue
 
+    @staticmethod
+    def _observe_ingest_lag(
+        inserted: list[EventModel], fetched_at: datetime, dequeued_at: datetime
+    ) -> None:
+        # Observed once per newly stored event in every stage, so the stages add up to the total.
+        # Duplicates are skipped, they were counted when they were stored for the first time.
+        committed_at = datetime.now(timezone.utc)
+        queue_lag = (dequeued_at - fetched_at).total_seconds()
+        insert_lag = (committed_at - dequeued_at).total_seconds()
+        fetch_histogram, queue_histogram, insert_histogram, total_histogram = (
+            INGEST_LAG.labels(stage) for stage in ("fetch", "queue", "insert", "total")
+        )
+        for event in inserted:
+            fetch_histogram.observe((fetched_at - event.created_at).total_seconds())
+            queue_histogram.observe(queue_lag)
+            insert_histogram.observe(insert_lag)
+            total_histogram.observe((committed_at - event.created_at).total_seconds())
+
     async def work(self) -> None:
         try:
             while True:
-                data_to_process: list[EventModel] = await self._queue.get()
+                queued_events: QueuedEventsModel = await self._queue.get()
+                dequeued_at = datetime.now(timezone.utc)
+                POLLER_QUEUE_WAIT.observe(time.monotonic() - queued_events.enqueued_at)
+                data_to_process = queued_events.events
                 logger.info("queue_task.found", worker_name=self._name)
 
                 try:
-                    data_inserted_count = await self._controller.insert_data_bulk(
-                        data_to_process
+                    POLLER_INSERT_BATCH_SIZE.observe(len(data_to_process))
+                    with POLLER_INSERT_DURATION.time():
+                        inserted_event_ids = await self._controller.insert_new_events(
+                            data_to_process
+                        )
+                    self._observe_ingest_lag(
+                        [
+                            e
+                            for e in data_to_process
+                            if e.event_id in inserted_event_ids
+                        ],
+                        queued_events.fetched_at,
+                        dequeued_at,
+                    )
+                    data_inserted_count = len(inserted_event_ids)
+                    POLLER_EVENTS_INSERTED.inc(data_inserted_count)
+                    POLLER_EVENTS_DUPLICATE.inc(
+                        len(data_to_process) - data_inserted_count
                     )
                     if len(data_to_process) != data_inserted_count:
                         logger.warning(
@@ -41,6 +90,7 @@ class DBWorker:
                         )
                     logger.info("queue_task.successful", worker_name=self._name)
                 except Exception as e:
+                    POLLER_INSERT_FAILURES.inc()
                     logger.exception(
                         "queue_task.error", worker_name=self._name, error=str(e)
                     )
@@ -0,0 +1,203 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import traceback
+from collections import Counter
+from types import FrameType
+
+from events_poller.logger import logger
+from events_poller.settings import ProfilingConfig
+
+
+def _collapse_stack(frame: FrameType | None) -> str:
+    # Root first, in the `frame;frame;frame` format of flame graph tools
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stack of a thread every `interval` seconds from a daemon thread.
+
+    The profiled thread isn't instrumented, so the overhead stays low and doesn't skew the timings. Samples
+    are aggregated as collapsed stacks (`frame;frame;frame count` per line), which flamegraph.pl, inferno or
+    speedscope turn into a flame graph.
+
+    Methods:
+        - start: Starts sampling the thread which created the profiler.
+        - stop: Stops sampling and writes the collected stacks to `output`.
+        - toggle: Starts or stops sampling, e.g. from a signal handler.
+    """
+
+    def __init__(self, interval: float, output: str) -> None:
+        self._interval = interval
+        self._output = output
+        self._thread_id = threading.get_ident()
+        self._stacks: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._stopped: threading.Event | None = None
+        self._sampler: threading.Thread | None = None
+
+    def _sample(self, stopped: threading.Event) -> None:
+        while not stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = _collapse_stack(frame)
+            with self._lock:
+                self._stacks[stack] += 1
+
+    def _dump(self) -> None:
+        with self._lock:
+            stacks = self._stacks.most_common()
+        with open(self._output, "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in stacks)
+        logger.info(
+            "sampling_profiler.dump.successful",
+            output=self._output,
+            samples_count=sum(count for _, count in stacks),
+        )
+
+    def start(self) -> None:
+        if self._sampler:
+            return
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(
+            target=self._sample,
+            args=(self._stopped,),
+            name="sampling-profiler",
+            daemon=True,
+        )
+        self._sampler.start()
+        logger.info("sampling_profiler.started", interval=self._interval)
+
+    def stop(self) -> None:
+        if not self._sampler or not self._stopped:
+            return
+        self._stopped.set()
+        self._sampler.join()
+        self._sampler = self._stopped = None
+        self._dump()
+
+    def toggle(self) -> None:
+        if self._sampler:
+            self.stop()
+        else:
+            self.start()
+
+
+class EventLoopStallMonitor:
+    """
+    Logs event loop stalls longer than `threshold` seconds together with the stack of the blocking code.
+
+    A task on the loop records a heartbeat, a watchdog thread checks it. When the heartbeat is late by more
+    than `threshold`, the watchdog logs the current stack of the loop's thread, i.e. the code that blocks
+    the loop while it's still running. When the loop resumes, the total duration of the stall is logged.
+
+    Methods:
+        - run: Long-running task recording heartbeats, runs the watchdog thread meanwhile.
+    """
+
+    def __init__(self, threshold: float) -> None:
+        self._threshold = threshold
+        self._interval = threshold / 4
+        self._heartbeat = time.monotonic()
+
+    def _watch(self, thread_id: int, stopped: threading.Event) -> None:
+        reported_heartbeat = None
+        while not stopped.wait(self._interval):
+            heartbeat = self._heartbeat
+            stalled_for = time.monotonic() - heartbeat - self._interval
+            if stalled_for > self._threshold and heartbeat != reported_heartbeat:
+                # Once per stall
+                reported_heartbeat = heartbeat
+                logger.warning(
+                    "event_loop_stall_monitor.stall_detected",
+                    stalled_for=round(stalled_for, 3),
+                    stack="".join(
+                        traceback.format_stack(sys._current_frames().get(thread_id))
+                    ),
+                )
+
+    async def run(self) -> None:
+        stopped = threading.Event()
+        watchdog = threading.Thread(
+            target=self._watch,
+            args=(threading.get_ident(), stopped),
+            name="event-loop-stall-monitor",
+            daemon=True,
+        )
+        watchdog.start()
+        try:
+            while True:
+                self._heartbeat = time.monotonic()
+                await asyncio.sleep(self._interval)
+                if (
+                    stalled_for := time.monotonic() - self._heartbeat - self._interval
+                ) > self._threshold:
+                    logger.warning(
+                        "event_loop_stall_monitor.stall_finished",
+                        stalled_for=round(stalled_for, 3),
+                    )
+        finally:
+            stopped.set()
+
+
+async def log_memory_snapshots(interval: float, limit: int, frames: int) -> None:
+    # Logs the top allocation sites and their growth since the previous snapshot, tracing stops with the task
+    tracemalloc.start(frames)
+    ignored = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+        tracemalloc.Filter(False, "<unknown>"),
+    )
+    previous = None
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            snapshot = tracemalloc.take_snapshot().filter_traces(ignored)
+            traced, peak = tracemalloc.get_traced_memory()
+            logger.info(
+                "tracemalloc.snapshot",
+                traced_kib=traced // 1024,
+                peak_kib=peak // 1024,
+                top=[str(stat) for stat in snapshot.statistics("lineno")[:limit]],
+                growth=(
+                    [
+                        str(stat)
+                        for stat in snapshot.compare_to(previous, "lineno")[:limit]
+                    ]
+                    if previous
+                    else []
+                ),
+            )
+            previous = snapshot
+    finally:
+        tracemalloc.stop()
+
+
+def start_profiling_tasks(profiling_config: ProfilingConfig) -> list[asyncio.Task]:
+    # Background tasks of the enabled loop stall monitor and memory snapshots, none by default
+    tasks = []
+    if profiling_config.stall_threshold:
+        tasks.append(
+            asyncio.create_task(
+                EventLoopStallMonitor(profiling_config.stall_threshold).run()
+            )
+        )
+    if profiling_config.tracemalloc_interval:
+        tasks.append(
+            asyncio.create_task(
+                log_memory_snapshots(
+                    profiling_config.tracemalloc_interval,
+                    profiling_config.tracemalloc_limit,
+                    profiling_config.tracemalloc_frames,
+                )
+            )
+        )
+    return tasks
@@ -0,0 +1,135 @@
+import asyncio
+import functools
+import time
+from collections.abc import Awaitable, Callable, Iterable
+
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from events_poller.database.engine import Database
+
+
+# Poller
+GITHUB_REQUESTS = Counter(
+    "github_requests", "Requests to the GitHub Events API.", ["status_code"]
+)
+GITHUB_REQUEST_DURATION = Histogram(
+    "github_request_duration_seconds", "Latency of requests to the GitHub Events API."
+)
+GITHUB_RATE_LIMIT_REMAINING = Gauge(
+    "github_rate_limit_remaining",
+    "Requests remaining in the current GitHub rate limit window.",
+)
+POLLER_EVENTS_FETCHED = Counter(
+    "poller_events_fetched", "Events of supported types fetched from GitHub."
+)
+POLLER_EVENTS_INSERTED = Counter(
+    "poller_events_inserted", "Fetched events newly stored in the database."
+)
+POLLER_EVENTS_DUPLICATE = Counter(
+    "poller_events_duplicate", "Fetched events skipped on insert as already stored."
+)
+POLLER_QUEUE_DEPTH = Gauge(
+    "poller_queue_depth", "Batches of fetched events waiting for a worker."
+)
+POLLER_QUEUE_WAIT = Histogram(
+    "poller_queue_wait_seconds", "Time batches of fetched events wait for a worker."
+)
+POLLER_INSERT_BATCH_SIZE = Histogram(
+    "poller_insert_batch_size",
+    "Events per inserted batch.",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+POLLER_INSERT_DURATION = Histogram(
+    "poller_insert_duration_seconds", "Latency of inserting a batch of events."
+)
+INGEST_LAG = Histogram(
+    "ingest_lag_seconds",
+    "Lag of newly stored events per pipeline stage: created on GitHub -> fetched (fetch), "
+    "fetched -> dequeued by a worker (queue), dequeued -> committed (insert) and created -> committed (total).",
+    ["stage"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200),
+)
+POLLER_INSERT_FAILURES = Counter(
+    "poller_insert_failures", "Batches of events which failed to be inserted."
+)
+
+# API and poller
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop in waking up a sleeping task, high values mean blocking code on the loop.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# API
+METRICS_CONTROLLER_DURATION = Histogram(
+    "metrics_controller_duration_seconds",
+    "Latency of MetricsController methods, including cache hits.",
+    ["method"],
+)
+
+
+def observe_latency[**P, R](
+    method: Callable[P, Awaitable[R]],
+) -> Callable[P, Awaitable[R]]:
+    # Observe the duration of every call of a controller method, labelled by the method name
+    histogram = METRICS_CONTROLLER_DURATION.labels(method.__name__)
+
+    @functools.wraps(method)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    # Sleeps `interval` seconds and observes how much later than that the loop resumed it
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(time.monotonic() - started - interval, 0))
+
+
+class DatabasePoolCollector(Collector):
+    """Exposes the connection pool status of a Database, read at scrape time."""
+
+    def __init__(self, database: Database) -> None:
+        self._database = database
+
+    def collect(self) -> Iterable[Metric]:
+        status = self._database.pool_status()
+
+        connections = GaugeMetricFamily(
+            "database_pool_connections",
+            "Connections of the database pool by state.",
+            labels=["state"],
+        )
+        connections.add_metric(["checked_in"], status.checked_in)
+        connections.add_metric(["checked_out"], status.checked_out)
+        # SQLAlchemy reports the unused part of the pool as negative overflow
+        connections.add_metric(["overflow"], max(status.overflow, 0))
+        yield connections
+
+        yield GaugeMetricFamily(
+            "database_pool_size", "Configured size of the database pool.", status.size
+        )
+        yield GaugeMetricFamily(
+            "database_pool_waiters",
+            "Callers waiting for a pooled connection.",
+            status.waiters,
+        )
+        yield CounterMetricFamily(
+            "database_pool_checkouts",
+            "Connections checked out of the database pool.",
+            status.checkouts,
+        )
+        yield GaugeMetricFamily(
+            "database_pool_checkout_wait_max_seconds",
+            "Longest wait for a pooled connection.",
+            status.checkout_wait_max,
+        )
@@ -1,4 +1,4 @@
-from pydantic import AnyHttpUrl, BaseModel
+from pydantic import AnyHttpUrl, BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,9 +7,32 @@ settings_model_config = SettingsConfigDict(
 )
 
 
-class DatabasePoolConfig(BaseModel):
+class DatabasePoolConfig(BaseSettings):
+    # SQLAlchemy connection pool
     pool_pre_ping: bool = True
     pool_recycle: int = 600
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30
+
+    # asyncpg connection, e.g. `{"jit": "off", "work_mem": "16MB", "statement_timeout": "30000"}`
+    statement_cache_size: int = 100
+    server_settings: dict[str, str] = {}
+
+    # Number of connections opened during startup, 0 disables the warm-up
+    warmup_connections: int = 0
+
+    model_config = SettingsConfigDict(settings_model_config, env_prefix="DB_POOL_")
+
+
+class ApiDatabasePoolConfig(DatabasePoolConfig):
+    model_config = SettingsConfigDict(settings_model_config, env_prefix="DB_API_POOL_")
+
+
+class PollerDatabasePoolConfig(DatabasePoolConfig):
+    model_config = SettingsConfigDict(
+        settings_model_config, env_prefix="DB_POLLER_POOL_"
+    )
 
 
 class DatabaseConfig(BaseSettings):
@@ -19,7 +42,7 @@ class DatabaseConfig(BaseSettings):
     password: str
     database: str
 
-    pool_config: DatabasePoolConfig = DatabasePoolConfig()
+    pool_config: DatabasePoolConfig = Field(default_factory=DatabasePoolConfig)
 
     model_config = SettingsConfigDict(settings_model_config, env_prefix="DB_")
 
@@ -31,6 +54,123 @@ class PollerConfig(BaseSettings):
     model_config = SettingsConfigDict(settings_model_config, env_prefix="POLLER_")
 
 
+class ExportConfig(BaseSettings):
+    # Rows fetched per keyset page, each page runs in its own short transaction
+    page_size: int = 5000
+
+    model_config = SettingsConfigDict(settings_model_config, env_prefix="EXPORT_")
+
+
+class CacheConfig(BaseSettings):
+    enabled: bool = True
+    ttl: float = 5
+    max_entries: int = 1024
+    # How long an invalidated entry may still be served while it is being recomputed
+    max_stale: float = 30
+    # How often the data watermark (latest `inserted_at`) is re-read from the database
+    watermark_interval: float = 1
+    # Refresh-ahead: every `refresh_interval` seconds the `refresh_keys` most requested entries are recomputed
+    # in the background and served regardless of the watermark, until they are `refresh_max_age` seconds old.
+    # Set `refresh_interval` to 0 to disable it.
+    refresh_interval: float = 10
+    refresh_keys: int = 16
+    refresh_max_age: float = 60
+
+    model_config = SettingsConfigDict(settings_model_config, env_prefix="CACHE_")
+
+
+class MetricsBatchConfig(BaseSettings):
+    # Metric requests of all `POST /metrics/batch` calls executed at once, keeps the batches from draining the pool
+    concurrency: int = 4
+
+    model_config = SettingsConfigDict(
+        settings_model_config, env_prefix="METRICS_BATCH_"
+    )
+
+
+class CompressionConfig(BaseSettings):
+    enabled: bool = True
+    # Smaller responses are sent uncompressed, compressing them costs more than it saves
+    minimum_size: int = 1000
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+    model_config = SettingsConfigDict(settings_model_config, env_prefix="COMPRESSION_")
+
+
+class LiveMetricsConfig(BaseSettings):
+    enabled: bool = True
+    channel: str = "events_inserted"
+    # Seconds of events kept in memory, total counts within this offset are served without the database
+    window: int = 3600
+    reconnect_interval: float = 5
+    # Repositories monitored per minute and event type by the heavy hitters summaries
+    top_repositories_capacity: int = 1000
+
+    model_config = SettingsConfigDict(settings_model_config, env_prefix="LIVE_METRICS_")
+
+
+class MetricsStreamConfig(BaseSettings):
+    # How often the data watermark is checked, streamed metrics are recomputed only when it moves
+    interval: float = 1
+    # Metrics are recomputed at least this often anyway, as counts relative to the current time change
+    # even when no event is inserted
+    max_interval: float = 30
+    # Idle streams get a comment every `heartbeat` seconds, so proxies don't close the connection
+    heartbeat: float = 15
+
+    model_config = SettingsConfigDict(
+        settings_model_config, env_prefix="METRICS_STREAM_"
+    )
+
+
+class VisualizationConfig(BaseSettings):
+    # Scatter traces with more points are downsampled (LTTB) to this many points
+    max_points: int = 5000
+    # Scatter traces with more points are rendered with WebGL
+    webgl_threshold: int = 1000
+    # Processes rendering figures off the event loop, 0 renders them in a thread of the API process instead
+    render_workers: int = 2
+    # Rendered figures are cached per parameters and data watermark, set `cache_entries` to 0 to disable it
+    cache_entries: int = 64
+    cache_ttl: float = 30
+
+    model_config = SettingsConfigDict(
+        settings_model_config, env_prefix="VISUALIZATION_"
+    )
+
+
+class PrometheusConfig(BaseSettings):
+    enabled: bool = True
+    # The API exposes its metrics on `GET /metrics`, the poller process on its own HTTP listener
+    poller_port: int = 8001
+    # How often both processes sample the lag of their event loop
+    event_loop_lag_interval: float = 0.25
+
+    model_config = SettingsConfigDict(settings_model_config, env_prefix="PROMETHEUS_")
+
+
+class ProfilingConfig(BaseSettings):
+    # Everything is disabled by default and costs nothing then
+    # API: `?profile=1` or the `X-Profile: 1` header returns a cProfile report instead of the response
+    request_profiling: bool = False
+    request_profile_sort: str = "cumulative"
+    request_profile_limit: int = 50
+    # Poller: stacks sampled every `sampling_interval` seconds are written to `sampling_output` as collapsed
+    # stacks on exit, SIGUSR1 starts and stops the sampling at runtime
+    sampling_profiler: bool = False
+    sampling_interval: float = 0.005
+    sampling_output: str = "poller-profile.folded"
+    # Both: event loop stalls longer than this many seconds are logged with the stack of the blocking code
+    stall_threshold: float | None = None
+    # Both: top `tracemalloc_limit` allocation sites and their growth are logged every `tracemalloc_interval` seconds
+    tracemalloc_interval: float | None = None
+    tracemalloc_limit: int = 10
+    tracemalloc_frames: int = 1
+
+    model_config = SettingsConfigDict(settings_model_config, env_prefix="PROFILING_")
+
+
 class GitHubApiHeaders(BaseModel):
     accept: str = "application/vnd.github+json"
 
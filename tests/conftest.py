@@ -1,4 +1,4 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Generator
 from contextlib import asynccontextmanager
 
 from httpx import ASGITransport, AsyncClient
@@ -9,9 +9,20 @@ import pytest_asyncio
 
 from events_poller.api.app import app
 from events_poller.controllers.database import DatabaseController
+from events_poller.controllers.export import ExportController, get_export_controller
 from events_poller.controllers.metrics import MetricsController, get_metrics_controller
+from events_poller.controllers.streams import MetricsStreams, get_metrics_streams
+from events_poller.controllers.visualize import (
+    VisualizeController,
+    get_visualize_controller,
+)
 from events_poller.database.engine import Database
-from events_poller.settings import DatabaseConfig
+from events_poller.settings import (
+    DatabaseConfig,
+    ExportConfig,
+    MetricsStreamConfig,
+    VisualizationConfig,
+)
 
 
 @pytest_asyncio.fixture(scope="session")
@@ -52,17 +63,53 @@ def database_controller(database: Database) -> DatabaseController:
 
 @pytest.fixture
 def metrics_controller(database_controller: DatabaseController) -> MetricsController:
-    return MetricsController(database_controller)
+    # Tests share one session, which can't execute statements concurrently
+    return MetricsController(database_controller, batch_concurrency=1)
+
+
+@pytest.fixture
+def export_controller(database_controller: DatabaseController) -> ExportController:
+    # Small pages, so the pagination is exercised even with the mock data
+    return ExportController(database_controller, ExportConfig(page_size=3))
+
+
+@pytest.fixture
+def visualize_controller(
+    metrics_controller: MetricsController,
+) -> Generator[VisualizeController]:
+    # Tiny limits, so downsampling and WebGL traces are exercised even with the mock data
+    visualize_controller = VisualizeController(
+        metrics_controller,
+        VisualizationConfig(max_points=3, webgl_threshold=3, render_workers=0),
+    )
+    yield visualize_controller
+    visualize_controller.close()
 
 
 @pytest_asyncio.fixture
 async def api_client(
     metrics_controller: MetricsController,
+    export_controller: ExportController,
+    visualize_controller: VisualizeController,
 ) -> AsyncGenerator[AsyncClient]:
     def get_mock_metrics_controller() -> MetricsController:
         return metrics_controller
 
+    def get_mock_export_controller() -> ExportController:
+        return export_controller
+
+    metrics_streams = MetricsStreams(metrics_controller, MetricsStreamConfig())
+
+    def get_mock_metrics_streams() -> MetricsStreams:
+        return metrics_streams
+
+    def get_mock_visualize_controller() -> VisualizeController:
+        return visualize_controller
+
     app.dependency_overrides[get_metrics_controller] = get_mock_metrics_controller
+    app.dependency_overrides[get_export_controller] = get_mock_export_controller
+    app.dependency_overrides[get_metrics_streams] = get_mock_metrics_streams
+    app.dependency_overrides[get_visualize_controller] = get_mock_visualize_controller
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://testurl"
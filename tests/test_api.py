@@ -1,14 +1,26 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
 import httpx
+import pyarrow as pa
 import pytest
+import sqlalchemy
 
+from events_poller.controllers.cache import MetricsCache
 from events_poller.controllers.database import DatabaseController
-from events_poller.models.enum import EventTypeEnum
+from events_poller.controllers.metrics import MetricsController
+from events_poller.controllers.visualize import VisualizeController
+from events_poller.models.enum import EventTypeEnum, FigureFormatEnum, GraphTypeEnum
 from events_poller.models.models import (
     EventAvgTimeMetricRequest,
+    EventAvgTimeVisualizeRequest,
+    EventModel,
     RepositoriesWithMultipleEventsRequest,
     TotalEventsMetricRequest,
 )
-from tests.mock_data import EVENTS_BULK
+from events_poller.settings import CacheConfig, VisualizationConfig
+from tests.mock_data import DATETIME_NOW, EVENTS_BULK
 
 
 @pytest.mark.asyncio
@@ -58,3 +70,474 @@ async def test_get_repositories_with_multiple_events(
     )
 
     assert response.status_code == httpx.codes.OK
+
+
+@pytest.mark.parametrize(
+    "params, events_count",
+    [
+        ({}, 7),
+        ({"event_type": EventTypeEnum.PR_EVENT}, 3),
+        ({"repository_name": "my-repository-1", "action": "opened"}, 2),
+        ({"created_since": (DATETIME_NOW - timedelta(hours=1)).isoformat()}, 6),
+    ],
+)
+@pytest.mark.asyncio
+async def test_export_events_ndjson(
+    params: dict,
+    events_count: int,
+    api_client: httpx.AsyncClient,
+    database_controller: DatabaseController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get(
+        "/events/export", params=params, headers={"accept": "application/x-ndjson"}
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [EventModel.model_validate_json(line) for line in response.iter_lines()]
+    assert len(events) == events_count
+    assert events == sorted(events, key=lambda e: (e.created_at, e.event_id))
+
+
+@pytest.mark.asyncio
+async def test_export_events_csv(
+    api_client: httpx.AsyncClient, database_controller: DatabaseController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get("/events/export", headers={"accept": "text/csv"})
+
+    assert response.status_code == httpx.codes.OK
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {int(r["event_id"]) for r in rows} == {e.event_id for e in EVENTS_BULK}
+
+
+@pytest.mark.asyncio
+async def test_export_events_arrow(
+    api_client: httpx.AsyncClient, database_controller: DatabaseController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get(
+        "/events/export", headers={"accept": "application/vnd.apache.arrow.stream"}
+    )
+
+    assert response.status_code == httpx.codes.OK
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.num_rows == len(EVENTS_BULK)
+    assert sorted(table.column("event_id").to_pylist()) == sorted(
+        e.event_id for e in EVENTS_BULK
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_events_not_acceptable(api_client: httpx.AsyncClient) -> None:
+    response = await api_client.get(
+        "/events/export", headers={"accept": "application/xml"}
+    )
+
+    assert response.status_code == httpx.codes.NOT_ACCEPTABLE
+
+
+@pytest.mark.asyncio
+async def test_execute_metrics_batch(
+    api_client: httpx.AsyncClient, database_controller: DatabaseController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.post(
+        "/metrics/batch",
+        json={
+            "requests": [
+                {"metric": "events-total-count", "params": {"offset": 100}},
+                {"metric": "event-avg-time", "params": {"repository_name": "none"}},
+                {
+                    "metric": "multiple-events-repos",
+                    "params": {"event_type": EventTypeEnum.PR_EVENT},
+                },
+                {"metric": "event-avg-time"},
+            ]
+        },
+    )
+
+    assert response.status_code == httpx.codes.OK
+    results = response.json()["results"]
+    assert [r["metric"] for r in results] == [
+        "events-total-count",
+        "event-avg-time",
+        "multiple-events-repos",
+        "event-avg-time",
+    ]
+    assert [r["status_code"] for r in results] == [200, 400, 200, 200]
+    assert results[1]["result"] is None and results[1]["error"]
+    assert results[3]["result"]["events_count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_execute_metrics_batch_unexpected_error(
+    api_client: httpx.AsyncClient,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+
+    async def fail(*args, **kwargs) -> None:
+        raise sqlalchemy.exc.TimeoutError("QueuePool limit reached")
+
+    monkeypatch.setattr(metrics_controller, "get_events_total_count", fail)
+    response = await api_client.post(
+        "/metrics/batch",
+        json={
+            "requests": [
+                {"metric": "events-total-count", "params": {"offset": 100}},
+                {"metric": "event-avg-time"},
+            ]
+        },
+    )
+
+    assert response.status_code == httpx.codes.OK
+    results = response.json()["results"]
+    assert [r["status_code"] for r in results] == [500, 200]
+    assert results[0]["result"] is None and results[0]["error"]
+    assert results[1]["result"]["events_count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_execute_metrics_batch_invalid(api_client: httpx.AsyncClient) -> None:
+    response = await api_client.post(
+        "/metrics/batch", json={"requests": [{"metric": "unknown"}]}
+    )
+
+    assert response.status_code == httpx.codes.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_get_events_histogram(
+    api_client: httpx.AsyncClient, database_controller: DatabaseController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get(
+        "/metrics/events-histogram", params={"bucket": "hour"}
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert sum(b["events_count"]["total"] for b in response.json()["buckets"]) == 7
+
+
+@pytest.mark.asyncio
+async def test_get_events_histogram_invalid_time_range(
+    api_client: httpx.AsyncClient,
+) -> None:
+    response = await api_client.get(
+        "/metrics/events-histogram",
+        params={
+            "bucket": "minute",
+            "created_since": (DATETIME_NOW - timedelta(days=30)).isoformat(),
+        },
+    )
+
+    assert response.status_code == httpx.codes.BAD_REQUEST
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+@pytest.mark.asyncio
+async def test_get_event_time_distribution(
+    approximate: bool,
+    api_client: httpx.AsyncClient,
+    database_controller: DatabaseController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get(
+        "/metrics/event-time-distribution",
+        params={"event_type": EventTypeEnum.PR_EVENT, "approximate": approximate},
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert response.json()["approximate"] == approximate
+
+
+@pytest.mark.parametrize(
+    "params, repositories",
+    [
+        ({"event_type": EventTypeEnum.PR_EVENT, "k": 5}, [("my-repository", 3)]),
+        (
+            {"event_type": EventTypeEnum.WATCH_EVENT, "offset": 60},
+            [("my-repository-1", 1)],
+        ),
+        (
+            {"event_type": EventTypeEnum.ISSUES_EVENT, "offset": 10000},
+            [("my-repository-1", 1), ("my-repository-2", 1)],
+        ),
+        (
+            {"event_type": EventTypeEnum.ISSUES_EVENT, "offset": 10000, "k": 1},
+            [("my-repository-1", 1)],
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_top_repositories(
+    params: dict,
+    repositories: list[tuple[str, int]],
+    api_client: httpx.AsyncClient,
+    database_controller: DatabaseController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get("/metrics/top-repositories", params=params)
+
+    assert response.status_code == httpx.codes.OK
+    body = response.json()
+    assert not body["approximate"]
+    assert [
+        (r["repository_name"], r["events_count"]) for r in body["repositories"]
+    ] == repositories
+
+
+@pytest.mark.asyncio
+async def test_get_top_repositories_invalid_k(api_client: httpx.AsyncClient) -> None:
+    response = await api_client.get(
+        "/metrics/top-repositories",
+        params={"event_type": EventTypeEnum.PR_EVENT, "k": 5000},
+    )
+
+    assert response.status_code == httpx.codes.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, content_encoding",
+    [
+        ("gzip, deflate, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("identity", None),
+    ],
+)
+@pytest.mark.asyncio
+async def test_response_compression(
+    accept_encoding: str,
+    content_encoding: str | None,
+    api_client: httpx.AsyncClient,
+    database_controller: DatabaseController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get(
+        "/events/export", headers={"accept-encoding": accept_encoding}
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert response.headers.get("content-encoding") == content_encoding
+    # httpx decodes the body transparently
+    assert len(response.text.splitlines()) == len(EVENTS_BULK)
+
+
+@pytest.mark.asyncio
+async def test_small_response_not_compressed(api_client: httpx.AsyncClient) -> None:
+    response = await api_client.get(
+        "/metrics/events-total-count",
+        params={"offset": 100},
+        headers={"accept-encoding": "br"},
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert "content-encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_conditional_request_not_modified(
+    api_client: httpx.AsyncClient,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get("/metrics/event-avg-time")
+    etag = response.headers["etag"]
+    last_modified = response.headers["last-modified"]
+
+    assert response.status_code == httpx.codes.OK
+    assert response.headers["cache-control"] == "public, max-age=5"
+
+    async def calculate_event_avg_time(*args: object) -> None:
+        raise AssertionError("Metric recomputed for a conditional request")
+
+    monkeypatch.setattr(
+        metrics_controller, "calculate_event_avg_time", calculate_event_avg_time
+    )
+    for headers in (
+        {"If-None-Match": etag},
+        {"If-None-Match": f'"other", {etag}'},
+        {"If-Modified-Since": last_modified},
+    ):
+        response = await api_client.get("/metrics/event-avg-time", headers=headers)
+
+        assert response.status_code == httpx.codes.NOT_MODIFIED
+        assert response.headers["etag"] == etag
+        assert not response.content
+
+    monkeypatch.undo()
+    response = await api_client.get(
+        "/metrics/event-avg-time",
+        params={"event_type": EventTypeEnum.WATCH_EVENT},
+        headers={"If-None-Match": etag},
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_conditional_request_refreshed_snapshot(
+    api_client: httpx.AsyncClient,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    watermarks = [DATETIME_NOW]
+
+    async def get_watermark() -> datetime:
+        return watermarks[-1]
+
+    cache = MetricsCache(CacheConfig(watermark_interval=0), get_watermark)
+    monkeypatch.setattr(metrics_controller, "_cache", cache)
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get("/metrics/event-avg-time")
+    etag = response.headers["etag"]
+    await cache._refresh()
+
+    # The snapshot computed at the previous watermark is served without the current watermark's validators
+    watermarks.append(DATETIME_NOW + timedelta(seconds=1))
+    response = await api_client.get("/metrics/event-avg-time")
+
+    assert response.status_code == httpx.codes.OK
+    assert "age" in response.headers
+    assert "etag" not in response.headers
+    assert "last-modified" not in response.headers
+
+    # A client holding the current watermark's validator already has the newer value
+    response = await api_client.get(
+        "/metrics/event-avg-time", headers={"If-None-Match": etag}
+    )
+
+    assert response.status_code == httpx.codes.OK
+
+
+@pytest.mark.asyncio
+async def test_conditional_request_relative_to_now(
+    api_client: httpx.AsyncClient, database_controller: DatabaseController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get(
+        "/visualization/events-total-count", params={"offset": 3600}
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert response.headers["cache-control"] == "public, max-age=30"
+    # Counts relative to the current time have no modification date
+    assert "last-modified" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_stream_metric_invalid_params(api_client: httpx.AsyncClient) -> None:
+    # `offset` is required by the events total count
+    response = await api_client.get("/metrics/stream/events-total-count")
+
+    assert response.status_code == httpx.codes.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_visualize_event_avg_time_downsampled(
+    api_client: httpx.AsyncClient, database_controller: DatabaseController
+) -> None:
+    events = [
+        EventModel(
+            event_id=event_id,
+            event_type=EventTypeEnum.WATCH_EVENT,
+            actor_id=1,
+            repository_id=1,
+            repository_name="my-repository",
+            created_at=DATETIME_NOW - timedelta(seconds=event_id**2),
+            action="started",
+        )
+        for event_id in range(1, 11)
+    ]
+    _ = await database_controller.insert_data_bulk(events)
+    response = await api_client.get(
+        "/visualization/event-avg-time",
+        params={"event_type": EventTypeEnum.WATCH_EVENT},
+    )
+
+    assert response.status_code == httpx.codes.OK
+    assert '"type":"scattergl"' in response.text
+    assert "(9 pairs, 3 shown)" in response.text
+
+
+@pytest.mark.asyncio
+async def test_visualize_figure_json_cached(
+    api_client: httpx.AsyncClient,
+    database_controller: DatabaseController,
+    visualize_controller: VisualizeController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    responses = [
+        await api_client.get("/visualization/events-total-count/figure?offset=3600")
+        for _ in range(2)
+    ]
+
+    assert all(r.status_code == httpx.codes.OK for r in responses)
+    assert responses[0].headers["content-type"] == "application/json"
+    assert responses[0].json() == responses[1].json()
+    assert responses[0].json()["data"][0]["type"] == "bar"
+    # The second response is served from the rendered figures cache
+    assert visualize_controller._cache.stats().hits == 1
+
+
+@pytest.mark.asyncio
+async def test_visualize_render_in_process_pool(
+    metrics_controller: MetricsController, database_controller: DatabaseController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    visualize_controller = VisualizeController(
+        metrics_controller, VisualizationConfig(render_workers=1, cache_entries=0)
+    )
+    try:
+        html = await visualize_controller.render(
+            EventAvgTimeVisualizeRequest(),
+            GraphTypeEnum.AVG_TIME,
+            FigureFormatEnum.HTML,
+        )
+    finally:
+        visualize_controller.close()
+
+    assert html.startswith("<html>")
+    assert "Average time between events" in html
+
+
+@pytest.mark.asyncio
+async def test_prometheus_metrics(api_client: httpx.AsyncClient) -> None:
+    _ = await api_client.get("/metrics/events-total-count", params={"offset": 60})
+    response = await api_client.get("/metrics")
+
+    assert response.status_code == httpx.codes.OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'metrics_controller_duration_seconds_count{method="get_events_total_count"}'
+        in response.text
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_freshness(
+    api_client: httpx.AsyncClient, database_controller: DatabaseController
+) -> None:
+    response = await api_client.get("/status/freshness")
+    assert response.status_code == httpx.codes.OK
+    assert response.json()["events_count"] == 0
+    assert response.json()["lag_p50"] is None
+
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    response = await api_client.get("/status/freshness", params={"window": 60})
+    freshness = response.json()
+
+    assert response.status_code == httpx.codes.OK
+    assert freshness["events_count"] == len(EVENTS_BULK)
+    assert freshness["lag_p50"] <= freshness["lag_p99"] <= freshness["lag_max"]
+    assert freshness["latest_event_age"] >= 0
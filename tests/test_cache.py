@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from events_poller.controllers.cache import MetricsCache, served_value_age
+from events_poller.controllers.database import DatabaseController
+from events_poller.controllers.metrics import MetricsController
+from events_poller.models.models import TotalEventsMetricRequest
+from events_poller.settings import CacheConfig
+from tests.mock_data import EVENTS_BULK
+
+
+class WatermarkStub:
+    def __init__(self) -> None:
+        self.watermark = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+    async def __call__(self) -> datetime:
+        return self.watermark
+
+
+class ComputeStub:
+    def __init__(self, delay: float = 0) -> None:
+        self.calls = 0
+        self._delay = delay
+
+    async def __call__(self) -> int:
+        self.calls += 1
+        await asyncio.sleep(self._delay)
+        return self.calls
+
+
+def get_cache(watermark: WatermarkStub, **config) -> MetricsCache:
+    return MetricsCache(CacheConfig(watermark_interval=0, **config), watermark)
+
+
+@pytest.mark.asyncio
+async def test_cache_hit() -> None:
+    cache = get_cache(WatermarkStub())
+    compute = ComputeStub()
+
+    assert await cache.get_or_compute("key", compute) == 1
+    assert await cache.get_or_compute("key", compute) == 1
+    assert compute.calls == 1
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.hit_rate == 0.5
+
+
+@pytest.mark.asyncio
+async def test_cache_single_flight() -> None:
+    cache = get_cache(WatermarkStub())
+    compute = ComputeStub(delay=0.05)
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute("key", compute) for _ in range(10))
+    )
+    assert results == [1] * 10
+    assert compute.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_watermark_invalidation() -> None:
+    watermark = WatermarkStub()
+    cache = get_cache(watermark)
+    compute = ComputeStub()
+
+    assert await cache.get_or_compute("key", compute) == 1
+    watermark.watermark = datetime(2025, 9, 2, tzinfo=timezone.utc)
+    assert await cache.get_or_compute("key", compute) == 2
+    assert cache.stats().invalidations == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_serves_stale_while_recomputing() -> None:
+    watermark = WatermarkStub()
+    cache = get_cache(watermark)
+    compute = ComputeStub(delay=0.05)
+
+    assert await cache.get_or_compute("key", compute) == 1
+    watermark.watermark = datetime(2025, 9, 2, tzinfo=timezone.utc)
+
+    # The first request recomputes, the concurrent one gets the previous value meanwhile
+    results = await asyncio.gather(
+        cache.get_or_compute("key", compute), cache.get_or_compute("key", compute)
+    )
+    assert results == [2, 1]
+    assert cache.stats().stale_served == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_expiration() -> None:
+    cache = get_cache(WatermarkStub(), ttl=0)
+    compute = ComputeStub()
+
+    assert await cache.get_or_compute("key", compute) == 1
+    assert await cache.get_or_compute("key", compute) == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_lru_eviction() -> None:
+    cache = get_cache(WatermarkStub(), max_entries=2)
+
+    for key in ["a", "b", "a", "c"]:
+        await cache.get_or_compute(key, ComputeStub())
+
+    # "b" is the least recently used one
+    stats = cache.stats()
+    assert stats.entries == 2
+    assert stats.evictions == 1
+    assert await cache.get_or_compute("a", ComputeStub()) == 1
+    assert cache.stats().hits == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_refresh_ahead() -> None:
+    watermark = WatermarkStub()
+    cache = get_cache(watermark, refresh_keys=1)
+    hot_compute, cold_compute = ComputeStub(), ComputeStub()
+
+    for _ in range(3):
+        await cache.get_or_compute("hot", hot_compute)
+    await cache.get_or_compute("cold", cold_compute)
+    assert served_value_age.get() == 0
+
+    # Only the most requested key is recomputed in the background
+    await cache._refresh()
+    assert hot_compute.calls == 2
+    assert cold_compute.calls == 1
+
+    # Its snapshot is served even after the watermark moves, the other one is recomputed
+    watermark.watermark = datetime(2025, 9, 2, tzinfo=timezone.utc)
+    assert await cache.get_or_compute("hot", hot_compute) == 2
+    assert served_value_age.get() is not None
+    assert await cache.get_or_compute("cold", cold_compute) == 2
+
+    stats = cache.stats()
+    assert stats.refreshed_entries == 1
+    assert stats.refreshes == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_refresh_ahead_single_request() -> None:
+    cache = get_cache(WatermarkStub(), refresh_keys=1)
+    compute = ComputeStub()
+    await cache.get_or_compute("key", compute)
+
+    # The request count decays to zero, the key is still refreshed this time
+    await cache._refresh()
+    assert compute.calls == 2
+    assert cache.stats().refresh_failures == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_refresh_ahead_disabled() -> None:
+    cache = get_cache(WatermarkStub(), refresh_interval=0)
+    for key in range(10):
+        await cache.get_or_compute(key, ComputeStub())
+
+    # Nothing decays the request counts without the refreshes, so they aren't kept at all
+    assert not cache._requests
+    assert not cache._computations
+
+
+@pytest.mark.asyncio
+async def test_cached_metrics_controller(
+    database_controller: DatabaseController,
+) -> None:
+    cache = MetricsCache(CacheConfig(), database_controller.get_latest_inserted_at)
+    metrics_controller = MetricsController(database_controller, cache)
+    params = TotalEventsMetricRequest(offset=10000)
+
+    empty_count = await metrics_controller.get_events_total_count(params)
+    assert await metrics_controller.get_events_total_count(params) == empty_count
+    assert cache.stats().hits == 1
+
+    # Newly inserted events move the watermark, the cached count is not served anymore.
+    # The watermark is not re-read before `watermark_interval` passes.
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    await asyncio.sleep(CacheConfig().watermark_interval)
+    events_count = await metrics_controller.get_events_total_count(params)
+    assert events_count.events_count.total == len(EVENTS_BULK)
@@ -1,11 +1,14 @@
 import pytest
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from events_poller.controllers.database import DatabaseController
-from events_poller.models.enum import EventTypeEnum
+from events_poller.controllers.sketches import HyperLogLog
+from events_poller.database.engine import Database
+from events_poller.models.enum import EventTypeEnum, HistogramBucketEnum
 from events_poller.models.models import EventModel
-from tests.mock_data import EVENTS_BULK
+from events_poller.settings import DatabaseConfig, DatabasePoolConfig
+from tests.mock_data import DATETIME_NOW, EVENTS_BULK
 
 
 @pytest.mark.asyncio
@@ -44,6 +47,35 @@ async def test_insert_data_bulk(database_controller: DatabaseController) -> None
         assert e_in == e_db
 
 
+@pytest.mark.asyncio
+async def test_insert_new_events(database_controller: DatabaseController) -> None:
+    inserted_event_ids = await database_controller.insert_new_events(EVENTS_BULK[:3])
+    assert inserted_event_ids == {e.event_id for e in EVENTS_BULK[:3]}
+
+    # Already stored events are skipped
+    inserted_event_ids = await database_controller.insert_new_events(EVENTS_BULK)
+    assert inserted_event_ids == {e.event_id for e in EVENTS_BULK[3:]}
+
+
+@pytest.mark.asyncio
+async def test_get_ingest_lag(database_controller: DatabaseController) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    (
+        events_count,
+        (lag_p50, lag_p90, lag_p99),
+        lag_max,
+        latest_inserted_at,
+        latest_created_at,
+    ) = await database_controller.get_ingest_lag(window=3600)
+
+    assert events_count == len(EVENTS_BULK)
+    assert 0 < lag_p50 <= lag_p90 <= lag_p99 <= lag_max
+    assert latest_created_at == max(e.created_at for e in EVENTS_BULK)
+    assert lag_max == pytest.approx(
+        (latest_inserted_at - min(e.created_at for e in EVENTS_BULK)).total_seconds()
+    )
+
+
 @pytest.mark.parametrize(
     "event_type, repository_name, action, count",
     [
@@ -68,6 +100,98 @@ async def test_get_events_by_type(
     assert len(events_db_orm) == count
 
 
+@pytest.mark.parametrize(
+    "event_type, repository_name, action, chunk_size, chunks_count",
+    [
+        (EventTypeEnum.PR_EVENT, None, None, 2, 2),
+        (EventTypeEnum.PR_EVENT, None, "opened", 10, 1),
+        (EventTypeEnum.WATCH_EVENT, "my-repository-2", None, 10, 0),
+    ],
+)
+@pytest.mark.asyncio
+async def test_stream_events_created_at(
+    event_type: EventTypeEnum,
+    repository_name: str | None,
+    action: str | None,
+    chunk_size: int,
+    chunks_count: int,
+    database_controller: DatabaseController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    chunks = [
+        chunk
+        async for chunk in database_controller.stream_events_created_at(
+            event_type=event_type,
+            repository_name=repository_name,
+            action=action,
+            chunk_size=chunk_size,
+        )
+    ]
+    assert len(chunks) == chunks_count
+
+    created_at = [t for chunk in chunks for t in chunk.tolist()]
+    assert created_at == sorted(
+        e.created_at.timestamp()
+        for e in EVENTS_BULK
+        if e.event_type == event_type
+        and (not repository_name or e.repository_name == repository_name)
+        and (not action or e.action == action)
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [2, 10000])
+@pytest.mark.asyncio
+async def test_stream_events_created_at_by_type(
+    chunk_size: int, database_controller: DatabaseController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    event_types = [EventTypeEnum.PR_EVENT, EventTypeEnum.WATCH_EVENT]
+    created_at: dict[EventTypeEnum, list[float]] = {}
+    async for event_type, chunk in database_controller.stream_events_created_at_by_type(
+        event_types, chunk_size=chunk_size
+    ):
+        created_at.setdefault(event_type, []).extend(chunk.tolist())
+
+    assert created_at == {
+        event_type: sorted(
+            e.created_at.timestamp() for e in EVENTS_BULK if e.event_type == event_type
+        )
+        for event_type in event_types
+    }
+
+
+@pytest.mark.parametrize(
+    "event_type, repository_name, action, oldest_event_id, newest_event_id, count",
+    [
+        (EventTypeEnum.PR_EVENT, None, None, 115, 112, 3),
+        (EventTypeEnum.PR_EVENT, None, "opened", 111, 112, 2),
+        (EventTypeEnum.ISSUES_EVENT, "my-repository-1", None, 116, 116, 1),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_events_time_range(
+    event_type: EventTypeEnum,
+    repository_name: str | None,
+    action: str | None,
+    oldest_event_id: int,
+    newest_event_id: int,
+    count: int,
+    database_controller: DatabaseController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    (
+        oldest_event_time,
+        newest_event_time,
+        events_count,
+    ) = await database_controller.get_events_time_range(
+        event_type=event_type, repository_name=repository_name, action=action
+    )
+    events_by_id = {e.event_id: e for e in EVENTS_BULK}
+    assert oldest_event_time == events_by_id[oldest_event_id].created_at
+    assert newest_event_time == events_by_id[newest_event_id].created_at
+    assert events_count == count
+
+
 @pytest.mark.parametrize(
     "offset, events_grouped",
     [
@@ -100,19 +224,86 @@ async def test_get_events_grouped_by_type(
     events_db_orm = await database_controller.get_events_grouped_by_type(offset)
     assert len(events_db_orm) == len(events_grouped)
     for e_grouped in events_grouped:
-        assert e_grouped in events_db_orm
+        assert e_grouped in [(e[0], e[1]) for e in events_db_orm]
 
+    # The oldest event of each type within the offset is returned along with the count
+    for event_type, _, oldest_event_time in events_db_orm:
+        assert oldest_event_time == min(
+            e.created_at
+            for e in EVENTS_BULK
+            if e.event_type == event_type
+            and e.created_at >= DATETIME_NOW - timedelta(seconds=offset)
+        )
 
-@pytest.mark.parametrize("offset, event_id", [(20, 111), (3600, 114), (10000, 117)])
+
+@pytest.mark.parametrize(
+    "bucket, bucket_size, event_type",
+    [
+        (HistogramBucketEnum.MINUTE, timedelta(minutes=1), None),
+        (HistogramBucketEnum.HOUR, timedelta(hours=1), None),
+        (HistogramBucketEnum.HOUR, timedelta(hours=1), EventTypeEnum.ISSUES_EVENT),
+        (HistogramBucketEnum.DAY, timedelta(days=1), None),
+    ],
+)
 @pytest.mark.asyncio
-async def test_get_oldest_event(
-    offset: int, event_id: int, database_controller: DatabaseController
+async def test_get_events_histogram(
+    bucket: HistogramBucketEnum,
+    bucket_size: timedelta,
+    event_type: EventTypeEnum | None,
+    database_controller: DatabaseController,
 ) -> None:
     _ = await database_controller.insert_data_bulk(EVENTS_BULK)
-    event_db_orm = await database_controller.get_oldest_event(offset)
+    created_since = DATETIME_NOW - timedelta(hours=3)
+    created_until = DATETIME_NOW
+    histogram = await database_controller.get_events_histogram(
+        bucket, created_since, created_until, event_type
+    )
+
+    # Consecutive buckets covering the whole range, including the empty ones
+    bucket_starts = [b[0] for b in histogram]
+    assert bucket_starts[0] <= created_since < bucket_starts[0] + bucket_size
+    assert bucket_starts[-1] < created_until <= bucket_starts[-1] + bucket_size
+    assert all(b - a == bucket_size for a, b in zip(bucket_starts, bucket_starts[1:]))
+
+    for bucket_start, *counts in histogram:
+        for t, count in zip(EventTypeEnum, counts):
+            assert count == sum(
+                1
+                for e in EVENTS_BULK
+                if e.event_type == t
+                and (not event_type or e.event_type == event_type)
+                and bucket_start <= e.created_at < bucket_start + bucket_size
+                and created_since <= e.created_at < created_until
+            )
+
+
+@pytest.mark.asyncio
+async def test_get_actor_sketches(database_controller: DatabaseController) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    bucket_since = (DATETIME_NOW - timedelta(days=1)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    sketches = await database_controller.get_actor_sketches(
+        "my-repository-1", bucket_since
+    )
+    # One sketch per event type and UTC day, all the events have the same actor
+    assert len(sketches) == len(
+        {
+            (e.event_type, e.created_at.date())
+            for e in EVENTS_BULK
+            if e.repository_name == "my-repository-1"
+        }
+    )
+    assert round(HyperLogLog.from_bytes(sketches[0]).estimate()) == 1
+    sketch = HyperLogLog()
+    for registers in sketches:
+        sketch.merge(HyperLogLog.from_bytes(registers))
+    assert round(sketch.estimate()) == 1
     assert (
-        EventModel.model_validate(event_db_orm)
-        == [e for e in EVENTS_BULK if e.event_id == event_id][0]
+        await database_controller.get_unique_actors_count(
+            "my-repository-1", bucket_since
+        )
+        == 1
     )
 
 
@@ -138,3 +329,22 @@ async def test_get_repositories_grouped_by_event_type(
     assert len(event_db_orm) == len(repositories_grouped_by_event_type)
     for r in repositories_grouped_by_event_type:
         assert r in event_db_orm
+
+
+@pytest.mark.asyncio
+async def test_database_warm_up(database_config: DatabaseConfig) -> None:
+    db = Database(
+        database_config.model_copy(
+            update={"pool_config": DatabasePoolConfig(warmup_connections=2)}
+        )
+    )
+    try:
+        await DatabaseController(db).warm_up()
+        pool_status = db.pool_status()
+    finally:
+        await db.close_connection()
+
+    assert pool_status.checked_in == 2
+    assert pool_status.checked_out == 0
+    assert pool_status.waiters == 0
+    assert pool_status.checkouts == 2
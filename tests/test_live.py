@@ -0,0 +1,343 @@
+import asyncio
+import contextlib
+import time
+from collections import Counter
+from collections.abc import AsyncGenerator
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete
+
+from events_poller.controllers.cache import MetricsCache
+from events_poller.controllers.database import DatabaseController
+from events_poller.controllers.live import LiveMetrics
+from events_poller.controllers.metrics import MetricsController
+from events_poller.controllers.streams import MetricsStreams
+from events_poller.database.engine import Database
+from events_poller.database.models import ActorSketches, Events
+from events_poller.models.enum import EventTypeEnum, MetricTypeEnum
+from events_poller.models.models import (
+    EventsInsertedNotificationModel,
+    MetricsBatchItem,
+    MetricsBatchItemResponse,
+    TotalEventsBatchItem,
+    TotalEventsMetricRequest,
+)
+from events_poller.settings import (
+    CacheConfig,
+    DatabaseConfig,
+    LiveMetricsConfig,
+    MetricsStreamConfig,
+)
+from tests.mock_data import EVENTS_BULK
+
+
+@pytest_asyncio.fixture
+async def committing_database(
+    database_config: DatabaseConfig,
+) -> AsyncGenerator[Database]:
+    # Notifications are delivered on commit only, so these tests can't run in a rolled back transaction
+    db = Database(database_config)
+    try:
+        yield db
+    finally:
+        async with db.get_session(commit=True) as session:
+            await session.execute(
+                delete(Events).where(
+                    Events.event_id.in_([e.event_id for e in EVENTS_BULK])
+                )
+            )
+            await session.execute(delete(ActorSketches))
+        await db.close_connection()
+
+
+async def wait_until_ready(live_metrics: LiveMetrics) -> None:
+    for _ in range(100):
+        if live_metrics.ready:
+            return
+        await asyncio.sleep(0.05)
+    raise TimeoutError()
+
+
+@pytest.mark.parametrize(
+    "offset, repository_name, action",
+    [
+        (20, None, None),
+        (3600, None, None),
+        (3600, None, "Opened"),
+        (3600, None, "closed"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_live_metrics_events_grouped_by_type(
+    offset: int,
+    repository_name: str | None,
+    action: str | None,
+    committing_database: Database,
+) -> None:
+    live_metrics_config = LiveMetricsConfig(channel="events_inserted_test")
+    database_controller = DatabaseController(
+        committing_database, notify_channel=live_metrics_config.channel
+    )
+    live_metrics = LiveMetrics(
+        committing_database, database_controller, live_metrics_config
+    )
+    live_metrics_task = asyncio.create_task(live_metrics.run())
+    try:
+        await wait_until_ready(live_metrics)
+
+        # Half of the events exist before the bootstrap, the rest arrives via notifications
+        _ = await database_controller.insert_data_bulk(EVENTS_BULK[::2])
+        live_metrics_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await live_metrics_task
+        live_metrics_task = asyncio.create_task(live_metrics.run())
+        await wait_until_ready(live_metrics)
+        _ = await database_controller.insert_data_bulk(EVENTS_BULK[1::2])
+        await asyncio.sleep(0.1)
+
+        events_grouped = live_metrics.get_events_grouped_by_type(
+            offset, repository_name, action
+        )
+        events_grouped_db = await database_controller.get_events_grouped_by_type(
+            offset, repository_name, action
+        )
+    finally:
+        live_metrics_task.cancel()
+
+    assert sorted(events_grouped) == sorted(events_grouped_db)
+
+
+@pytest.mark.parametrize(
+    "event_type, offset",
+    [(EventTypeEnum.PR_EVENT, 3600), (EventTypeEnum.WATCH_EVENT, 120)],
+)
+@pytest.mark.asyncio
+async def test_live_metrics_top_repositories(
+    event_type: EventTypeEnum, offset: int, committing_database: Database
+) -> None:
+    live_metrics_config = LiveMetricsConfig(channel="events_inserted_test")
+    database_controller = DatabaseController(
+        committing_database, notify_channel=live_metrics_config.channel
+    )
+    live_metrics = LiveMetrics(
+        committing_database, database_controller, live_metrics_config
+    )
+    live_metrics_task = asyncio.create_task(live_metrics.run())
+    try:
+        await wait_until_ready(live_metrics)
+        _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+        await asyncio.sleep(0.1)
+
+        top_repositories = live_metrics.get_top_repositories(event_type, offset, k=2)
+        top_repositories_db = await database_controller.get_top_repositories(
+            event_type, offset, k=2
+        )
+    finally:
+        live_metrics_task.cancel()
+
+    # Nothing is evicted from the summaries with this few repositories, the counts are exact
+    assert [(r, c) for r, c, _ in top_repositories] == list(top_repositories_db)
+    assert all(error == 0 for _, _, error in top_repositories)
+
+
+@pytest.mark.asyncio
+async def test_live_metrics_not_ready(database_controller: DatabaseController) -> None:
+    live_metrics = LiveMetrics(
+        database_controller._database, database_controller, LiveMetricsConfig()
+    )
+    assert live_metrics.get_events_grouped_by_type(offset=20) is None
+
+
+@pytest.mark.asyncio
+async def test_live_metrics_repository_counts_not_kept(
+    database_controller: DatabaseController,
+) -> None:
+    live_metrics = LiveMetrics(
+        database_controller._database, database_controller, LiveMetricsConfig()
+    )
+    live_metrics._ready = True
+    live_metrics._apply(
+        EventsInsertedNotificationModel(
+            txid=1,
+            events=[
+                (time.time(), EventTypeEnum.PR_EVENT, "my-repository", "opened", 1)
+            ],
+        )
+    )
+
+    # Only the summaries track repositories, filtered counts come from the database
+    assert live_metrics.get_events_grouped_by_type(offset=20) is not None
+    assert (
+        live_metrics.get_events_grouped_by_type(
+            offset=20, repository_name="my-repository"
+        )
+        is None
+    )
+    assert [list(bucket) for bucket in live_metrics._buckets.values()] == [
+        [(EventTypeEnum.PR_EVENT, "opened")]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_live_metrics_pruned_without_readers(
+    database_controller: DatabaseController, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    live_metrics = LiveMetrics(
+        database_controller._database,
+        database_controller,
+        LiveMetricsConfig(window=60),
+    )
+    now = time.time()
+    live_metrics._apply(
+        EventsInsertedNotificationModel(
+            txid=1, events=[(now, EventTypeEnum.PR_EVENT, "my-repository", "opened", 1)]
+        )
+    )
+    assert live_metrics._buckets
+
+    # Expired counters are dropped by the next notification, nobody queries them meanwhile
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    live_metrics._apply(EventsInsertedNotificationModel(txid=2, events=[]))
+    assert not live_metrics._buckets
+    assert not live_metrics._totals
+    assert not live_metrics._top_repositories
+
+
+@pytest.mark.parametrize(
+    "txid, snapshot, visible",
+    [
+        (90, "100:110:", True),
+        (105, "100:110:", True),
+        (105, "100:110:103,105", False),
+        (110, "100:110:", False),
+    ],
+)
+def test_live_metrics_snapshot_visibility(
+    txid: int, snapshot: str, visible: bool
+) -> None:
+    assert LiveMetrics._is_visible(txid, snapshot) == visible
+
+
+@pytest.mark.asyncio
+async def test_metrics_streams_fan_out(
+    metrics_controller: MetricsController, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    computations: Counter[str] = Counter()
+    watermark = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+    async def execute_metric(item: MetricsBatchItem) -> MetricsBatchItemResponse:
+        key = item.model_dump_json()
+        computations[key] += 1
+        return MetricsBatchItemResponse(
+            metric=item.metric, error=f"{key} {computations[key]}"
+        )
+
+    async def get_watermark() -> datetime:
+        return watermark
+
+    monkeypatch.setattr(metrics_controller, "execute_metric", execute_metric)
+    monkeypatch.setattr(metrics_controller, "get_watermark", get_watermark)
+
+    streams = MetricsStreams(metrics_controller, MetricsStreamConfig(interval=0.01))
+    streams_task = asyncio.create_task(streams.run())
+    items = [
+        TotalEventsBatchItem(
+            metric=MetricTypeEnum.EVENTS_TOTAL_COUNT,
+            params=TotalEventsMetricRequest(offset=offset),
+        )
+        for offset in (60, 60, 60, 3600)
+    ]
+    subscriptions = [streams.subscribe(item) for item in items]
+    try:
+        first = [
+            await asyncio.wait_for(anext(subscription), 1)
+            for subscription in subscriptions
+        ]
+        watermark += timedelta(seconds=1)
+        second = [
+            await asyncio.wait_for(anext(subscription), 1)
+            for subscription in subscriptions
+        ]
+    finally:
+        streams_task.cancel()
+        for subscription in subscriptions:
+            await subscription.aclose()
+
+    # One computation per parameter set and update, shared by all of its subscribers
+    assert list(computations.values()) == [2, 2]
+    assert all(message.startswith("event: events-total-count\n") for message in first)
+    assert len(set(first)) == len(set(second)) == 2
+    assert not set(first) & set(second)
+    assert not streams._streams
+
+
+@pytest.mark.asyncio
+async def test_metrics_streams_producers_stopped(
+    metrics_controller: MetricsController, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def execute_metric(item: MetricsBatchItem) -> MetricsBatchItemResponse:
+        return MetricsBatchItemResponse(metric=item.metric, error="")
+
+    monkeypatch.setattr(metrics_controller, "execute_metric", execute_metric)
+
+    streams = MetricsStreams(metrics_controller, MetricsStreamConfig(interval=0.01))
+    streams_task = asyncio.create_task(streams.run())
+    subscription = streams.subscribe(
+        TotalEventsBatchItem(
+            metric=MetricTypeEnum.EVENTS_TOTAL_COUNT,
+            params=TotalEventsMetricRequest(offset=60),
+        )
+    )
+    try:
+        await asyncio.wait_for(anext(subscription), 1)
+        (stream,) = streams._streams.values()
+
+        # On shutdown, the producers stop with the task waking them up, even with subscribers left
+        streams_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await streams_task
+        assert stream.producer.cancelled()
+    finally:
+        await subscription.aclose()
+
+
+@pytest.mark.asyncio
+async def test_metrics_streams_refreshed_metric(
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    watermarks = [datetime(2025, 9, 1, tzinfo=timezone.utc)]
+
+    async def get_watermark() -> datetime:
+        return watermarks[-1]
+
+    cache = MetricsCache(CacheConfig(watermark_interval=0), get_watermark)
+    monkeypatch.setattr(metrics_controller, "_cache", cache)
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK[:3])
+
+    stream_config = MetricsStreamConfig(interval=0.05)
+    streams = MetricsStreams(metrics_controller, stream_config)
+    streams_task = asyncio.create_task(streams.run())
+    subscription = streams.subscribe(
+        TotalEventsBatchItem(
+            metric=MetricTypeEnum.EVENTS_TOTAL_COUNT,
+            params=TotalEventsMetricRequest(offset=3600),
+        )
+    )
+    try:
+        first = await asyncio.wait_for(anext(subscription), 1)
+        # The streamed metric is the hottest key, its snapshot is served regardless of the watermark
+        await cache._refresh()
+
+        _ = await database_controller.insert_data_bulk(EVENTS_BULK[3:])
+        watermarks.append(datetime(2025, 9, 2, tzinfo=timezone.utc))
+        second = await asyncio.wait_for(anext(subscription), 2 * stream_config.interval)
+    finally:
+        streams_task.cancel()
+        await subscription.aclose()
+
+    assert '"total":3' in first
+    assert '"total":6' in second
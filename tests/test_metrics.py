@@ -1,12 +1,31 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
 import pytest
 from events_poller.controllers.database import DatabaseController
-from events_poller.controllers.metrics import CalculationFailedError, MetricsController
-from events_poller.models.enum import EventTypeEnum
+from events_poller.controllers.metrics import (
+    CalculationFailedError,
+    InvalidCursorError,
+    InvalidTimeRangeError,
+    MetricsController,
+)
+from events_poller.models.enum import (
+    EventTypeEnum,
+    HistogramBucketEnum,
+    SortOrderEnum,
+)
 from events_poller.models.models import (
     EventAvgTimeMetricRequest,
+    EventAvgTimeVisualizeRequest,
+    EventModel,
+    EventTimeDistributionRequest,
+    EventsHistogramRequest,
     RepositoriesWithMultipleEventsRequest,
+    TopRepositoriesRequest,
+    TotalEventsMetricRequest,
+    UniqueActorsRequest,
 )
-from tests.mock_data import EVENTS_BULK
+from tests.mock_data import DATETIME_NOW, EVENTS_BULK
 
 
 @pytest.mark.asyncio
@@ -18,6 +37,16 @@ async def test_calculate_avg_time_no_data(
         await metrics_controller.calculate_event_avg_time(EventAvgTimeMetricRequest())
 
 
+@pytest.mark.asyncio
+async def test_calculate_avg_time_single_event(
+    database_controller: DatabaseController, metrics_controller: MetricsController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK[:1])
+    with pytest.raises(CalculationFailedError):
+        # There is no pair of adjacent events to calculate the time difference from
+        await metrics_controller.calculate_event_avg_time(EventAvgTimeMetricRequest())
+
+
 @pytest.mark.asyncio
 async def test_calculate_avg_time(
     database_controller: DatabaseController, metrics_controller: MetricsController
@@ -75,3 +104,356 @@ async def test_get_repositories_with_multiple_events(
         repos_with_multi_events_params
     )
     assert len(repos_db.repositories.keys()) == repositories_count
+
+
+@pytest.mark.parametrize(
+    "offset, repository_name, oldest_event_id, total",
+    [
+        (20, None, 111, 3),
+        (3600, "my-repository", 115, 3),
+        (10000, None, 117, 7),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_events_total_count(
+    offset: int,
+    repository_name: str | None,
+    oldest_event_id: int,
+    total: int,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    events_total_count = await metrics_controller.get_events_total_count(
+        TotalEventsMetricRequest(offset=offset, repository_name=repository_name)
+    )
+    assert (
+        events_total_count.oldest_event_time
+        == [e for e in EVENTS_BULK if e.event_id == oldest_event_id][0].created_at
+    )
+    assert events_total_count.repository_name == (repository_name or "all")
+    assert events_total_count.events_count.total == total
+
+
+@pytest.mark.asyncio
+async def test_get_events_histogram(
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    histogram = await metrics_controller.get_events_histogram(
+        EventsHistogramRequest(bucket=HistogramBucketEnum.MINUTE)
+    )
+    # The last 24 hours by default
+    assert len(histogram.buckets) in (24 * 60, 24 * 60 + 1)
+    assert sum(b.events_count.total for b in histogram.buckets) == len(EVENTS_BULK)
+    assert sum(b.events_count.issue_event for b in histogram.buckets) == 2
+
+
+@pytest.mark.parametrize(
+    "bucket, created_since",
+    [
+        (HistogramBucketEnum.HOUR, DATETIME_NOW),
+        (HistogramBucketEnum.MINUTE, DATETIME_NOW - timedelta(days=30)),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_events_histogram_invalid_time_range(
+    bucket: HistogramBucketEnum,
+    created_since: datetime,
+    metrics_controller: MetricsController,
+) -> None:
+    with pytest.raises(InvalidTimeRangeError):
+        await metrics_controller.get_events_histogram(
+            EventsHistogramRequest(
+                bucket=bucket, created_since=created_since, created_until=DATETIME_NOW
+            )
+        )
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+@pytest.mark.asyncio
+async def test_calculate_event_time_distribution(
+    approximate: bool,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    # Bursty traffic, mostly short gaps with a few long ones
+    rng = np.random.default_rng(42)
+    gaps = np.round(rng.pareto(1.5, 500) * 10, 3)
+    created_at = DATETIME_NOW - timedelta(seconds=float(gaps.sum()))
+    events = []
+    for event_id, gap in enumerate(np.concatenate(([0.0], gaps))):
+        created_at += timedelta(seconds=float(gap))
+        events.append(
+            EventModel(
+                event_id=event_id,
+                event_type=EventTypeEnum.WATCH_EVENT,
+                actor_id=1,
+                repository_id=1,
+                repository_name="my-repository",
+                created_at=created_at,
+                action="started",
+            )
+        )
+    _ = await database_controller.insert_data_bulk(events)
+
+    distribution = await metrics_controller.calculate_event_time_distribution(
+        EventTimeDistributionRequest(
+            event_type=EventTypeEnum.WATCH_EVENT, approximate=approximate
+        )
+    )
+    assert distribution.events_count == len(events)
+    assert distribution.oldest_event_time == events[0].created_at
+    assert distribution.approximate == approximate
+    assert distribution.min_time == pytest.approx(gaps.min(), abs=0.01)
+    assert distribution.max_time == pytest.approx(gaps.max(), abs=0.01)
+    assert distribution.avg_time == pytest.approx(gaps.mean(), abs=0.01)
+    assert distribution.stddev_time == pytest.approx(gaps.std(ddof=1), abs=0.01)
+
+    # Approximate quantiles are the sketch estimates of the lower order statistic
+    for quantile, time in [
+        (50, distribution.p50_time),
+        (90, distribution.p90_time),
+        (99, distribution.p99_time),
+    ]:
+        if approximate:
+            expected = np.percentile(gaps, quantile, method="lower")
+            assert time == pytest.approx(expected, rel=0.01, abs=0.01)
+        else:
+            assert time == pytest.approx(np.percentile(gaps, quantile), abs=0.01)
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+@pytest.mark.asyncio
+async def test_calculate_event_time_distribution_single_event(
+    approximate: bool,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK[:1])
+    with pytest.raises(CalculationFailedError):
+        await metrics_controller.calculate_event_time_distribution(
+            EventTimeDistributionRequest(approximate=approximate)
+        )
+
+
+@pytest.mark.parametrize(
+    "event_type, offset, k, top_repositories",
+    [
+        (
+            EventTypeEnum.ISSUES_EVENT,
+            10000,
+            10,
+            [("my-repository-1", 1), ("my-repository-2", 1)],
+        ),
+        (EventTypeEnum.ISSUES_EVENT, 3600, 10, [("my-repository-1", 1)]),
+        (EventTypeEnum.PR_EVENT, 3600, 1, [("my-repository", 3)]),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_top_repositories(
+    event_type: EventTypeEnum,
+    offset: int,
+    k: int,
+    top_repositories: list[tuple[str, int]],
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    # Without live metrics the exact counts come from the database
+    response = await metrics_controller.get_top_repositories(
+        TopRepositoriesRequest(event_type=event_type, offset=offset, k=k)
+    )
+    assert not response.approximate
+    assert [
+        (r.repository_name, r.events_count) for r in response.repositories
+    ] == top_repositories
+
+
+@pytest.mark.parametrize("event_type", [None, EventTypeEnum.WATCH_EVENT])
+@pytest.mark.asyncio
+async def test_get_unique_actors(
+    event_type: EventTypeEnum | None,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    # Sketches are maintained by the inserts, also across multiple batches
+    events = [
+        EventModel(
+            event_id=event_id,
+            event_type=list(EventTypeEnum)[event_id % 3],
+            actor_id=event_id % 700,
+            repository_id=1,
+            repository_name="my-repository",
+            created_at=DATETIME_NOW - timedelta(minutes=event_id % 60),
+            action="opened",
+        )
+        for event_id in range(2000)
+    ]
+    _ = await database_controller.insert_data_bulk(events[:1000])
+    _ = await database_controller.insert_data_bulk(events[1000:])
+
+    params = UniqueActorsRequest(repository_name="my-repository", event_type=event_type)
+    exact = await metrics_controller.get_unique_actors(
+        params.model_copy(update={"exact": True})
+    )
+    approximate = await metrics_controller.get_unique_actors(params)
+
+    assert exact.unique_actors == len(
+        {e.actor_id for e in events if not event_type or e.event_type == event_type}
+    )
+    assert approximate.approximate
+    assert approximate.lower_bound <= exact.unique_actors <= approximate.upper_bound
+
+
+@pytest.mark.parametrize("order", [SortOrderEnum.DESC, SortOrderEnum.ASC])
+@pytest.mark.asyncio
+async def test_get_repositories_with_multiple_events_pagination(
+    order: SortOrderEnum,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    # Repository `my-repository-{i}` has i + 1 events, two of them share each count
+    events = [
+        EventModel(
+            event_id=1000 * i + j,
+            event_type=EventTypeEnum.WATCH_EVENT,
+            actor_id=1,
+            repository_id=i,
+            repository_name=f"my-repository-{i}",
+            created_at=DATETIME_NOW - timedelta(seconds=j),
+            action="started",
+        )
+        for i in range(10)
+        for j in range(i // 2 + 1)
+    ]
+    _ = await database_controller.insert_data_bulk(events)
+
+    params = RepositoriesWithMultipleEventsRequest(
+        event_type=EventTypeEnum.WATCH_EVENT,
+        minimal_events_count=1,
+        limit=3,
+        order=order,
+    )
+    pages = []
+    while True:
+        response = await metrics_controller.get_repositories_with_multiple_events(
+            params
+        )
+        pages.append(list(response.repositories.items()))
+        if not response.next_cursor:
+            break
+        params = params.model_copy(update={"cursor": response.next_cursor})
+
+    repositories = [r for page in pages for r in page]
+    expected = sorted(
+        ((f"my-repository-{i}", i // 2 + 1) for i in range(2, 10)),
+        key=lambda r: (r[1], r[0]),
+        reverse=order == SortOrderEnum.DESC,
+    )
+    assert [len(page) for page in pages] == [3, 3, 2]
+    assert repositories == expected
+
+
+@pytest.mark.asyncio
+async def test_get_repositories_with_multiple_events_pagination_window(
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    def watch_events(
+        first_event_id: int, repository_id: int, count: int, created_at: datetime
+    ) -> list[EventModel]:
+        return [
+            EventModel(
+                event_id=first_event_id + j,
+                event_type=EventTypeEnum.WATCH_EVENT,
+                actor_id=1,
+                repository_id=repository_id,
+                repository_name=f"my-repository-{repository_id}",
+                created_at=created_at - timedelta(seconds=j),
+                action="started",
+            )
+            for j in range(count)
+        ]
+
+    _ = await database_controller.insert_data_bulk(
+        [e for i in range(4) for e in watch_events(1000 * i, i, i + 1, DATETIME_NOW)]
+    )
+    params = RepositoriesWithMultipleEventsRequest(
+        event_type=EventTypeEnum.WATCH_EVENT,
+        minimal_events_count=0,
+        limit=2,
+        offset=3600,
+    )
+    first_page = await metrics_controller.get_repositories_with_multiple_events(params)
+
+    # Events created after the first page was requested don't shift the following pages
+    _ = await database_controller.insert_data_bulk(
+        watch_events(9000, 0, 10, datetime.now(timezone.utc) + timedelta(minutes=1))
+    )
+    second_page = await metrics_controller.get_repositories_with_multiple_events(
+        params.model_copy(update={"cursor": first_page.next_cursor})
+    )
+
+    assert list(first_page.repositories.items()) == [
+        ("my-repository-3", 4),
+        ("my-repository-2", 3),
+    ]
+    assert list(second_page.repositories.items()) == [
+        ("my-repository-1", 2),
+        ("my-repository-0", 1),
+    ]
+    assert second_page.next_cursor is None
+
+
+@pytest.mark.parametrize(
+    "update",
+    [
+        {"cursor": "invalid"},
+        {"event_type": EventTypeEnum.PR_EVENT},
+        {"order": SortOrderEnum.ASC},
+        {"minimal_events_count": 1},
+        {"offset": 3600},
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_repositories_with_multiple_events_invalid_cursor(
+    update: dict,
+    database_controller: DatabaseController,
+    metrics_controller: MetricsController,
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    params = RepositoriesWithMultipleEventsRequest(
+        event_type=EventTypeEnum.ISSUES_EVENT, minimal_events_count=0, limit=1
+    )
+    response = await metrics_controller.get_repositories_with_multiple_events(params)
+    assert response.next_cursor
+
+    # A cursor is only valid with the parameters of the pages it was returned for
+    with pytest.raises(InvalidCursorError):
+        await metrics_controller.get_repositories_with_multiple_events(
+            params.model_copy(update={"cursor": response.next_cursor, **update})
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_time_diff_per_event_type(
+    database_controller: DatabaseController, metrics_controller: MetricsController
+) -> None:
+    _ = await database_controller.insert_data_bulk(EVENTS_BULK)
+    time_diff_per_type = await metrics_controller.get_time_diff_per_event_type(
+        EventAvgTimeVisualizeRequest()
+    )
+
+    assert list(time_diff_per_type) == list(EventTypeEnum)
+    for event_type, time_diff_per_pair in time_diff_per_type.items():
+        created_at_sorted = sorted(
+            e.created_at for e in EVENTS_BULK if e.event_type == event_type
+        )
+        assert time_diff_per_pair.tolist() == pytest.approx(
+            [
+                (created_at_sorted[idx + 1] - created_at_sorted[idx]).total_seconds()
+                for idx in range(len(created_at_sorted) - 1)
+            ]
+        )
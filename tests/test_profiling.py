@@ -0,0 +1,79 @@
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from structlog.testing import capture_logs
+
+from events_poller.api.app import app
+from events_poller.api.profiling import ProfilingMiddleware
+from events_poller.profiling import EventLoopStallMonitor, SamplingProfiler
+from events_poller.settings import ProfilingConfig
+
+
+def busy_wait(duration: float) -> None:
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_profile_request(api_client: httpx.AsyncClient) -> None:
+    # `api_client` overrides the dependencies of the app
+    profiled_app = ProfilingMiddleware(app, ProfilingConfig(request_profiling=True))
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=profiled_app), base_url="http://testurl"
+    ) as client:
+        response = await client.get(
+            "/metrics/events-total-count", params={"offset": 60, "profile": 1}
+        )
+        assert response.status_code == httpx.codes.OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.headers["x-profiled-status"] == "200"
+        assert "function calls" in response.text
+        assert "get_events_total_count" in response.text
+
+        response = await client.get(
+            "/metrics/events-total-count",
+            params={"offset": 0},
+            headers={"X-Profile": "1"},
+        )
+        assert response.headers["x-profiled-status"] == "422"
+
+        response = await client.get(
+            "/metrics/events-total-count", params={"offset": 60}
+        )
+        assert response.json()["events_count"]["total"] == 0
+
+
+def test_sampling_profiler(tmp_path: Path) -> None:
+    output = tmp_path / "profile.folded"
+    profiler = SamplingProfiler(interval=0.001, output=str(output))
+    profiler.start()
+    busy_wait(0.2)
+    profiler.toggle()
+
+    stacks = output.read_text().splitlines()
+    assert stacks
+    assert any("busy_wait (test_profiling.py)" in stack for stack in stacks)
+    assert all(stack.rsplit(" ", 1)[1].isdigit() for stack in stacks)
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stall_monitor() -> None:
+    monitor = asyncio.create_task(EventLoopStallMonitor(threshold=0.05).run())
+    with capture_logs() as logs:
+        await asyncio.sleep(0.05)
+        busy_wait(0.3)
+        await asyncio.sleep(0.05)
+    monitor.cancel()
+
+    detected, finished = (
+        [log for log in logs if log["event"] == f"event_loop_stall_monitor.{event}"]
+        for event in ("stall_detected", "stall_finished")
+    )
+    assert len(detected) == 1
+    assert "busy_wait" in detected[0]["stack"]
+    assert len(finished) == 1
+    assert finished[0]["stalled_for"] >= 0.2
@@ -0,0 +1,100 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from events_poller.controllers.downsampling import lttb
+from events_poller.controllers.sketches import HyperLogLog, SpaceSaving
+
+
+def zipf_stream(size: int, seed: int) -> list[str]:
+    rng = np.random.default_rng(seed)
+    return [f"repository-{r}" for r in rng.zipf(1.3, size)]
+
+
+@pytest.mark.parametrize("capacity", [20, 100, 10000])
+def test_space_saving_top(capacity: int) -> None:
+    stream = zipf_stream(20000, seed=1)
+    summary = SpaceSaving(capacity)
+    for key in stream:
+        summary.add(key)
+
+    exact = Counter(stream)
+    top = SpaceSaving.merge_top([summary], k=5)
+    assert [key for key, _, _ in top] == [key for key, _ in exact.most_common(5)]
+    for key, count, error in top:
+        assert count - error <= exact[key] <= count + error
+        if capacity >= len(exact):
+            assert error == 0
+
+    # Unmonitored keys occurred at most `min_count` times
+    monitored = {key for key, _ in summary.items()}
+    assert all(c <= summary.min_count() for k, c in exact.items() if k not in monitored)
+
+
+def test_space_saving_merge() -> None:
+    streams = [zipf_stream(5000, seed) for seed in range(5)]
+    summaries = []
+    for stream in streams:
+        summary = SpaceSaving(50)
+        for key, count in Counter(stream).items():
+            summary.add(key, count)
+        summaries.append(summary)
+
+    exact = Counter(key for stream in streams for key in stream)
+    top = SpaceSaving.merge_top(summaries, k=3)
+    assert len(top) == 3
+    for key, count, error in top:
+        assert count - error <= exact[key] <= count + error
+
+
+@pytest.mark.parametrize("cardinality", [0, 1, 100, 5000, 200000])
+def test_hyper_log_log_estimate(cardinality: int) -> None:
+    sketch = HyperLogLog()
+    for actor_id in range(cardinality):
+        sketch.add(actor_id)
+        sketch.add(actor_id)
+
+    assert sketch.estimate() == pytest.approx(
+        cardinality, rel=3 * HyperLogLog.relative_error(), abs=0.5
+    )
+
+
+def test_hyper_log_log_merge_and_serialization() -> None:
+    sketches = []
+    for start in range(0, 30000, 10000):
+        sketch = HyperLogLog()
+        # Overlapping ranges, the merged sketch estimates their union
+        for actor_id in range(start, start + 15000):
+            sketch.add(actor_id)
+        sketches.append(HyperLogLog.from_bytes(sketch.to_bytes()))
+
+    merged = HyperLogLog()
+    for sketch in sketches:
+        merged.merge(sketch)
+    assert merged.estimate() == pytest.approx(
+        35000, rel=3 * HyperLogLog.relative_error()
+    )
+
+    # Sketches of a few actors are stored sparsely
+    sparse = HyperLogLog()
+    sparse.add(1)
+    assert len(sparse.to_bytes()) == 3
+    assert HyperLogLog.from_bytes(sparse.to_bytes()).estimate() == pytest.approx(
+        1, abs=0.5
+    )
+    assert HyperLogLog.from_bytes(b"").estimate() == 0
+
+
+@pytest.mark.parametrize("size, points_count", [(100_000, 1000), (10, 3), (10, 20)])
+def test_lttb(size: int, points_count: int) -> None:
+    rng = np.random.default_rng(0)
+    x = np.arange(size, dtype=np.float64)
+    y = rng.exponential(30, size)
+    indices = lttb(x, y, points_count)
+
+    assert len(indices) == min(size, points_count)
+    assert indices[0] == 0 and indices[-1] == size - 1
+    assert np.all(np.diff(indices) > 0)
+    # The largest outlier forms the largest triangle in its bucket
+    assert y.argmax() in indices